@@ -0,0 +1,205 @@
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import DEFAULT_ACTIVITY_CSV, load_activity
+
+# === Lead Sessions and Campaign Funnels ===
+# Lead-level analytics over typed activity frames (activity_loader,
+# attribute_schema or the activity store), written as array operations:
+#   sort_activity()    sorts once by (leadId, activityDate); everything else
+#                      expects that order
+#   sessionize()       a lead's activities belong to one session until a gap
+#                      longer than `gap`; session ids come from a cumulative sum
+#   session_summary()  per-session lead, start, end, activity and click counts
+#                      with reduceat over the contiguous session runs
+#   time_to_click()    per lead and campaign, first open and the first click at
+#                      or after it, from one stable sort and two reductions
+#   campaign_funnel()  leads reaching each stage (open -> click -> visit) per
+#                      campaign, each stage matched to the first event after the
+#                      previous one with merge_asof
+#   activity_counts()  events and distinct leads per campaign and activity type
+# No step calls groupby().apply or loops over leads in Python.
+
+SESSION_GAP = pd.Timedelta(minutes=30)
+ATTRIBUTION_WINDOW = pd.Timedelta(days=1)
+OPEN_TYPE, CLICK_TYPE, VISIT_TYPE = 10, 11, 1
+# per_group stages must happen in the same campaign group as the previous
+# stage; the others (web visits carry no campaign) only for the same lead, within
+# the attribution window
+Stage = namedtuple("Stage", ["name", "type_id", "per_group"])
+FUNNEL_STAGES = [Stage("opened", OPEN_TYPE, True), Stage("clicked", CLICK_TYPE, True),
+                 Stage("visited", VISIT_TYPE, False)]
+FUNNEL_BY = ["campaignId", "primaryAttributeValue"]
+
+
+def _times(frame):
+    # activityDate as int64 milliseconds since the epoch
+    return frame["activityDate"].dt.as_unit("ms").array.asi8
+
+
+def _leads(frame):
+    return frame["leadId"].to_numpy(dtype=np.int64, na_value=-1)
+
+
+def _types(frame):
+    return frame["activityTypeId"].to_numpy(dtype=np.int64, na_value=-1)
+
+
+def _order(major, minor):
+    # Stable row order by (major, minor): one argsort of a packed int64 key when
+    # the two ranges fit in it, lexsort otherwise
+    if len(major) == 0:
+        return np.arange(0)
+    minor_span = int(minor.max()) - int(minor.min()) + 1
+    if (int(major.max()) - int(major.min()) + 1) * minor_span < 2 ** 63:
+        return np.argsort((major - major.min()) * minor_span + (minor - minor.min()), kind="stable")
+    return np.lexsort((minor, major))
+
+
+def _group_codes(frame, by):
+    # Dense code per row for the combination of `by` values (-1 if any is null),
+    # numbered in groupby's sorted order, and the `by` values of each code
+    packed, valid, uniques = np.zeros(len(frame), dtype=np.int64), np.ones(len(frame), dtype=bool), []
+    for column in by:
+        codes, values = pd.factorize(frame[column], sort=True)
+        packed, valid = packed * len(values) + codes, valid & (codes >= 0)
+        uniques.append(values)
+    group = np.full(len(frame), -1, dtype=np.int64)
+    group[valid], combinations = pd.factorize(packed[valid], sort=True)
+    labels = {}
+    for column, values in zip(reversed(by), reversed(uniques)):
+        combinations, codes = np.divmod(combinations, len(values))
+        labels[column] = values.take(codes)
+    labels = pd.DataFrame({column: labels[column] for column in by})
+    return group, pd.MultiIndex.from_frame(labels) if len(by) > 1 else pd.Index(labels[by[0]])
+
+
+def sort_activity(frame):
+    return frame.iloc[_order(_leads(frame), _times(frame))].reset_index(drop=True)
+
+
+def sessionize(frame, gap=SESSION_GAP):
+    # Session number per row of a frame sorted by sort_activity()
+    leads, times = _leads(frame), _times(frame)
+    new = np.ones(len(frame), dtype=bool)
+    new[1:] = (leads[1:] != leads[:-1]) | (np.diff(times) > gap // pd.Timedelta(milliseconds=1))
+    return pd.Series(np.cumsum(new) - 1, index=frame.index, name="sessionId")
+
+
+def session_summary(frame, sessions):
+    # One row per session of a sessionized frame (sessions are contiguous runs)
+    sessions = sessions.to_numpy()
+    if len(sessions) == 0:
+        return pd.DataFrame(columns=["leadId", "start", "end", "activities", "clicks"])
+    starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+    ends = np.r_[starts[1:], len(sessions)] - 1
+    times = _times(frame)
+    return pd.DataFrame({
+        "leadId": _leads(frame)[starts],
+        "start": pd.to_datetime(times[starts], unit="ms", utc=True),
+        "end": pd.to_datetime(times[ends], unit="ms", utc=True),
+        "activities": ends - starts + 1,
+        "clicks": np.add.reduceat((_types(frame) == CLICK_TYPE).astype(np.int64), starts),
+    }, index=pd.Index(sessions[starts], name="sessionId"))
+
+
+def time_to_click(frame, by="campaignId"):
+    # First open and first click at or after it per (lead, `by`) that has an open;
+    # a stable sort by (lead, `by`) keeps each pair's rows in time order
+    types = _types(frame)
+    rows = np.flatnonzero(np.isin(types, [OPEN_TYPE, CLICK_TYPE]) & frame[by].notna().to_numpy())
+    leads, times, types = _leads(frame)[rows], _times(frame)[rows], types[rows]
+    groups, labels = pd.factorize(frame[by].iloc[rows])
+    order = _order(leads, groups)
+    leads, groups, times, types = leads[order], groups[order], times[order], types[order]
+    if len(order) == 0:
+        return pd.DataFrame(columns=["leadId", by, "first_open", "first_click", "time_to_click"])
+
+    starts = np.flatnonzero(np.r_[True, (leads[1:] != leads[:-1]) | (groups[1:] != groups[:-1])])
+    run = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+    never = np.iinfo(np.int64).max
+    first_open = np.minimum.reduceat(np.where(types == OPEN_TYPE, times, never), starts)
+    after_open = (types == CLICK_TYPE) & (times >= first_open[run])
+    first_click = np.minimum.reduceat(np.where(after_open, times, never), starts)
+
+    opened = first_open != never
+    clicked = first_click[opened] != never
+    result = pd.DataFrame({
+        "leadId": leads[starts][opened],
+        by: labels.take(groups[starts][opened]),
+        "first_open": pd.to_datetime(first_open[opened], unit="ms", utc=True),
+        "first_click": pd.to_datetime(np.where(clicked, first_click[opened], 0), unit="ms", utc=True),
+    })
+    result.loc[~clicked, "first_click"] = pd.NaT
+    result["time_to_click"] = result["first_click"] - result["first_open"]
+    return result
+
+
+def campaign_funnel(frame, by=FUNNEL_BY, stages=FUNNEL_STAGES, window=ATTRIBUTION_WINDOW):
+    # Leads per campaign group reaching each stage in order, plus stage-to-stage rates
+    by = list(by)
+    group, labels = _group_codes(frame, by)
+    leads, times, types = _leads(frame), _times(frame), _types(frame)
+    n_groups, never = max(len(labels), 1), np.iinfo(np.int64).max
+
+    # (lead, group) pairs with the first stage; rows are in time order within a
+    # lead, so a pair's first row is its earliest
+    rows = np.flatnonzero((types == stages[0].type_id) & (group >= 0))
+    pairs, first = np.unique(leads[rows] * n_groups + group[rows], return_index=True)
+    pair_leads, pair_groups = np.divmod(pairs, n_groups)
+    reached = {stages[0].name: times[rows][first]}
+    previous = reached[stages[0].name]
+    tolerance = int(window // pd.Timedelta(milliseconds=1)) if window is not None else None
+    for stage in stages[1:]:
+        rows = np.flatnonzero(types == stage.type_id)
+        if stage.per_group:
+            rows = rows[group[rows] >= 0]
+            left_keys, right_keys = pairs, leads[rows] * n_groups + group[rows]
+        else:
+            left_keys, right_keys = pair_leads, leads[rows]
+        # first stage event at or after the previous stage, per pair
+        active = np.flatnonzero(previous != never)
+        active = active[np.argsort(previous[active], kind="stable")]
+        right = np.argsort(times[rows], kind="stable")
+        matched = pd.merge_asof(
+            pd.DataFrame({"key": left_keys[active], "time": previous[active]}),
+            pd.DataFrame({"key": right_keys[right], "time": times[rows][right], "matched": times[rows][right]}),
+            on="time", by="key", direction="forward", tolerance=None if stage.per_group else tolerance,
+        )["matched"].to_numpy(dtype=np.float64)
+        hit = ~np.isnan(matched)
+        current = np.full(len(pairs), never)
+        current[active[hit]] = matched[hit].astype(np.int64)
+        reached[stage.name] = previous = current
+
+    funnel = pd.DataFrame({name: np.bincount(pair_groups[stage_times != never], minlength=len(labels))
+                           for name, stage_times in reached.items()}, index=labels)
+    names = list(reached)
+    for prev, stage in zip(names, names[1:]):
+        funnel[f"{stage}_rate"] = (funnel[stage] / funnel[prev].where(funnel[prev] > 0)).round(4)
+    return funnel
+
+
+def activity_counts(frame, by=("campaignId", "primaryAttributeValue", "activityTypeDesc")):
+    return frame.groupby(list(by), observed=True).agg(events=("leadId", "size"), leads=("leadId", "nunique"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lead sessions and campaign funnels from an activity export.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_ACTIVITY_CSV)
+    parser.add_argument("--gap-minutes", type=int, default=30)
+    args = parser.parse_args()
+
+    activity = sort_activity(load_activity(args.path))
+    sessions = sessionize(activity, pd.Timedelta(minutes=args.gap_minutes))
+    summary = session_summary(activity, sessions)
+    print(f"🧵 {len(summary):,} sessions over {summary['leadId'].nunique():,} leads "
+          f"({summary['activities'].mean():.2f} activities per session)")
+    clicks = time_to_click(activity)
+    print(f"⏱️ Median time from first open to click: {clicks['time_to_click'].median()}")
+    print("\n📊 Campaign funnel:")
+    print(campaign_funnel(activity).to_string())
+    print("\n📊 Activities by campaign and type:")
+    print(activity_counts(activity).to_string())
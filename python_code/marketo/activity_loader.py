@@ -0,0 +1,168 @@
+import argparse
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# === Typed, Chunked Marketo Activity Loader ===
+# Reads the activity exports index.js appends to data/activity_data_*.csv in
+# chunks and gives every column an explicit type: categoricals for the
+# low-cardinality strings (activityTypeDesc, Browser, User Agent, Campaign...),
+# nullable ints for the ids, booleans for the "Is ..." flags and UTC timestamps
+# for activityDate/created_at. The exporter's "undefined" / "N/A" placeholders
+# become real nulls, except in boolean columns: index.js wrote every falsy
+# attribute value as "undefined", so there it means false (an empty value is
+# still null). read_activity_chunks() streams typed chunks for
+# aggregations over files larger than memory; load_activity() concatenates them
+# with merged categories.
+# index.js writes the CSV header from the first activity of a run and appends
+# every later page without one, so activity types with fewer attributes come
+# out as short rows shifted left (an Email Open has no Link attribute, so its
+# Platform value sits under Link, its Step ID under Platform, ...). Short rows of
+# the types in MISSING_ATTRIBUTES are moved back under the right columns first.
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data"))
+DEFAULT_ACTIVITY_CSV = os.path.join(DATA_DIR, "activity_data_11-09-2024.csv")
+DEFAULT_CHUNK_ROWS = 250_000
+NULL_SENTINELS = ["undefined", "N/A", "null", ""]
+BOOLEAN_VALUES = {"true": True, "false": False, "undefined": False}
+
+# column -> "timestamp", "boolean", "category", "string" or a pandas integer dtype.
+# Campaign, step and choice ids are only ever grouped on and repeat across
+# thousands of rows, so they are categories rather than integers.
+ACTIVITY_SCHEMA = {
+    "id": "Int64",
+    "marketoGUID": "string",
+    "leadId": "Int64",
+    "activityDate": "timestamp",
+    "activityTypeId": "Int16",
+    "campaignId": "category",
+    "primaryAttributeValueId": "category",
+    "primaryAttributeValue": "category",
+    "activityTypeDesc": "category",
+    "segment": "category",
+    "created_at": "timestamp",
+    "Bot Activity Pattern": "category",
+    "Browser": "category",
+    "Campaign Run ID": "category",
+    "Choice Number": "category",
+    "Device": "category",
+    "Is Bot Activity": "boolean",
+    "Is Mobile Device": "boolean",
+    "Link": "category",
+    "Platform": "category",
+    "Step ID": "category",
+    "User Agent": "category",
+    "Campaign": "category",
+}
+DEFAULT_COLUMN_TYPE = "category"  # attributes of activity types not in the schema
+MISSING_ATTRIBUTES = {10: ("Link",)}  # activityTypeId -> header attributes its rows leave out
+
+
+def _realign_short_rows(chunk):
+    # Moves the values of short rows (see above) under their own columns; the
+    # missing attributes become empty strings, i.e. nulls after typing
+    last = chunk.columns[-1]
+    for type_id, missing in MISSING_ATTRIBUTES.items():
+        missing = [c for c in missing if c in chunk.columns]
+        if not missing:
+            continue
+        short = (chunk["activityTypeId"] == str(type_id)) & (chunk[last] == "")
+        if not short.any():
+            continue
+        start = min(chunk.columns.get_loc(c) for c in missing)
+        present = [c for c in chunk.columns[start:] if c not in missing]
+        shifted = {col: chunk[col].mask(short, chunk[src])
+                   for col, src in zip(present, chunk.columns[start:start + len(present)])}
+        shifted.update({col: chunk[col].mask(short, "") for col in missing})
+        chunk = chunk.assign(**shifted)
+    return chunk
+
+
+def _typed(series, kind):
+    if kind == "boolean":
+        return series.astype("string").map(BOOLEAN_VALUES).astype("boolean")
+    series = series.astype("string").mask(series.isin(NULL_SENTINELS))
+    if kind == "timestamp":
+        # numpy parses ISO 8601 several times faster than pd.to_datetime; the
+        # exporter always writes UTC with a trailing Z
+        values = series.str.removesuffix("Z").fillna("NaT").to_numpy(dtype=object).astype("datetime64[ms]")
+        return pd.Series(values, index=series.index).dt.tz_localize("UTC")
+    # string -> Int64 is a direct cast, unlike pd.to_numeric
+    return series.astype(kind)
+
+
+def type_activity_frame(frame, schema=ACTIVITY_SCHEMA):
+    # Types a frame of raw string values (as exported, placeholders and all)
+    return pd.DataFrame({col: _typed(frame[col], schema.get(col, DEFAULT_COLUMN_TYPE)) for col in frame.columns})
+
+
+def read_activity_chunks(path=DEFAULT_ACTIVITY_CSV, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None,
+                         schema=ACTIVITY_SCHEMA):
+    # Yields typed DataFrames of up to chunk_rows rows. Each chunk's categoricals
+    # only know the values in that chunk; use load_activity() for one frame.
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, na_filter=False, chunksize=chunk_rows)
+    for chunk in reader:
+        chunk = _realign_short_rows(chunk)
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        yield type_activity_frame(chunk, schema)
+
+
+def concat_chunks(chunks, columns=None):
+    # One frame from typed chunks, merging the chunks' categories
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    if len(chunks) == 1:
+        return chunks[0]
+    frame = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            frame[col] = pd.Series(union_categoricals(parts), name=col)
+        else:
+            frame[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(frame)
+
+
+def load_activity(path=DEFAULT_ACTIVITY_CSV, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None,
+                  schema=ACTIVITY_SCHEMA):
+    return concat_chunks(list(read_activity_chunks(path, chunk_rows, columns, schema)), columns)
+
+
+def stream_counts(path=DEFAULT_ACTIVITY_CSV, by=("activityTypeDesc",), chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Row counts per group, one chunk in memory at a time. "activityDay" in `by`
+    # groups on the UTC calendar day of activityDate.
+    by = list(by)
+    columns = [c for c in by if c != "activityDay"]
+    if "activityDay" in by:
+        columns.append("activityDate")
+    total = None
+    for chunk in read_activity_chunks(path, chunk_rows, columns=list(dict.fromkeys(columns))):
+        if "activityDay" in by:
+            chunk["activityDay"] = chunk["activityDate"].dt.floor("D")
+        counts = chunk.groupby(by, observed=True, dropna=False).size()
+        total = counts if total is None else total.add(counts, fill_value=0)
+    if total is None:
+        return pd.Series(dtype="int64")
+    return total.astype("int64").sort_index()
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a Marketo activity export with explicit types.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_ACTIVITY_CSV)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--by", nargs="+", default=["activityDay", "activityTypeDesc"],
+                        help="columns to count rows by (streamed, one chunk at a time)")
+    args = parser.parse_args()
+
+    activity = load_activity(args.path, args.chunk_rows)
+    print(f"📥 Loaded {len(activity):,} activities from '{args.path}' ({memory_mb(activity):.2f} MB typed)")
+    print(activity.dtypes.to_string())
+
+    print(f"\n📊 Activities by {', '.join(args.by)}:")
+    print(stream_counts(args.path, args.by, args.chunk_rows).to_string())
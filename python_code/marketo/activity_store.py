@@ -0,0 +1,227 @@
+import argparse
+import os
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+from activity_loader import (ACTIVITY_SCHEMA, DATA_DIR, DEFAULT_ACTIVITY_CSV, DEFAULT_CHUNK_ROWS,
+                             DEFAULT_COLUMN_TYPE, read_activity_chunks)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # the store is Parquet; the CSV loader works without it
+    pa = pc = ds = pq = None
+
+# === Partitioned Activity Store ===
+# A Parquet dataset of Marketo activities laid out as
+#   <store>/activityDay=2024-11-06/activityTypeId=11/part-<ingest>-<n>.parquet
+# ingest_activity() types an activity export with activity_loader and appends it
+# to the store, one new file per (day, activity type) touched per ingest;
+# append_activity() does the same for an in-memory batch (e.g. API pages).
+# query_activity() turns a date range, activity types and column filters into
+# one Arrow filter expression: day and type prune whole directories before any
+# file is opened, the other filters skip row groups by their min/max statistics,
+# and only the requested (and filtered) columns are read. The store's schema is
+# kept in <store>/_common_metadata and grows when an export brings new attributes.
+# Appending does not deduplicate; overlapping exports produce repeated rows.
+
+DEFAULT_STORE_DIR = os.path.join(DATA_DIR, "activity_store")
+METADATA_FILE = "_common_metadata"
+_schema_lock = threading.Lock()  # appends from worker threads share the metadata file
+MAX_ROWS_PER_FILE = 1_000_000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The activity store needs pyarrow installed (pip install pyarrow)")
+
+
+def _arrow_type(kind):
+    if kind == "timestamp":
+        return pa.timestamp("ms", tz="UTC")
+    if kind == "boolean":
+        return pa.bool_()
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if kind == "string":
+        return pa.string()
+    return {"Int16": pa.int16(), "Int32": pa.int32(), "Int64": pa.int64()}[kind]
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("activityDay", pa.date32()), ("activityTypeId", pa.int16())]),
+                           flavor="hive")
+
+
+def read_store_schema(store_dir=DEFAULT_STORE_DIR):
+    # Schema of the whole store, partition columns included; None for an empty store
+    _require_pyarrow()
+    path = os.path.join(store_dir, METADATA_FILE)
+    return pq.read_schema(path) if os.path.exists(path) else None
+
+
+def _write_store_schema(store_dir, schema):
+    # Read-unify-write under a lock, replaced atomically so readers never see a partial file
+    path = os.path.join(store_dir, METADATA_FILE)
+    with _schema_lock:
+        current = read_store_schema(store_dir)
+        if current is not None:
+            schema = pa.unify_schemas([current, schema])
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        pq.write_metadata(schema, tmp)
+        os.replace(tmp, path)
+
+
+def _write_frames(frames, columns, store_dir, schema):
+    # Appends typed frames sharing `columns` to the store; returns the rows written
+    file_schema = pa.schema([(c, _arrow_type(schema.get(c, DEFAULT_COLUMN_TYPE))) for c in columns])
+    store_schema = file_schema.append(pa.field("activityDay", pa.date32()))
+    written = 0
+
+    def batches():
+        nonlocal written
+        for frame in frames:
+            table = pa.Table.from_pandas(frame[list(columns)], schema=file_schema, preserve_index=False)
+            table = table.append_column("activityDay", pc.cast(table["activityDate"], pa.date32()))
+            written += table.num_rows
+            yield from table.to_batches()
+
+    os.makedirs(store_dir, exist_ok=True)
+    ds.write_dataset(
+        batches(), store_dir, schema=store_schema, format="parquet", partitioning=_partitioning(),
+        basename_template=f"part-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore", max_rows_per_file=MAX_ROWS_PER_FILE,
+        max_rows_per_group=MAX_ROWS_PER_FILE, max_partitions=100_000,
+    )
+    _write_store_schema(store_dir, store_schema)
+    return written
+
+
+def ingest_activity(paths=(DEFAULT_ACTIVITY_CSV,), store_dir=DEFAULT_STORE_DIR, chunk_rows=DEFAULT_CHUNK_ROWS,
+                    schema=ACTIVITY_SCHEMA):
+    # Appends activity CSVs to the store; returns the number of rows written
+    _require_pyarrow()
+    if isinstance(paths, str):
+        paths = [paths]
+    written = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            header = f.readline().strip().replace('"', "").split(",")
+        written += _write_frames(read_activity_chunks(path, chunk_rows, schema=schema), header, store_dir, schema)
+    return written
+
+
+def append_activity(frame, store_dir=DEFAULT_STORE_DIR, schema=ACTIVITY_SCHEMA):
+    # Appends one typed frame (type_activity_frame()) to the store, e.g. a batch of API pages
+    _require_pyarrow()
+    if frame.empty:
+        return 0
+    return _write_frames([frame], list(frame.columns), store_dir, schema)
+
+
+def open_store(store_dir=DEFAULT_STORE_DIR):
+    _require_pyarrow()
+    schema = read_store_schema(store_dir)
+    if schema is None:
+        raise FileNotFoundError(f"No activity store at '{store_dir}' (run: python activity_store.py ingest)")
+    return ds.dataset(store_dir, schema=schema, format="parquet", partitioning=_partitioning())
+
+
+def _as_utc(value, end=False):
+    # Dates (or "YYYY-MM-DD" strings) cover the whole day: end=2024-11-06 runs up to,
+    # not including, 2024-11-07 00:00 UTC. Naive datetimes are taken as UTC.
+    if isinstance(value, str) and len(value) == 10:
+        value = date.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value + timedelta(days=1) if end else value, time())
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+def activity_filter(start=None, end=None, activity_types=None, where=None, schema=None):
+    # Arrow filter for query_activity(); start/end bound activityDate (end exclusive),
+    # where maps column -> value or list of values, cast to the column's type in
+    # `schema` (so campaignId=10680 matches the category "10680")
+    _require_pyarrow()
+    expr = None
+    conditions = []  # activityDay bounds prune directories, activityDate bounds the rows
+    if start is not None:
+        start = _as_utc(start)
+        conditions.append(ds.field("activityDay") >= pa.scalar(start.date(), pa.date32()))
+        conditions.append(ds.field("activityDate") >= pa.scalar(start.to_pydatetime(), pa.timestamp("ms", tz="UTC")))
+    if end is not None:
+        end = _as_utc(end, end=True)
+        last_day = (end - pd.Timedelta(milliseconds=1)).date()
+        conditions.append(ds.field("activityDay") <= pa.scalar(last_day, pa.date32()))
+        conditions.append(ds.field("activityDate") < pa.scalar(end.to_pydatetime(), pa.timestamp("ms", tz="UTC")))
+    if activity_types is not None:
+        conditions.append(ds.field("activityTypeId").isin(pa.array(list(activity_types), pa.int16())))
+    for column, value in (where or {}).items():
+        values = pa.array(list(value) if isinstance(value, (list, tuple, set)) else [value])
+        if schema is not None:
+            value_type = schema.field(column).type
+            values = values.cast(value_type.value_type if pa.types.is_dictionary(value_type) else value_type)
+        conditions.append(ds.field(column).isin(values))
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+    return expr
+
+
+def query_activity(store_dir=DEFAULT_STORE_DIR, columns=None, start=None, end=None, activity_types=None,
+                   where=None):
+    # DataFrame of the matching activities with only `columns` (default: all)
+    dataset = open_store(store_dir)
+    expr = activity_filter(start, end, activity_types, where, dataset.schema)
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+
+def scanned_files(store_dir=DEFAULT_STORE_DIR, start=None, end=None, activity_types=None, where=None):
+    # (files left after partition pruning, files in the store)
+    dataset = open_store(store_dir)
+    kept = dataset.get_fragments(filter=activity_filter(start, end, activity_types, where, dataset.schema))
+    return sum(1 for _ in kept), len(dataset.files)
+
+
+def _parse_where(items):
+    where = {}
+    for item in items or []:
+        column, _, value = item.partition("=")
+        where.setdefault(column, []).extend(value.split(","))
+    return where
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitioned Parquet store for Marketo activity exports.")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="append activity CSVs to the store")
+    ingest.add_argument("paths", nargs="*", default=[DEFAULT_ACTIVITY_CSV])
+    ingest.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    query = commands.add_parser("query", help="filter the store and count or list activities")
+    query.add_argument("--start", help="first day or timestamp (UTC)")
+    query.add_argument("--end", help="last day (inclusive) or timestamp (exclusive, UTC)")
+    query.add_argument("--types", nargs="+", type=int, help="activityTypeId values, e.g. 11 for Email Click")
+    query.add_argument("--where", nargs="+", metavar="COLUMN=V1,V2", help="equality filters, e.g. campaignId=10680")
+    query.add_argument("--columns", nargs="+", help="columns to list (default: count by --by)")
+    query.add_argument("--by", nargs="+", default=["activityDay", "activityTypeId"])
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        rows = ingest_activity(args.paths, args.store, args.chunk_rows)
+        print(f"📦 Appended {rows:,} activities to '{args.store}'")
+    else:
+        filters = dict(start=args.start, end=args.end, activity_types=args.types, where=_parse_where(args.where))
+        kept, total = scanned_files(args.store, **filters)
+        columns = args.columns or list(dict.fromkeys(args.by))
+        activity = query_activity(args.store, columns=columns, **filters)
+        print(f"🔎 {len(activity):,} activities from {kept} of {total} files")
+        if args.columns:
+            print(activity.to_string(max_rows=50))
+        else:
+            print(activity.groupby(args.by, observed=True, dropna=False).size().to_string())
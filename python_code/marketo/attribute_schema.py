@@ -0,0 +1,152 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import (ACTIVITY_SCHEMA, DATA_DIR, DEFAULT_ACTIVITY_CSV, DEFAULT_CHUNK_ROWS, NULL_SENTINELS,
+                             _realign_short_rows, _typed, concat_chunks, memory_mb)
+
+# === Schema-Driven Attribute Decoding ===
+# Compiles the activity type descriptions index.js exports
+# (data/attribute_types_*.csv) into per-activityTypeId decoders, and decodes
+# raw activity batches (every value a string) into typed, narrow columns:
+# booleans, the smallest nullable int that fits, floats, UTC timestamps, and
+# categoricals for strings. Each attribute is decoded with one vectorized call
+# per group of activity types that agree on its datatype; rows of types that do
+# not have the attribute come out null. Rows of activity types with no compiled
+# attribute types (index.js exports 6-11, the file only describes some) keep
+# activity_loader's base typing for every column.
+# The exported file only names the attributes of its first activity type (the
+# CSV header comes from the first row); the other rows list their datatypes in
+# Marketo's attribute order, which is alphabetical. ATTRIBUTE_NAMES supplies the
+# names for the types this repo exports; a long file with
+# activityTypeId,attribute,dataType columns can be compiled as well.
+# index.js wrote every falsy attribute value as "undefined", so for boolean
+# attributes "undefined" is false (the same rule activity_loader applies). For
+# integers it may have been 0 or missing and is decoded as null.
+
+ATTRIBUTE_TYPES_CSV = os.path.join(DATA_DIR, "attribute_types_11-09-2024.csv")
+# activityTypeId -> attribute names in Marketo's (alphabetical) order
+ATTRIBUTE_NAMES = {
+    10: ["Bot Activity Pattern", "Browser", "Campaign Run ID", "Choice Number", "Device", "Is Bot Activity",
+         "Is Mobile Device", "Is Predictive", "Platform", "Step ID", "Test Variant", "User Agent"],
+    11: ["Bot Activity Pattern", "Browser", "Campaign Run ID", "Choice Number", "Device", "Is Bot Activity",
+         "Is Mobile Device", "Is Predictive", "Link", "Link ID", "Platform", "Step ID", "Test Variant",
+         "User Agent"],
+}
+# Marketo dataType -> decoded kind; anything else (array, complex, mixed, ...) is a category
+DATATYPE_KINDS = {
+    "string": "category", "text": "category", "email": "category", "url": "category", "phone": "category",
+    "boolean": "boolean", "integer": "integer", "float": "float", "currency": "float",
+    "date": "timestamp", "datetime": "timestamp",
+}
+INT_DTYPES = ["Int8", "Int16", "Int32", "Int64"]
+
+
+def read_attribute_types(path=ATTRIBUTE_TYPES_CSV, names=ATTRIBUTE_NAMES):
+    # {activityTypeId: {attribute: dataType}} for the types whose attribute names are known
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    header, rows = rows[0], [row for row in rows[1:] if row]
+    if header[:3] == ["activityTypeId", "attribute", "dataType"]:
+        types = {}
+        for type_id, attribute, datatype in rows:
+            types.setdefault(int(type_id), {})[attribute] = datatype
+        return types
+    types = {}
+    for i, row in enumerate(rows):
+        type_id, datatypes = int(row[0]), row[3:]
+        attribute_names = header[3:] if i == 0 else names.get(type_id)
+        if attribute_names is not None and len(attribute_names) == len(datatypes):
+            types[type_id] = dict(zip(attribute_names, datatypes))
+    return types
+
+
+def _decode(values, kind):
+    # One vectorized conversion of raw strings (placeholders still in them)
+    if kind == "integer":
+        decoded = values.astype("string").mask(values.isin(NULL_SENTINELS)).astype("Int64")
+        low, high = decoded.min(), decoded.max()
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype.lower())
+            if pd.isna(low) or (info.min <= low and high <= info.max):
+                return decoded.astype(dtype)
+    if kind == "float":
+        return values.astype("string").mask(values.isin(NULL_SENTINELS)).astype("Float64")
+    return _typed(values, kind)
+
+
+class AttributeDecoder:
+    def __init__(self, attribute_types, base_schema=ACTIVITY_SCHEMA):
+        self.attribute_types = attribute_types
+        self.base_schema = base_schema
+        # attribute -> {kind: [activityTypeIds]}
+        self.plan = {}
+        for type_id, attributes in attribute_types.items():
+            for attribute, datatype in attributes.items():
+                kind = DATATYPE_KINDS.get(datatype, "category")
+                self.plan.setdefault(attribute, {}).setdefault(kind, []).append(type_id)
+
+    def decode(self, frame):
+        # Typed copy of a raw activity frame (string values, realigned short rows)
+        type_ids = pd.to_numeric(frame["activityTypeId"], errors="coerce").to_numpy()
+        masks = {}  # tuple of activityTypeIds -> rows of those types
+
+        def rows_of(ids):
+            if tuple(ids) not in masks:
+                masks[tuple(ids)] = np.isin(type_ids, ids)
+            return masks[tuple(ids)]
+
+        # rows of activity types the attribute types file does not describe
+        undescribed = ~rows_of(sorted(self.attribute_types))
+
+        columns = {}
+        for column in frame.columns:
+            kinds = self.plan.get(column)
+            base_kind = self.base_schema.get(column, "category")
+            if kinds is None:  # base fields (id, leadId, activityDate, ...) and unknown attributes
+                columns[column] = _typed(frame[column], base_kind)
+                continue
+            groups = {kind: rows_of(ids) for kind, ids in kinds.items()}  # kind -> rows decoded as it
+            if undescribed.any():
+                groups[base_kind] = groups.get(base_kind, False) | undescribed
+            if len(groups) == 1:
+                (kind, rows), = groups.items()
+                decoded = _decode(frame[column], kind)
+                if not rows.all():  # described types without this attribute get nulls
+                    decoded = decoded.mask(~rows)
+                columns[column] = decoded
+            else:
+                # groups disagree on the datatype: decode each group, keep the text
+                parts = pd.Series(pd.NA, index=frame.index, dtype="string")
+                for kind, rows in groups.items():
+                    parts[rows] = _decode(frame.loc[rows, column], kind).astype("string")
+                columns[column] = parts.astype("category")
+        return pd.DataFrame(columns, index=frame.index)
+
+
+def compile_decoder(path=ATTRIBUTE_TYPES_CSV, names=ATTRIBUTE_NAMES, base_schema=ACTIVITY_SCHEMA):
+    return AttributeDecoder(read_attribute_types(path, names), base_schema)
+
+
+def read_decoded_chunks(path=DEFAULT_ACTIVITY_CSV, decoder=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Like activity_loader.read_activity_chunks(), typed through the compiled attribute types
+    decoder = decoder or compile_decoder()
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, na_filter=False, chunksize=chunk_rows)
+    for chunk in reader:
+        yield decoder.decode(_realign_short_rows(chunk))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode activity attributes using the exported attribute types.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_ACTIVITY_CSV)
+    parser.add_argument("--attribute-types", default=ATTRIBUTE_TYPES_CSV)
+    args = parser.parse_args()
+
+    decoder = compile_decoder(args.attribute_types)
+    print(f"🧩 Compiled attribute types for activity types {sorted(decoder.attribute_types)}")
+    activity = concat_chunks(list(read_decoded_chunks(args.path, decoder)))
+    print(f"📥 Decoded {len(activity):,} activities ({memory_mb(activity):.2f} MB)")
+    print(activity.dtypes.to_string())
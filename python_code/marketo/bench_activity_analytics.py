@@ -0,0 +1,118 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from activity_analytics import (CLICK_TYPE, OPEN_TYPE, SESSION_GAP, VISIT_TYPE, campaign_funnel, session_summary,
+                                sessionize, sort_activity, time_to_click)
+from activity_loader import memory_mb
+from bench_timing import timed
+
+# === Sessionization and Funnel Benchmark ===
+# Builds typed activity frames directly (the shape activity_loader returns, no
+# CSV round trip, so 10M rows fit in a run): ~10 activities per lead, email
+# opens across 40 campaigns, clicks after some opens and web visits
+# after some clicks, shuffled like an export. Times the vectorized sort,
+# sessionize, time_to_click and campaign_funnel, and the groupby().apply
+# versions they replace on frames up to --apply-max-rows (checking both agree).
+#   python bench_activity_analytics.py --rows 1000000 10000000
+
+CLICK_RATE, VISIT_RATE = 0.15, 0.5
+START = pd.Timestamp("2024-10-01", tz="UTC")
+
+
+def synthetic_activity(n_rows, n_campaigns=40, days=30, seed=0):
+    rng = np.random.default_rng(seed)
+    n_opens = int(n_rows / (1 + CLICK_RATE + CLICK_RATE * VISIT_RATE))
+    leads = rng.integers(1, max(2, n_rows // 10), size=n_opens)
+    campaigns = rng.integers(0, n_campaigns, size=n_opens)
+    opened = rng.integers(0, days * 86_400_000, size=n_opens)
+    clicks = np.flatnonzero(rng.random(n_opens) < CLICK_RATE)
+    clicked = opened[clicks] + rng.exponential(600_000, size=len(clicks)).astype(np.int64)
+    visits = clicks[rng.random(len(clicks)) < VISIT_RATE]
+    visited = opened[visits] + rng.exponential(3_600_000, size=len(visits)).astype(np.int64)
+
+    n = n_opens + len(clicks) + len(visits)
+    order = rng.permutation(n)
+    campaign = np.concatenate([campaigns, campaigns[clicks], np.full(len(visits), -1)])[order]
+    type_id = np.concatenate([np.full(n_opens, OPEN_TYPE), np.full(len(clicks), CLICK_TYPE),
+                              np.full(len(visits), VISIT_TYPE)])[order]
+    names = np.array([f"Newsletter {i}.Email {i}" for i in range(n_campaigns)])
+    return pd.DataFrame({
+        "leadId": pd.array(np.concatenate([leads, leads[clicks], leads[visits]])[order], dtype="Int64"),
+        "activityDate": START + pd.to_timedelta(np.concatenate([opened, clicked, visited])[order], unit="ms"),
+        "activityTypeId": pd.array(type_id, dtype="Int16"),
+        "campaignId": pd.Categorical.from_codes(campaign, [str(10_000 + i) for i in range(n_campaigns)]),
+        "primaryAttributeValue": pd.Categorical.from_codes(campaign, names),
+        "activityTypeDesc": pd.Categorical.from_codes(np.searchsorted([VISIT_TYPE, OPEN_TYPE, CLICK_TYPE], type_id),
+                                                      ["Visit Webpage", "Email Open", "Email Click"]),
+    })
+
+
+# --- groupby().apply baselines ---
+
+def apply_sessions(frame):
+    ordered = frame.sort_values(["leadId", "activityDate"])
+    per_lead = ordered.groupby("leadId", group_keys=False).apply(
+        lambda g: (g["activityDate"].diff() > SESSION_GAP).cumsum())
+    # session number within each lead; a lead's session count is its last number + 1
+    return int((per_lead.groupby(ordered["leadId"]).max() + 1).sum())
+
+
+def apply_time_to_click(frame):
+    def first_click(g):
+        opens = g.loc[g["activityTypeId"] == OPEN_TYPE, "activityDate"]
+        if opens.empty:
+            return None
+        clicks = g.loc[(g["activityTypeId"] == CLICK_TYPE) & (g["activityDate"] >= opens.min()), "activityDate"]
+        return clicks.min() - opens.min() if len(clicks) else pd.NaT
+
+    rows = frame[frame["activityTypeId"].isin([OPEN_TYPE, CLICK_TYPE])]
+    return rows.groupby(["leadId", "campaignId"], observed=True).apply(first_click).dropna()
+
+
+def apply_funnel(frame):
+    def stages(g):
+        opened = g.loc[g["activityTypeId"] == OPEN_TYPE, "activityDate"].min()
+        clicked = g.loc[(g["activityTypeId"] == CLICK_TYPE) & (g["activityDate"] >= opened), "activityDate"].min()
+        return pd.Series({"opened": pd.notna(opened), "clicked": pd.notna(clicked)})
+
+    rows = frame[frame["activityTypeId"].isin([OPEN_TYPE, CLICK_TYPE])]
+    return rows.groupby(["campaignId", "leadId"], observed=True).apply(stages).groupby(level=0).sum()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vectorized sessionization and funnels.")
+    parser.add_argument("--rows", nargs="+", type=int, default=[1_000_000, 10_000_000])
+    parser.add_argument("--apply-max-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        frame = synthetic_activity(n_rows)
+        print(f"\n📦 {len(frame):,} activities, {frame['leadId'].nunique():,} leads ({memory_mb(frame):.1f} MB)")
+        sort_s, ordered = timed(lambda: sort_activity(frame))
+        session_s, sessions = timed(lambda: sessionize(ordered))
+        summary_s, summary = timed(lambda: session_summary(ordered, sessions))
+        click_s, clicks = timed(lambda: time_to_click(ordered))
+        funnel_s, funnel = timed(lambda: campaign_funnel(ordered))
+        results = {"sort": (sort_s, None), "sessionize": (session_s + summary_s, None),
+                   "time_to_click": (click_s, None), "funnel": (funnel_s, None)}
+
+        if n_rows <= args.apply_max_rows:
+            apply_s, n_sessions = timed(lambda: apply_sessions(frame))
+            results["sessionize"] = (results["sessionize"][0], apply_s)
+            assert n_sessions == len(summary), (n_sessions, len(summary))
+            apply_s, deltas = timed(lambda: apply_time_to_click(frame))
+            results["time_to_click"] = (click_s, apply_s)
+            clicked = clicks["time_to_click"].dropna()
+            assert len(deltas) == len(clicked) and (np.sort(deltas.to_numpy()) == np.sort(clicked.to_numpy())).all()
+            apply_s, counts = timed(lambda: apply_funnel(frame))
+            results["funnel"] = (funnel_s, apply_s)
+            assert (counts.to_numpy() == funnel[["opened", "clicked"]].to_numpy()).all()
+
+        print(f"{'':>14} {'vectorized s':>13} {'apply s':>9} {'speedup':>8}")
+        for name, (fast, slow) in results.items():
+            slow_text, speedup = (f"{slow:>9.2f}", f"{slow / fast:>7.0f}x") if slow else (f"{'-':>9}", f"{'':>8}")
+            print(f"{name:>14} {fast:>13.2f} {slow_text} {speedup}")
+        print(f"🧵 {len(summary):,} sessions, {clicks['first_click'].notna().sum():,} lead/campaign clicks, "
+              f"{int(funnel['visited'].sum()):,} attributed visits")
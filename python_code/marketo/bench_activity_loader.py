@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import DEFAULT_ACTIVITY_CSV, DEFAULT_CHUNK_ROWS, load_activity, memory_mb, stream_counts
+from bench_timing import timed
+
+# === Activity Loader Benchmark ===
+# Tiles the checked-in activity export up to each size (fresh ids, leads and
+# timestamps spread over a month, same strings and the same short Email Open
+# rows), then compares in separate processes:
+#   naive   pd.read_csv with default types (what a quick notebook does)
+#   typed   load_activity(): explicit schema, categoricals, real nulls
+#   stream  stream_counts() by day and activity type, one chunk in memory
+#   python bench_activity_loader.py --rows 100000 1000000
+
+MODES = ("naive", "typed", "stream")
+
+
+def write_synthetic_export(path, n_rows, sample=DEFAULT_ACTIVITY_CSV, seed=0):
+    # Raw lines are tiled so the file keeps the exporter's exact quoting and short rows
+    rng = np.random.default_rng(seed)
+    with open(sample, encoding="utf-8") as f:
+        header = f.readline()
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    seconds = rng.integers(0, 30 * 86400, size=n_rows)
+    stamps = (np.datetime64("2024-11-01T00:00:00") + seconds.astype("timedelta64[s]")).astype(str)
+    leads = rng.integers(1_000_000, 7_000_000, size=n_rows)
+    picks = rng.integers(len(lines), size=n_rows)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header)
+        for i, (pick, stamp, lead) in enumerate(zip(picks, stamps, leads)):
+            fields = lines[pick].split('","')
+            activity_id = 2_100_000_000 + i
+            fields[0] = f'"{activity_id}'
+            fields[1] = str(activity_id)
+            fields[2] = str(lead)
+            fields[3] = f"{stamp}Z"
+            f.write('","'.join(fields) + "\n")
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(mode, path):
+    def load():
+        if mode == "naive":
+            return memory_mb(pd.read_csv(path))
+        if mode == "typed":
+            return memory_mb(load_activity(path))
+        return memory_mb(stream_counts(path, ["activityDay", "activityTypeDesc"]).to_frame())
+
+    rss_before = peak_rss_mb()
+    elapsed, frame_mb = timed(load)
+    print(json.dumps({
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "frame_mb": round(frame_mb, 1),
+        "peak_delta_mb": round(peak_rss_mb() - rss_before, 1),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the typed Marketo activity loader.")
+    parser.add_argument("--rows", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        sys.exit(0)
+
+    print(f"{'rows':>10} {'mode':>7} {'seconds':>8} {'frame MB':>9} {'peak +MB':>9}  (chunks of {DEFAULT_CHUNK_ROWS:,})")
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "activity.csv")
+            write_synthetic_export(path, n_rows)
+            for mode in args.modes:
+                out = subprocess.run([sys.executable, __file__, "--child", mode, path],
+                                     capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n_rows:>10,} {r['mode']:>7} {r['seconds']:>8.2f} {r['frame_mb']:>9.1f} "
+                      f"{r['peak_delta_mb']:>9.1f}")
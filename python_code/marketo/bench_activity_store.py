@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from activity_loader import load_activity
+from activity_store import ingest_activity, query_activity, scanned_files
+from bench_activity_loader import write_synthetic_export
+from bench_timing import timed
+
+# === Activity Store Benchmark ===
+# Writes a synthetic export (see bench_activity_loader; a month of activity),
+# ingests it into a fresh store and times typical dashboard queries against the
+# store and against loading the typed CSV and filtering it in pandas.
+#   python bench_activity_store.py --rows 1000000
+
+QUERIES = {
+    "clicks, campaign 10680, last week": dict(
+        start="2024-11-24", end="2024-11-30", activity_types=[11], where={"campaignId": 10680},
+        columns=["leadId", "activityDate", "Link"]),
+    "opens by device, one day": dict(
+        start="2024-11-15", end="2024-11-15", activity_types=[10], columns=["Device"]),
+    "all activity, leads only, whole month": dict(columns=["leadId"]),
+}
+
+
+def csv_query(frame, start=None, end=None, activity_types=None, where=None, columns=None):
+    rows = frame
+    if start is not None:
+        rows = rows[rows["activityDate"] >= pd.Timestamp(start, tz="UTC")]
+    if end is not None:
+        rows = rows[rows["activityDate"] < pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)]
+    if activity_types is not None:
+        rows = rows[rows["activityTypeId"].isin(activity_types)]
+    for column, value in (where or {}).items():
+        rows = rows[rows[column] == str(value)]
+    return rows[columns]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the partitioned activity store.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "activity.csv")
+        store_dir = os.path.join(tmp, "store")
+        write_synthetic_export(csv_path, args.rows)
+
+        ingest_s, _ = timed(lambda: ingest_activity(csv_path, store_dir))
+        print(f"📦 Ingested {args.rows:,} rows in {ingest_s:.2f}s")
+        csv_load, frame = timed(lambda: load_activity(csv_path))
+        print(f"📥 Typed CSV load (every query pays this without the store): {csv_load:.2f}s\n")
+
+        print(f"{'query':<40} {'rows':>9} {'files':>9} {'store s':>8} {'csv s':>7}")
+        for name, query in QUERIES.items():
+            filters = {k: v for k, v in query.items() if k != "columns"}
+            best, result = timed(lambda: query_activity(store_dir, **query), args.repeat)
+            expected = csv_query(frame, **query)
+            assert len(result) == len(expected), (name, len(result), len(expected))
+            kept, total = scanned_files(store_dir, **filters)
+            filtered, _ = timed(lambda: csv_query(frame, **query))
+            print(f"{name:<40} {len(result):>9,} {f'{kept}/{total}':>9} {best:>8.3f} {csv_load + filtered:>7.2f}")
@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from activity_loader import _realign_short_rows, concat_chunks, load_activity, memory_mb
+from attribute_schema import compile_decoder, read_decoded_chunks
+from bench_activity_loader import write_synthetic_export
+from bench_timing import timed
+
+# === Attribute Decoding Benchmark ===
+# Loads a synthetic export (see bench_activity_loader) three ways and compares
+# load time, memory and a typical attribute filter ("mobile email clicks from
+# step 13404 that are not bots"):
+#   raw      every value a string, as exported; the filter compares strings
+#   loader   activity_loader's generic schema (ids as categories)
+#   decoded  attribute_schema's compiled per-type decoder
+#   python bench_attribute_schema.py --rows 1000000
+
+
+def raw_filter(df):
+    return int(((df["activityTypeId"] == "11") & (df["Is Mobile Device"] == "true") & (df["Step ID"] == "13404")
+                & (df["Is Bot Activity"] != "true")).sum())
+
+
+def loader_filter(df):
+    return int(((df["activityTypeId"] == 11) & df["Is Mobile Device"] & (df["Step ID"] == "13404")
+                & ~df["Is Bot Activity"]).sum())
+
+
+def decoded_filter(df):
+    return int(((df["activityTypeId"] == 11) & df["Is Mobile Device"] & (df["Step ID"] == 13404)
+                & ~df["Is Bot Activity"]).sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark schema-driven attribute decoding.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "activity.csv")
+        write_synthetic_export(path, args.rows)
+        decoder = compile_decoder()
+        loads = {
+            "raw": lambda: _realign_short_rows(pd.read_csv(path, dtype=str, keep_default_na=False,
+                                                           na_filter=False)),
+            "loader": lambda: load_activity(path),
+            "decoded": lambda: concat_chunks(list(read_decoded_chunks(path, decoder))),
+        }
+        filters = {"raw": raw_filter, "loader": loader_filter, "decoded": decoded_filter}
+
+        print(f"{'':>8} {'load s':>7} {'MB':>7} {'filter ms':>10} {'matches':>8}")
+        for name, load in loads.items():
+            load_s, frame = timed(load)
+            filter_s, matches = timed(lambda: filters[name](frame), repeat=5)
+            print(f"{name:>8} {load_s:>7.2f} {memory_mb(frame):>7.1f} {filter_s * 1000:>10.1f} {matches:>8,}")
@@ -0,0 +1,77 @@
+import argparse
+import os
+import statistics
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from bench_activity_loader import write_synthetic_export
+from bench_timing import timed
+from guid_index import GuidIndex, guid_keys, rebuild_index
+
+# === GUID Index Benchmark ===
+# For each history size, fills an index with that many GUIDs and then times
+# deduplicating export batches (--overlap of each batch already seen) against
+# what a reload does today: concatenating the history's GUIDs with the batch
+# and calling drop_duplicates (without even counting the CSV parse). Also times
+# rebuilding an index from a synthetic export CSV of --csv-rows rows.
+#   python bench_guid_index.py --history 1000000 10000000 --batch 10000
+
+FIRST_GUID = 2_000_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the marketoGUID dedup index.")
+    parser.add_argument("--history", nargs="+", type=int, default=[1_000_000, 10_000_000])
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--overlap", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--csv-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'history':>12} {'build s':>8} {'index ms/batch':>15} {'reload ms/batch':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_history in args.history:
+            history = np.arange(FIRST_GUID, FIRST_GUID + n_history).astype(str)
+            path = os.path.join(tmp, f"history_{n_history}.guidx")
+            def build_index():
+                with GuidIndex(path) as index:
+                    index.begin()
+                    for chunk in range(0, n_history, 1_000_000):
+                        index.add(guid_keys(history[chunk:chunk + 1_000_000]))
+                    index.commit(0)
+
+            build, _ = timed(build_index)
+
+            seen = rng.choice(history, size=int(args.batch * args.overlap), replace=False)
+            fresh = np.arange(args.batch - len(seen)) + FIRST_GUID + n_history
+            batch = np.concatenate([seen, fresh.astype(str)])
+            history_series = pd.Series(history, dtype="string")
+
+            def index_batch():
+                # lookups only, so every run sees the same history (add() probes the same way)
+                with GuidIndex(path) as index:
+                    keys = guid_keys(batch)
+                    new = ~index.contains(keys)
+                    assert new.sum() == len(fresh)
+
+            def reload_batch():
+                combined = pd.concat([history_series, pd.Series(batch, dtype="string")], ignore_index=True)
+                assert len(combined.drop_duplicates()) == n_history + len(fresh)
+
+            index_ms = timed(index_batch, args.repeat, statistics.median)[0] * 1000
+            reload_ms = timed(reload_batch, args.repeat, statistics.median)[0] * 1000
+            print(f"{n_history:>12,} {build:>8.2f} {index_ms:>15.1f} {reload_ms:>16.1f}")
+
+        if args.csv_rows:
+            csv_path = os.path.join(tmp, "activity.csv")
+            write_synthetic_export(csv_path, args.csv_rows)
+            def rebuild():
+                with rebuild_index(csv_path) as index:
+                    return index.count
+
+            rebuild_s, count = timed(rebuild)
+            print(f"\n🔁 Rebuilt the index from a {args.csv_rows:,}-row export ({count:,} GUIDs) "
+                  f"in {rebuild_s:.2f}s")
@@ -0,0 +1,15 @@
+import time
+
+# === Benchmark Timing ===
+# The one timing helper the bench_*.py scripts share: runs fn `repeat` times and
+# returns (seconds, result of the last run), seconds being `stat` over the runs
+# (the best run by default; pass statistics.median for noisy I/O).
+
+
+def timed(fn, repeat=1, stat=min):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return stat(times), result
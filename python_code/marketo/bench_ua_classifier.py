@@ -0,0 +1,58 @@
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import load_activity
+from bench_timing import timed
+from ua_classifier import classify_user_agent, classify_user_agents, parse_user_agent
+
+# === UA Classifier Benchmark ===
+# Builds a User Agent column of --rows rows from --distinct UA strings (the
+# sample export's UAs with varied version numbers, drawn with a skewed
+# popularity like real traffic) and times:
+#   per-row  series.map(parse_user_agent), i.e. a row-wise apply
+#   string   classify_user_agents() on a string column (cold cache)
+#   category classify_user_agents() on a categorical column (warm cache, as for
+#            later chunks of a file)
+#   python bench_ua_classifier.py --rows 100000 1000000 --distinct 500
+
+VERSION = re.compile(r"\d+(?:[._]\d+)+")
+
+
+def ua_pool(n_distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    base = sorted(set(load_activity(columns=["User Agent"])["User Agent"].dropna().astype(str)))
+    pool = list(base)
+    while len(pool) < n_distinct:
+        ua = base[rng.integers(len(base))]
+        pool.append(VERSION.sub(lambda m: ".".join(str(rng.integers(1, 200)) for _ in m.group().split(".")), ua, 1))
+        pool = list(dict.fromkeys(pool))
+    return pool[:n_distinct]
+
+
+def ua_column(n_rows, n_distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = np.array(ua_pool(n_distinct, seed), dtype=object)
+    weights = 1.0 / np.arange(1, len(pool) + 1)
+    return pd.Series(pool[rng.choice(len(pool), size=n_rows, p=weights / weights.sum())], dtype="string")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark memoized user-agent classification.")
+    parser.add_argument("--rows", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--distinct", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'per-row s':>10} {'string s':>9} {'category s':>11} {'speedup':>8}")
+    for n_rows in args.rows:
+        uas = ua_column(n_rows, args.distinct)
+        categorical = uas.astype("category")
+        per_row, expected = timed(lambda: uas.map(parse_user_agent))
+        classify_user_agent.cache_clear()
+        cold, derived = timed(lambda: classify_user_agents(uas))
+        warm, derived_cat = timed(lambda: classify_user_agents(categorical))
+        assert (derived["Browser"].astype(str) == expected.map(lambda info: info.browser)).all()
+        assert derived.astype(str).equals(derived_cat.astype(str))
+        print(f"{n_rows:>10,} {per_row:>10.2f} {cold:>9.3f} {warm:>11.3f} {per_row / cold:>7.0f}x")
@@ -0,0 +1,288 @@
+import argparse
+import csv
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import DEFAULT_ACTIVITY_CSV, DEFAULT_CHUNK_ROWS, _realign_short_rows
+
+# === Append-Safe marketoGUID Index ===
+# csv_export.js appends every run's activities to the same CSV, so overlapping
+# sinceDatetime windows write the same marketoGUID again. GuidIndex is a
+# persistent set of the GUIDs already in a data file: an open-addressing hash
+# table of uint64 keys in a memory-mapped file (<data>.guidx), probed and
+# filled with vectorized numpy, so checking and adding a batch costs O(batch)
+# however long the history is. The table doubles when it gets half full.
+# Header words: magic, version, capacity, count, covered, dirty. `covered` is
+# how many bytes of the data file the index has seen: opening the index catches
+# up on rows appended by something else (index.js) by reading only the tail,
+# and rebuilds from the whole file if the file got shorter. `dirty` is set
+# while a batch is being written; an index left dirty (crash, kill), or one
+# whose header or size does not add up, is rebuilt from the data file.
+# GUID keys: numeric GUIDs (all of them in practice) map to value + 1; anything
+# else to a 64-bit blake2b hash with the top bit set, so the two never collide.
+
+MAGIC = int.from_bytes(b"MKTGUIDX", "little")
+VERSION = 1
+HEADER_WORDS = 8
+MIN_CAPACITY = 1 << 16
+MAX_LOAD = 0.5
+INDEX_SUFFIX = ".guidx"
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing
+_HASHED_BIT = np.uint64(1 << 63)
+
+
+def guid_keys(guids):
+    # uint64 keys (never 0, the empty-slot marker) for a sequence of GUID strings
+    guids = pd.Series(guids, dtype="string").fillna("")
+    numeric = guids.str.fullmatch(r"\d{1,18}").to_numpy(dtype=bool)
+    keys = np.empty(len(guids), dtype=np.uint64)
+    keys[numeric] = guids[numeric].astype("uint64").to_numpy() + np.uint64(1)
+    for i in np.flatnonzero(~numeric):
+        digest = hashlib.blake2b(guids.iat[i].encode("utf-8"), digest_size=8).digest()
+        keys[i] = np.uint64(int.from_bytes(digest, "little")) | _HASHED_BIT
+    return keys
+
+
+class GuidIndex:
+    def __init__(self, path, capacity=MIN_CAPACITY):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, capacity)
+        self._map()
+
+    @staticmethod
+    def _create(path, capacity):
+        capacity = max(MIN_CAPACITY, 1 << (int(capacity) - 1).bit_length())
+        table = np.memmap(path, dtype=np.uint64, mode="w+", shape=(HEADER_WORDS + capacity,))
+        table[:HEADER_WORDS] = [MAGIC, VERSION, capacity, 0, 0, 0, 0, 0]
+        table.flush()
+        del table
+
+    def _map(self):
+        self._words = np.memmap(self.path, dtype=np.uint64, mode="r+")
+        self.header = self._words[:HEADER_WORDS]
+        self.slots = self._words[HEADER_WORDS:]
+
+    def valid(self):
+        # Cheap structural checks (no scan of the table)
+        header = self.header
+        return (len(self._words) > HEADER_WORDS and int(header[0]) == MAGIC and int(header[1]) == VERSION
+                and int(header[2]) == len(self.slots) and int(header[3]) <= len(self.slots) * MAX_LOAD
+                and int(header[5]) == 0)
+
+    @property
+    def capacity(self):
+        return int(self.header[2])
+
+    @property
+    def count(self):
+        return int(self.header[3])
+
+    @property
+    def covered(self):
+        return int(self.header[4])
+
+    def _positions(self, keys):
+        bits = self.capacity.bit_length() - 1
+        return ((keys * _HASH_MULTIPLIER) >> np.uint64(64 - bits)).astype(np.int64)
+
+    def contains(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        found = np.zeros(len(keys), dtype=bool)
+        active = np.arange(len(keys))
+        pos = self._positions(keys)
+        mask = self.capacity - 1
+        while len(active):
+            slot = self.slots[pos[active]]
+            hit = slot == keys[active]
+            found[active[hit]] = True
+            active = active[~hit & (slot != 0)]  # occupied by another key: probe on
+            pos[active] = (pos[active] + 1) & mask
+        return found
+
+    def _insert(self, keys):
+        # Inserts keys known to be absent and distinct; several keys hashing to the
+        # same empty slot take turns, the losers probe on
+        pos = self._positions(keys)
+        active = np.arange(len(keys))
+        mask = self.capacity - 1
+        while len(active):
+            empty = self.slots[pos[active]] == 0
+            _, first = np.unique(pos[active[empty]], return_index=True)
+            winners = active[empty][first]
+            self.slots[pos[winners]] = keys[winners]
+            placed = np.zeros(len(keys), dtype=bool)
+            placed[winners] = True
+            active = active[~placed[active]]
+            pos[active] = (pos[active] + 1) & mask
+        self.header[3] += np.uint64(len(keys))
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while needed > capacity * MAX_LOAD:
+            capacity *= 2
+        existing = np.asarray(self.slots[self.slots != 0])
+        covered = self.covered
+        self.close()
+        tmp = self.path + ".tmp"
+        self._create(tmp, capacity)
+        os.replace(tmp, self.path)
+        self._map()
+        self.begin()
+        self._insert(existing)
+        self.header[4] = covered
+
+    def begin(self):
+        # Marks the index dirty until commit(); call before changing the data file
+        self.header[5] = 1
+        self._words.flush()
+
+    def add(self, keys):
+        # Adds a batch; returns a mask of the rows whose key was not indexed yet (the
+        # first occurrence of keys repeated within the batch counts as new)
+        keys = np.asarray(keys, dtype=np.uint64)
+        unique, first = np.unique(keys, return_index=True)
+        fresh = ~self.contains(unique)
+        if self.count + int(fresh.sum()) > self.capacity * MAX_LOAD:
+            self._grow(self.count + int(fresh.sum()))
+        self._insert(unique[fresh])
+        new = np.zeros(len(keys), dtype=bool)
+        new[first[fresh]] = True
+        return new
+
+    def commit(self, covered):
+        # Records that the first `covered` bytes of the data file are indexed
+        self.header[4] = covered
+        self.header[5] = 0
+        self._words.flush()
+
+    def close(self):
+        if getattr(self, "_words", None) is not None:
+            self._words.flush()
+            del self.header, self.slots
+            self._words._mmap.close()
+            self._words = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _guid_column(header_line):
+    return next(csv.reader([header_line])).index("marketoGUID")
+
+
+def _index_tail(index, data_path, start):
+    # Adds the GUIDs of the rows from byte `start` to the end of the data file
+    with open(data_path, "rb") as f:
+        header_line = f.readline().decode("utf-8")
+        f.seek(max(start, f.tell()))
+        tail = f.read().decode("utf-8")
+        end = f.tell()
+    column = _guid_column(header_line)
+    index.add(guid_keys([row[column] for row in csv.reader(io.StringIO(tail)) if len(row) > column]))
+    return end
+
+
+def rebuild_index(data_path=DEFAULT_ACTIVITY_CSV, index_path=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Re-creates the index from every marketoGUID in the data file
+    index_path = index_path or data_path + INDEX_SUFFIX
+    size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+    tmp = index_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    with GuidIndex(tmp, capacity=max(MIN_CAPACITY, size // 200)) as index:  # ~400 bytes per exported row
+        index.begin()
+        if size:
+            for chunk in pd.read_csv(data_path, usecols=["marketoGUID"], dtype=str, keep_default_na=False,
+                                     chunksize=chunk_rows):
+                index.add(guid_keys(chunk["marketoGUID"]))
+        index.commit(size)
+    os.replace(tmp, index_path)
+    return GuidIndex(index_path)
+
+
+def open_index(data_path=DEFAULT_ACTIVITY_CSV, index_path=None):
+    # The data file's index, rebuilt if missing or damaged and caught up if the
+    # data file grew without it
+    index_path = index_path or data_path + INDEX_SUFFIX
+    size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+    if os.path.exists(index_path):
+        try:
+            index = GuidIndex(index_path)
+        except (ValueError, OSError):
+            index = None
+        if index is not None and index.valid() and index.covered <= size:
+            if index.covered < size:
+                index.begin()
+                index.commit(_index_tail(index, data_path, index.covered))
+            return index
+        if index is not None:
+            index.close()
+        print(f"⚠️ Rebuilding damaged or stale GUID index '{index_path}'")
+    return rebuild_index(data_path, index_path)
+
+
+def _quoted_lines(rows):
+    # csv_export.js's layout (every value quoted, \n line ends, no trailing newline),
+    # with embedded quotes doubled so values like subject lines stay one field
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().removesuffix("\n")
+
+
+def append_new_activities(batch, data_path=DEFAULT_ACTIVITY_CSV, index_path=None):
+    # Appends the rows of `batch` (raw string values, export columns) whose
+    # marketoGUID is not in the data file yet, in csv_export.js's format; returns
+    # (rows appended, duplicates skipped)
+    index = open_index(data_path, index_path)
+    try:
+        index.begin()
+        new = index.add(guid_keys(batch["marketoGUID"]))
+        rows = batch[new]
+        exists = os.path.exists(data_path) and os.path.getsize(data_path) > 0
+        if exists:
+            with open(data_path, encoding="utf-8") as f:
+                header = next(csv.reader([f.readline()]))
+        else:
+            header = list(batch.columns)
+        if len(rows):
+            rows = rows.reindex(columns=header, fill_value="").fillna("")
+            lines = _quoted_lines(rows.itertuples(index=False))
+            with open(data_path, "a", encoding="utf-8", newline="") as f:
+                f.write(("\n" if exists else ",".join(header) + "\n") + lines)
+        index.commit(os.path.getsize(data_path) if os.path.exists(data_path) else 0)
+    finally:
+        index.close()
+    return len(rows), len(batch) - len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicated appends to a Marketo activity CSV.")
+    parser.add_argument("--data", default=DEFAULT_ACTIVITY_CSV, help="activity CSV the index belongs to")
+    parser.add_argument("--index", help=f"index file (default: <data>{INDEX_SUFFIX})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="append the unseen rows of newly exported CSVs")
+    append.add_argument("exports", nargs="+")
+    commands.add_parser("rebuild", help="rebuild the index from the data file")
+    commands.add_parser("status", help="show the index size and coverage")
+    args = parser.parse_args()
+
+    if args.command == "append":
+        for export in args.exports:
+            batch = _realign_short_rows(pd.read_csv(export, dtype=str, keep_default_na=False, na_filter=False))
+            appended, skipped = append_new_activities(batch, args.data, args.index)
+            print(f"📥 {export}: appended {appended:,} new activities, skipped {skipped:,} duplicates")
+    elif args.command == "rebuild":
+        with rebuild_index(args.data, args.index) as index:
+            print(f"🔁 Indexed {index.count:,} GUIDs from '{args.data}'")
+    else:
+        with open_index(args.data, args.index) as index:
+            print(f"🗂️ {index.count:,} GUIDs in {index.capacity:,} slots, "
+                  f"{index.covered:,} of {os.path.getsize(args.data):,} bytes of '{args.data}' indexed")
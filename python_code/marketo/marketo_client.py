@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from activity_loader import ACTIVITY_SCHEMA, type_activity_frame
+from activity_store import DEFAULT_STORE_DIR, append_activity
+
+# === Async Marketo Bulk-Activity Client ===
+# Python replacement for the index.js activity export. Calls go through two
+# token buckets shared by every task. The 20-second one holds a burst of
+# RATE_BURST calls and refills at (75 - burst) / 20 per second, so no 20-second
+# window, sliding or not, ever sees more than 75 calls; index.js's fixed-window
+# counter lets 150 through around a window reset. The daily bucket holds the
+# 10,000-call quota minus what was already spent today and does not refill
+# (Marketo resets the quota once a day); the export stops instead of waiting
+# when it runs out. A semaphore keeps at most `concurrency` calls in flight
+# (Marketo allows 10).
+# A paging-token chain is inherently serial (each page hands out the next
+# token), so the export range is cut into one chain per `window_days` days (and
+# optionally per activity type); each chain starts from its own sinceDatetime token and
+# stops at the first activity past its day, and the chains run concurrently.
+# Pages are flattened the way index.js/csv_export.js do it (attributes become
+# columns, plus activityTypeDesc, segment and created_at), typed with
+# activity_loader and appended to the activity store every `batch_rows` rows.
+# HTTP runs on a pooled requests session in worker threads; the scheduling,
+# rate limiting and retries are asyncio.
+
+MAX_CALLS_IN_20_SECS = 75
+WINDOW_SECONDS = 20
+CAP_CALLS_PER_DAY = 10_000
+MAX_CONCURRENT_CALLS = 10  # Marketo's limit on calls in flight
+RATE_BURST = 10
+DEFAULT_CONCURRENCY = 4
+DEFAULT_BATCH_ROWS = 50_000
+PAGE_SIZE = 300  # largest batchSize the activities endpoint accepts
+MAX_RETRIES = 5
+RETRY_CODES = {"606", "615"}  # rate and concurrency limits: back off and retry
+AUTH_CODES = {"601", "602"}  # invalid or expired token: re-authenticate and retry
+DEFAULT_ACTIVITY_TYPES = [6, 7, 8, 9, 10, 11]
+ACTIVITY_TYPE_DESC = {6: "Email Sent", 7: "Email Delivered", 8: "Email Bounced", 9: "Email Unsubscribe",
+                      10: "Email Open", 11: "Email Click"}
+SEGMENTS = {
+    "11-6 Segment 1.11-6 Segment 1": "Segment 1: 3-Year 2024 Expiration",
+    "11-6 Segment 2.11-6 Segment 2": "Segment 2: 3-Year 2023 Expiration",
+    "11-6 Segment 3.11-6 Segment 3": "Segment 3: 1-Year 2024 Expiration 40-59",
+    "11-6 Segment 4.11-6 Segment 4": "Segment 4: 1-Year 2023 Expiration 40-59",
+}
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+class MarketoError(Exception):
+    pass
+
+
+class TokenBucket:
+    # Up to `capacity` tokens, refilled continuously at `rate` per second (0: never)
+    def __init__(self, capacity, rate, tokens=None):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity if tokens is None else tokens
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, wait=True):
+        # Takes one token; returns False instead of waiting when wait=False and none is left
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                if not wait or not self.rate:
+                    return False
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+            return True
+
+
+class MarketoClient:
+    def __init__(self, base_url, client_id, client_secret, concurrency=DEFAULT_CONCURRENCY, calls_used_today=0,
+                 timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = timeout
+        self.window = TokenBucket(RATE_BURST, (MAX_CALLS_IN_20_SECS - RATE_BURST) / WINDOW_SECONDS)
+        self.daily = TokenBucket(CAP_CALLS_PER_DAY, 0, tokens=CAP_CALLS_PER_DAY - calls_used_today)
+        self._slots = asyncio.Semaphore(min(concurrency, MAX_CONCURRENT_CALLS))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_CONCURRENT_CALLS, pool_maxsize=MAX_CONCURRENT_CALLS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._token = None
+        self._token_lock = asyncio.Lock()
+        self.calls = 0
+        self.retries = 0
+
+    async def _authenticate(self, stale=None):
+        # One refresh for all tasks that saw the same stale token
+        async with self._token_lock:
+            if self._token is None or self._token == stale:
+                params = {"grant_type": "client_credentials", "client_id": self.client_id,
+                          "client_secret": self.client_secret}
+                response = await asyncio.to_thread(self.session.get, f"{self.base_url}/identity/oauth/token",
+                                                   params=params, timeout=self.timeout)
+                response.raise_for_status()
+                self._token = response.json()["access_token"]
+            return self._token
+
+    async def get(self, path, **params):
+        # GET a REST endpoint within the rate limits; returns the JSON body
+        for attempt in range(MAX_RETRIES + 1):
+            token = self._token or await self._authenticate()
+            if not await self.daily.acquire(wait=False):
+                raise QuotaExhausted(f"{CAP_CALLS_PER_DAY:,} calls per day used up")
+            await self.window.acquire()
+            async with self._slots:
+                self.calls += 1
+                try:
+                    response = await asyncio.to_thread(
+                        self.session.get, f"{self.base_url}{path}", params=params,
+                        headers={"Authorization": f"Bearer {token}"}, timeout=self.timeout)
+                    response.raise_for_status()
+                    body = response.json()
+                except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as err:
+                    error = {"code": "http", "message": str(err)}
+                else:
+                    if body.get("success", True):
+                        return body
+                    error = body["errors"][0]
+            if attempt == MAX_RETRIES or error["code"] not in RETRY_CODES | AUTH_CODES | {"http"}:
+                raise MarketoError(f"{path}: {error['code']} {error['message']}")
+            self.retries += 1
+            if error["code"] in AUTH_CODES:
+                await self._authenticate(stale=token)
+            else:
+                await asyncio.sleep(min(2 ** attempt, WINDOW_SECONDS))
+
+    async def activity_types(self):
+        return (await self.get("/rest/v1/activities/types.json"))["result"]
+
+    async def activity_pages(self, since, until=None, activity_type_ids=DEFAULT_ACTIVITY_TYPES):
+        # Yields lists of activities from `since` up to (not including) `until`
+        token = (await self.get("/rest/v1/activities/pagingtoken.json", sinceDatetime=since.isoformat()))
+        page_token = token["nextPageToken"]
+        types = ",".join(str(t) for t in activity_type_ids)
+        cutoff = until.strftime("%Y-%m-%dT%H:%M:%SZ") if until is not None else None
+        while True:
+            page = await self.get("/rest/v1/activities.json", nextPageToken=page_token, activityTypeIds=types,
+                                  batchSize=PAGE_SIZE)
+            result = page.get("result", [])
+            if cutoff is not None and result and result[-1]["activityDate"] >= cutoff:
+                yield [a for a in result if a["activityDate"] < cutoff]
+                return
+            if result:
+                yield result
+            if not page.get("moreResult"):
+                return
+            page_token = page["nextPageToken"]
+
+    def close(self):
+        self.session.close()
+
+
+def _export_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def flatten_activity(activity, created_at):
+    # One export row: index.js's append_additional_fields plus csv_export.js's
+    # flattenActivityData, except that false and missing values stay false/empty
+    # instead of becoming "undefined"
+    row = {k: _export_value(v) for k, v in activity.items() if k not in ("attributes", "primaryAttribute")}
+    row["activityTypeDesc"] = ACTIVITY_TYPE_DESC.get(activity["activityTypeId"], "Other Activity Type")
+    row["segment"] = SEGMENTS.get(activity.get("primaryAttributeValue"), "Other Segment")
+    row["created_at"] = created_at
+    for attribute in activity.get("attributes", []):
+        row[attribute["name"]] = _export_value(attribute.get("value"))
+    return row
+
+
+class ActivityStoreSink:
+    # Buffers flattened rows and appends them to the activity store in typed batches
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, batch_rows=DEFAULT_BATCH_ROWS, schema=ACTIVITY_SCHEMA):
+        self.store_dir = store_dir
+        self.batch_rows = batch_rows
+        self.schema = schema
+        self.created_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        self._rows = []
+        self._flush_lock = asyncio.Lock()  # one append at a time: each updates the store's schema file
+        self.total = 0
+
+    async def add(self, activities):
+        self._rows.extend(flatten_activity(a, self.created_at) for a in activities)
+        if len(self._rows) >= self.batch_rows:
+            await self.flush()
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        if rows:
+            frame = type_activity_frame(pd.DataFrame(rows).fillna(""), self.schema)
+            async with self._flush_lock:
+                self.total += await asyncio.to_thread(append_activity, frame, self.store_dir, self.schema)
+
+
+def day_windows(since, until, days=1):
+    # [start, end) windows covering since..until, split at UTC midnights every `days` days
+    windows = []
+    start = since
+    while start < until:
+        end = min(datetime.combine(start.date() + timedelta(days=days), datetime.min.time(), timezone.utc), until)
+        windows.append((start, end))
+        start = end
+    return windows
+
+
+async def export_activities(client, sink, since, until, activity_type_ids=DEFAULT_ACTIVITY_TYPES,
+                            split_types=False, window_days=1):
+    # Runs one paging chain per window (and per activity type with split_types) concurrently
+    groups = [[t] for t in activity_type_ids] if split_types else [list(activity_type_ids)]
+    pages = 0
+
+    async def chain(start, end, types):
+        nonlocal pages
+        async for result in client.activity_pages(start, end, types):
+            pages += 1
+            await sink.add(result)
+
+    tasks = [asyncio.create_task(chain(start, end, types))
+             for start, end in day_windows(since, until, window_days) for types in groups]
+    try:
+        await asyncio.gather(*tasks)
+    except QuotaExhausted as err:
+        print(f"⚠️ Stopped early: {err}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await sink.flush()
+    return pages
+
+
+def _utc(value):
+    value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+async def main(args):
+    client = MarketoClient(args.base_url, args.client_id, args.client_secret, args.concurrency,
+                           args.calls_used_today)
+    sink = ActivityStoreSink(args.store, args.batch_rows)
+    since = _utc(args.since)
+    until = _utc(args.until) if args.until else datetime.now(timezone.utc)
+    start = time.perf_counter()
+    try:
+        pages = await export_activities(client, sink, since, until, args.types, args.split_types,
+                                        args.window_days)
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - start
+    print(f"✅ {sink.total:,} activities from {pages:,} pages in {elapsed:.2f}s "
+          f"({client.calls:,} calls, {client.retries} retries) -> '{args.store}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Marketo activities into the activity store.")
+    parser.add_argument("--base-url", default=os.environ.get("MARKETO_BASE_URL"),
+                        help="e.g. https://123-ABC-456.mktorest.com (default: $MARKETO_BASE_URL)")
+    parser.add_argument("--client-id", default=os.environ.get("MARKETO_CLIENT_ID", ""))
+    parser.add_argument("--client-secret", default=os.environ.get("MARKETO_CLIENT_SECRET", ""))
+    parser.add_argument("--since", required=True, help="first day or timestamp (UTC), e.g. 2024-11-06")
+    parser.add_argument("--until", help="end timestamp, exclusive (default: now)")
+    parser.add_argument("--types", nargs="+", type=int, default=DEFAULT_ACTIVITY_TYPES)
+    parser.add_argument("--window-days", type=int, default=1,
+                        help="days per paging chain (one chain for the whole range when larger than it)")
+    parser.add_argument("--split-types", action="store_true", help="one paging chain per activity type and window")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"calls in flight (at most {MAX_CONCURRENT_CALLS})")
+    parser.add_argument("--calls-used-today", type=int, default=0, help="calls already spent from the daily quota")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+    if not args.base_url:
+        parser.error("--base-url or MARKETO_BASE_URL is required")
+
+    asyncio.run(main(args))
@@ -0,0 +1,207 @@
+import argparse
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import DEFAULT_ACTIVITY_CSV, _realign_short_rows
+
+# === Local Stand-In for the Marketo REST API ===
+# Serves the endpoints marketo_client.py (and index.js) use, over a synthetic
+# month of activities built from the checked-in export:
+#   /identity/oauth/token                 access token (expires after --token-ttl)
+#   /rest/v1/activities/types.json        activity types
+#   /rest/v1/activities/pagingtoken.json  paging token for sinceDatetime
+#   /rest/v1/activities.json              up to batchSize activities of activityTypeIds
+# Limits are enforced the way Marketo reports them (HTTP 200, success false):
+# 606 over 75 calls per 20s, 615 over 10 calls in flight, 607 over the daily
+# quota, 601/602 for a missing or expired token. --latency adds a delay per call
+# so overlapping requests can be measured:
+#   python stand_in_marketo.py --port 8766 --latency 0.2
+#   python marketo_client.py --base-url http://127.0.0.1:8766 --since 2024-11-06
+
+RATE_LIMIT_CALLS = 75
+RATE_LIMIT_SECONDS = 20
+CONCURRENT_LIMIT = 10
+DAILY_QUOTA = 10_000
+BASE_FIELDS = ["id", "marketoGUID", "leadId", "activityDate", "activityTypeId", "campaignId",
+               "primaryAttributeValueId", "primaryAttributeValue"]
+DERIVED_FIELDS = ["activityTypeDesc", "segment", "created_at"]  # added by the exporter, not the API
+ACTIVITY_TYPES = [
+    {"id": 6, "name": "Send Email"}, {"id": 7, "name": "Email Delivered"},
+    {"id": 8, "name": "Email Bounced"}, {"id": 9, "name": "Unsubscribe Email"},
+    {"id": 10, "name": "Open Email"}, {"id": 11, "name": "Click Email"},
+]
+
+
+def _api_value(value):
+    if value == "true":
+        return True
+    if value == "undefined":  # what index.js wrote for false and missing values
+        return False
+    return value
+
+
+def synthetic_activities(n_activities, days=30, start="2024-11-06", sample=DEFAULT_ACTIVITY_CSV, seed=0):
+    # Activities in API form (attributes as name/value pairs), sorted by activityDate
+    raw = _realign_short_rows(pd.read_csv(sample, dtype=str, keep_default_na=False, na_filter=False))
+    attribute_columns = [c for c in raw.columns if c not in BASE_FIELDS + DERIVED_FIELDS]
+    templates = []
+    for row in raw.to_dict("records"):
+        templates.append({
+            "leadId": int(row["leadId"]),
+            "activityTypeId": int(row["activityTypeId"]),
+            "campaignId": int(row["campaignId"]),
+            "primaryAttributeValueId": int(row["primaryAttributeValueId"]),
+            "primaryAttributeValue": row["primaryAttributeValue"],
+            "attributes": [{"name": c, "value": _api_value(row[c])} for c in attribute_columns if row[c] != ""],
+        })
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, days * 86400, size=n_activities))
+    stamps = (np.datetime64(f"{start}T00:00:00") + seconds.astype("timedelta64[s]")).astype(str)
+    picks = rng.integers(len(templates), size=n_activities)
+    activities = []
+    for i, (pick, stamp) in enumerate(zip(picks, stamps)):
+        activity_id = 2_100_000_000 + i
+        activities.append({"id": activity_id, "marketoGUID": str(activity_id), "activityDate": f"{stamp}Z",
+                           **templates[pick]})
+    return activities
+
+
+class StandInMarketo:
+    def __init__(self, activities, latency=0.0, token_ttl=3600, daily_quota=DAILY_QUOTA):
+        self.activities = activities
+        self.dates = [a["activityDate"] for a in activities]
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.daily_quota = daily_quota
+        self.tokens = {}  # access token -> expiry (monotonic)
+        self.calls = deque()
+        self.calls_today = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def issue_token(self):
+        token = secrets.token_hex(16)
+        with self._lock:
+            self.tokens[token] = time.monotonic() + self.token_ttl
+        return {"access_token": token, "token_type": "bearer", "expires_in": self.token_ttl, "scope": "stand-in"}
+
+    def admit(self, token):
+        # Returns a Marketo error for the call, or None and counts it in flight
+        now = time.monotonic()
+        with self._lock:
+            if token not in self.tokens:
+                return {"code": "601", "message": "Access token invalid"}
+            if self.tokens[token] < now:
+                return {"code": "602", "message": "Access token expired"}
+            while self.calls and self.calls[0] <= now - RATE_LIMIT_SECONDS:
+                self.calls.popleft()
+            if len(self.calls) >= RATE_LIMIT_CALLS:
+                return {"code": "606", "message": "Max rate limit '75' exceeded with in '20' secs"}
+            if self.in_flight >= CONCURRENT_LIMIT:
+                return {"code": "615", "message": "Concurrent access limit reached"}
+            if self.calls_today >= self.daily_quota:
+                return {"code": "607", "message": "Daily quota reached"}
+            self.calls.append(now)
+            self.calls_today += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def paging_token(self, since):
+        since = pd.Timestamp(since)
+        since = since.tz_localize("UTC") if since.tzinfo is None else since.tz_convert("UTC")
+        position = int(np.searchsorted(self.dates, since.strftime("%Y-%m-%dT%H:%M:%SZ")))
+        return {"nextPageToken": f"P{position:010d}"}
+
+    def activities_page(self, page_token, type_ids, batch_size):
+        position = int(page_token[1:])
+        result = []
+        while position < len(self.activities) and len(result) < batch_size:
+            if self.activities[position]["activityTypeId"] in type_ids:
+                result.append(self.activities[position])
+            position += 1
+        page = {"nextPageToken": f"P{position:010d}", "moreResult": position < len(self.activities)}
+        if result:
+            page["result"] = result
+        return page
+
+
+def make_handler(api):
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            if parts.path == "/identity/oauth/token":
+                return self._send(api.issue_token())
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ") or query.get("access_token")
+            error = api.admit(token)
+            if error:
+                return self._send({"requestId": secrets.token_hex(4), "success": False, "errors": [error]})
+            try:
+                time.sleep(api.latency)
+                if parts.path == "/rest/v1/activities/types.json":
+                    body = {"result": ACTIVITY_TYPES}
+                elif parts.path == "/rest/v1/activities/pagingtoken.json":
+                    body = api.paging_token(query["sinceDatetime"])
+                elif parts.path == "/rest/v1/activities.json":
+                    type_ids = {int(t) for t in query["activityTypeIds"].split(",")}
+                    body = api.activities_page(query["nextPageToken"], type_ids,
+                                               min(int(query.get("batchSize", 300)), 300))
+                else:
+                    self.send_error(404)
+                    return
+            finally:
+                api.release()
+            self._send({"requestId": secrets.token_hex(4), "success": True, **body})
+
+        def _send(self, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start_server(api, port=0):
+    # Starts in a background thread; port=0 picks a free port.
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(api))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic activities as a local stand-in Marketo API.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--activities", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API call")
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    args = parser.parse_args()
+
+    api = StandInMarketo(synthetic_activities(args.activities, args.days), args.latency, args.token_ttl)
+    server = start_server(api, args.port)
+    print(f"✅ Serving {len(api.activities):,} activities at http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,160 @@
+import argparse
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from activity_loader import DEFAULT_ACTIVITY_CSV, DEFAULT_CHUNK_ROWS, read_activity_chunks
+
+# === Memoized User-Agent Classifier ===
+# Re-derives the fields Marketo attaches to email activities from the raw
+# User Agent: Browser, Device, Platform, Is Mobile Device, and the bot flags
+# (Bot Activity Pattern, Is Bot Activity). Labels follow the ones Marketo uses
+# in the exports ("Google Mail" for Gmail's image proxy, "Mobile Safari
+# UIWebView" for iOS mail apps, "Win10", ...).
+# A few hundred distinct UA strings repeat across millions of rows, so
+# classify_user_agents() factorizes the column, classifies each distinct string
+# once through an LRU cache that survives across chunks, and maps the results
+# back to the rows with integer codes; the outputs are categoricals built from
+# those codes. Cost grows with distinct UAs, not rows.
+
+UA_CACHE_SIZE = 65_536
+UA_FIELDS = ["Browser", "Device", "Platform", "Is Mobile Device", "Bot Activity Pattern", "Is Bot Activity"]
+UAInfo = namedtuple("UAInfo", ["browser", "device", "platform", "is_mobile", "bot_pattern", "is_bot"])
+
+# (pattern, label), first match wins
+BROWSER_RULES = [
+    (r"GoogleImageProxy", "Google Mail"),
+    (r"YahooMailProxy", "Yahoo MailProxy"),
+    (r"Microsoft Outlook|Outlook-iOS|Outlook-Android", "Outlook"),
+    (r"Edg/|EdgA/", "Edge"),
+    (r"Android.*; wv\)", "Android"),
+    (r"Firefox/|FxiOS/", "Firefox"),
+    (r"OPR/|Opera", "Opera"),
+    (r"SamsungBrowser/", "Samsung Internet"),
+    (r"Chrome/|CriOS/", "Chrome"),
+    (r"(iPhone|iPad|iPod).*Version/[\d.]+.*Safari/", "Safari"),
+    (r"iPhone|iPad|iPod", "Mobile Safari UIWebView"),
+    (r"Macintosh.*Version/[\d.]+.*Safari/", "Safari"),
+    (r"Macintosh.*AppleWebKit", "Apple Mail"),
+    (r"Trident/|MSIE ", "Internet Explorer"),
+]
+# proxies fetch images on the reader's behalf, so they say nothing about the device
+PROXY_PATTERN = r"GoogleImageProxy|YahooMailProxy"
+DEVICE_RULES = [
+    (r"iPhone", "iPhone"),
+    (r"iPad", "iPad"),
+    (r"iPod", "iPod"),
+    (r"Android.*Mobile", "general Mobile Phone"),
+    (r"Android", "general Tablet"),
+    (r"Windows NT", "Windows Desktop"),
+    (r"Macintosh", "Macintosh"),
+    (r"CrOS|Linux x86_64", "Linux Desktop"),
+]
+PLATFORM_RULES = [
+    (r"Windows NT 10\.0", "Win10"),
+    (r"Windows NT 6\.3", "Win8.1"),
+    (r"Windows NT 6\.2", "Win8"),
+    (r"Windows NT 6\.1", "Win7"),
+    (r"Windows NT 5\.1", "WinXP"),
+    (r"Windows", "Windows"),
+    (r"iPhone|iPad|iPod", "iOS"),
+    (r"Android", "Android"),
+    (r"Mac OS X", "macOS"),
+    (r"CrOS", "ChromeOS"),
+    (r"Linux", "Linux"),
+]
+MOBILE_DEVICES = {"iPhone", "iPad", "iPod", "general Mobile Phone", "general Tablet"}
+# (Bot Activity Pattern, UA pattern)
+BOT_RULES = [
+    ("Match with IAB Spiders and Robots List",
+     r"bot\b|crawler|spider|slurp|HeadlessChrome|PhantomJS|python-requests|python-urllib|curl/|wget|"
+     r"Go-http-client|okhttp|Java/|libwww|scrapy"),
+    ("Match with Proxy Bot List",
+     r"Barracuda|Mimecast|Proofpoint|Symantec|MessageLabs|Forcepoint|Trend ?Micro|SonicWall|"
+     r"ZScaler|FireEye|Microsoft Office Protection|SafeLinks|linkscanner"),
+]
+
+
+def _compile(rules):
+    return [(re.compile(pattern, re.IGNORECASE), label) for pattern, label in rules]
+
+
+_BROWSERS = _compile(BROWSER_RULES)
+_DEVICES = _compile(DEVICE_RULES)
+_PLATFORMS = _compile(PLATFORM_RULES)
+_BOTS = [(re.compile(pattern, re.IGNORECASE), label) for label, pattern in BOT_RULES]
+_PROXY = re.compile(PROXY_PATTERN)
+
+
+def _first(rules, ua, default):
+    for pattern, label in rules:
+        if pattern.search(ua):
+            return label
+    return default
+
+
+def parse_user_agent(ua):
+    # Uncached classification of one UA string
+    ua = ua or ""
+    browser = _first(_BROWSERS, ua, "Default Browser")
+    if _PROXY.search(ua):
+        device = platform = "Unknown"
+    else:
+        device = _first(_DEVICES, ua, "Unknown")
+        platform = _first(_PLATFORMS, ua, "Unknown")
+    bot_pattern = _first(_BOTS, ua, None)
+    return UAInfo(browser, device, platform, device in MOBILE_DEVICES, bot_pattern, bot_pattern is not None)
+
+
+classify_user_agent = lru_cache(maxsize=UA_CACHE_SIZE)(parse_user_agent)
+
+
+def classify_user_agents(user_agents):
+    # DataFrame of UA_FIELDS for a Series of UA strings (plain or categorical),
+    # parsing each distinct string once; null UAs give null fields
+    if isinstance(user_agents.dtype, pd.CategoricalDtype):
+        codes, uniques = user_agents.cat.codes.to_numpy(), user_agents.cat.categories
+    else:
+        codes, uniques = pd.factorize(user_agents)
+    infos = [classify_user_agent(ua) for ua in uniques] or [parse_user_agent("")]
+    missing = codes < 0
+    rows = np.where(missing, 0, codes)
+    columns = {}
+    for name, values in zip(UA_FIELDS, zip(*infos)):
+        if isinstance(values[0], bool):
+            array = pd.array(np.asarray(values, dtype=bool)[rows], dtype="boolean")
+            array[missing] = pd.NA
+            columns[name] = array
+        else:
+            # factorize turns the None bot pattern of non-bots into a null, like "N/A" in the export
+            label_codes, labels = pd.factorize(np.asarray(values, dtype=object))
+            columns[name] = pd.Categorical.from_codes(np.where(missing, -1, label_codes[rows]), categories=labels)
+    return pd.DataFrame(columns, index=user_agents.index)
+
+
+def derive_user_agent_fields(frame, ua_column="User Agent"):
+    # Replaces (or adds) the UA-derived columns of an activity frame
+    derived = classify_user_agents(frame[ua_column])
+    return frame.assign(**{name: derived[name] for name in UA_FIELDS})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-derive browser/device/bot fields from activity user agents.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_ACTIVITY_CSV)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    rows = 0
+    agree = dict.fromkeys(UA_FIELDS[:4], 0)
+    for chunk in read_activity_chunks(args.path, args.chunk_rows, columns=["User Agent"] + UA_FIELDS[:4]):
+        derived = classify_user_agents(chunk["User Agent"])
+        rows += len(chunk)
+        for name in agree:
+            agree[name] += int((derived[name].astype(str) == chunk[name].astype(str)).sum())
+    info = classify_user_agent.cache_info()
+    print(f"🧭 Classified {rows:,} rows with {info.misses:,} distinct user agents parsed ({info.hits:,} cache hits)")
+    for name, matches in agree.items():
+        print(f"{name}: {matches / max(rows, 1):.1%} agree with the export")
@@ -0,0 +1,79 @@
+import argparse
+import glob
+import os
+import time
+
+from trifind_parser import BACKENDS, get_parser, lxml, parse_events_bs4
+
+# === Trifind Parser Equivalence Check + Throughput Benchmark ===
+# Parses every checked-in raw Trifind page with each backend, fails loudly if any
+# backend disagrees with the original bs4 code, then reports pages/sec and MB/sec.
+#   python bench_trifind_parser.py --iterations 50
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FILES = [os.path.join(HERE, "trifind_co_raw.html")] + sorted(
+    glob.glob(os.path.join(HERE, "js", "output", "html", "trifind_*_raw.html"))
+)
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        # newline="" keeps the CRLF line endings the pages were fetched with
+        with open(path, encoding="utf-8", newline="") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def check_equivalence(pages, backends):
+    for name, html in pages:
+        expected = parse_events_bs4(html, "co")
+        for backend in backends:
+            actual = get_parser(backend)(html, "co")
+            if actual != expected:
+                mismatch = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b), None)
+                raise AssertionError(
+                    f"❌ {backend} differs from bs4 on {name}: "
+                    f"{len(actual)} vs {len(expected)} events, first mismatch at {mismatch}"
+                )
+        print(f"✅ {name}: {len(expected)} events identical across {', '.join(backends)}")
+
+
+def benchmark(pages, backends, iterations):
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    results = {}
+    for backend in backends:
+        parse = get_parser(backend)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for _, html in pages:
+                parse(html, "co")
+        elapsed = time.perf_counter() - start
+        results[backend] = elapsed
+        n_pages = iterations * len(pages)
+        print(f"{backend:>9}: {n_pages / elapsed:8.1f} pages/s  "
+              f"{total_bytes * iterations / elapsed / 1e6:6.2f} MB/s  "
+              f"({elapsed * 1000 / n_pages:.2f} ms/page)")
+
+    baseline = results.get("bs4")
+    if baseline:
+        for backend, elapsed in results.items():
+            if backend == "bs4":
+                continue
+            print(f"   {backend:>9} speedup vs bs4: {baseline / elapsed:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    available = [b for b in BACKENDS if b != "auto" and (b != "lxml" or lxml is not None)]
+
+    parser = argparse.ArgumentParser(description="Check and benchmark Trifind parser backends.")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--backends", nargs="+", default=available, choices=available)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.files)
+    check_equivalence(pages, args.backends)
+    print()
+    benchmark(pages, args.backends, args.iterations)
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from trifind_parser import normalize_newlines
+
+# === Crawl Checkpoint Store ===
+# SQLite file that records every completed (state, page) unit with the sha256 of
+# its HTML and the events parsed from it, plus each state's last page.
+#   resume      – continue the latest unfinished crawl; completed pages are skipped
+#                 without a request and finished states are skipped entirely
+#   incremental – start a new crawl, but pages whose content hash is unchanged
+#                 reuse their stored events instead of being parsed again
+# iter_page_events() replays pages already completed in the current crawl, so a
+# resumed run still writes every state, not just what it fetched this time.
+# Hashes are taken over the page with line endings normalized, as the parsers see
+# it, so a live CRLF page and the same page from the cache compare equal.
+
+DEFAULT_CHECKPOINT_DB = "cache/trifind_checkpoints.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    state TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    events TEXT NOT NULL,
+    crawl_id INTEGER NOT NULL,
+    PRIMARY KEY (state, page)
+);
+CREATE TABLE IF NOT EXISTS states (
+    state TEXT PRIMARY KEY,
+    last_page INTEGER NOT NULL,
+    crawl_id INTEGER NOT NULL
+);
+"""
+
+
+def content_hash(html):
+    return hashlib.sha256(normalize_newlines(html).encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    def __init__(self, path=DEFAULT_CHECKPOINT_DB, resume=False, incremental=False):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.incremental = incremental
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.reused_pages = 0
+        self.parsed_pages = 0
+        self.skipped_pages = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+        row = None
+        if resume:
+            row = self.conn.execute(
+                "SELECT crawl_id FROM crawls WHERE finished_at IS NULL ORDER BY crawl_id DESC LIMIT 1"
+            ).fetchone()
+        if row:
+            self.crawl_id = row[0]
+        else:
+            with self.conn:
+                self.crawl_id = self.conn.execute(
+                    "INSERT INTO crawls (started_at) VALUES (?)", (time.time(),)
+                ).lastrowid
+        self.resumed = row is not None
+
+        # (state, page) units already completed in this crawl
+        self._done = set(self.conn.execute(
+            "SELECT state, page FROM pages WHERE crawl_id = ?", (self.crawl_id,)
+        ).fetchall())
+        self._last_page = dict(self.conn.execute(
+            "SELECT state, last_page FROM states WHERE crawl_id = ?", (self.crawl_id,)
+        ).fetchall())
+
+    # --- fetch-side hooks ---
+
+    def is_done(self, state, page):
+        with self._lock:
+            return (state, page) in self._done
+
+    def state_complete(self, state):
+        with self._lock:
+            last_page = self._last_page.get(state)
+            return last_page is not None and all((state, p) in self._done for p in range(1, last_page + 1))
+
+    def page_skipped(self):
+        with self._lock:
+            self.skipped_pages += 1
+
+    def page_fetched(self, state, page, html):
+        # Returns the stored events when an incremental run sees unchanged content
+        digest = content_hash(html)
+        with self._lock:
+            if self.incremental:
+                row = self.conn.execute(
+                    "SELECT content_hash, events FROM pages WHERE state = ? AND page = ?", (state, page)
+                ).fetchone()
+                if row and row[0] == digest:
+                    with self.conn:
+                        self.conn.execute(
+                            "UPDATE pages SET crawl_id = ? WHERE state = ? AND page = ?",
+                            (self.crawl_id, state, page),
+                        )
+                    self._done.add((state, page))
+                    self.reused_pages += 1
+                    return json.loads(row[1])
+            self._pending[(state, page)] = digest
+        return None
+
+    def state_finished(self, state, last_page):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO states (state, last_page, crawl_id) VALUES (?, ?, ?)",
+                (state, last_page, self.crawl_id),
+            )
+            self._last_page[state] = last_page
+            # the empty page that ended pagination was fetched but is never parsed
+            for key in [key for key in self._pending if key[0] == state and key[1] > last_page]:
+                del self._pending[key]
+
+    # --- write-side hooks ---
+
+    def page_parsed(self, state, page, events):
+        with self._lock:
+            digest = self._pending.pop((state, page), None)
+            if digest is None:  # reused page, already recorded by page_fetched
+                return
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (state, page, content_hash, events, crawl_id) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (state, page, digest, json.dumps(events), self.crawl_id),
+                )
+            self._done.add((state, page))
+            self.parsed_pages += 1
+
+    # --- results ---
+
+    def iter_page_events(self, states):
+        # Streams (state, page, events) for every page completed in this crawl, one
+        # row at a time, so resumed pages can be replayed into the event sink
+        wanted = set(states)
+        cursor = self.conn.execute(
+            "SELECT p.state, p.page, p.events FROM pages p "
+            "LEFT JOIN states s ON s.state = p.state AND s.crawl_id = p.crawl_id "
+            "WHERE p.crawl_id = ? AND (s.last_page IS NULL OR p.page <= s.last_page) "
+            "ORDER BY p.state, p.page",
+            (self.crawl_id,),
+        )
+        for state, page, events in cursor:
+            if state in wanted:
+                yield state, page, json.loads(events)
+
+    def finish(self):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE crawls SET finished_at = ? WHERE crawl_id = ?", (time.time(), self.crawl_id))
+
+    def close(self):
+        self.conn.close()
+
+    def summary(self):
+        mode = "resumed" if self.resumed else ("incremental" if self.incremental else "fresh")
+        return (f"🔖 Checkpoints ({mode} crawl #{self.crawl_id}): {self.parsed_pages} pages parsed, "
+                f"{self.reused_pages} unchanged pages reused, {self.skipped_pages} completed pages skipped")
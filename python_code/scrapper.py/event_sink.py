@@ -0,0 +1,147 @@
+import csv
+import os
+import threading
+from collections import Counter
+
+import pandas as pd
+import xlsxwriter
+
+from js.metrics import metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+# === Streaming Event Sink ===
+# Events are appended in batches to the CSV (and optional Parquet file) as pages
+# are parsed, so memory stays flat and the CSV is usable while the crawl is still
+# running. The xlsx "All Events" sheet is streamed with xlsxwriter's
+# constant_memory mode; the pivot sheet and console summary come from running
+# per-state counts, never from a materialized DataFrame.
+# Rows are written in the order pages finish, not sorted by state.
+
+EVENT_COLUMNS = ["state", "title", "url", "date", "location", "race_types", "usat_sanctioned"]
+DEFAULT_BATCH_SIZE = 500
+
+
+def _flatten(event):
+    row = dict(event)
+    row["race_types"] = "; ".join(row["race_types"])
+    return row
+
+
+class EventSink:
+    def __init__(self, csv_path, xlsx_path=None, parquet_path=None, batch_size=DEFAULT_BATCH_SIZE):
+        if parquet_path and pq is None:
+            raise ImportError("Parquet output needs pyarrow installed (pip install pyarrow)")
+        self.csv_path = csv_path
+        self.xlsx_path = xlsx_path
+        self.parquet_path = parquet_path
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self.total = 0
+        self.counts = Counter()  # (state, usat_sanctioned) -> events
+        self.state_totals = Counter()  # insertion order = first time a state was seen
+
+        self._csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=EVENT_COLUMNS, lineterminator=os.linesep)
+        self._csv.writeheader()
+        self._csv_file.flush()
+
+        self._parquet = None
+        if parquet_path:
+            self._schema = pa.schema([(c, pa.string()) for c in EVENT_COLUMNS])
+            self._parquet = pq.ParquetWriter(parquet_path, self._schema)
+
+        self._workbook = None
+        if xlsx_path:
+            self._workbook = xlsxwriter.Workbook(xlsx_path, {"constant_memory": True})
+            self._header_format = self._workbook.add_format(
+                {"bold": True, "border": 1, "align": "center", "valign": "top"}
+            )
+            self._events_sheet = self._workbook.add_worksheet("All Events")
+            self._pivot_sheet = self._workbook.add_worksheet("Pivot by USAT")
+            self._events_sheet.write_row(0, 0, EVENT_COLUMNS, self._header_format)
+            self._xlsx_row = 1
+
+    def add(self, events):
+        with self._lock:
+            for event in events:
+                row = _flatten(event)
+                self._buffer.append(row)
+                self.total += 1
+                self.counts[(row["state"], row["usat_sanctioned"])] += 1
+                self.state_totals[row["state"]] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        metrics.count("rows_written", len(self._buffer))
+        self._csv.writerows(self._buffer)
+        self._csv_file.flush()
+        if self._parquet is not None:
+            columns = {c: [row[c] for row in self._buffer] for c in EVENT_COLUMNS}
+            self._parquet.write_table(pa.table(columns, schema=self._schema))
+        if self._workbook is not None:
+            for row in self._buffer:
+                self._events_sheet.write_row(self._xlsx_row, 0, [row[c] for c in EVENT_COLUMNS])
+                self._xlsx_row += 1
+        self._buffer = []
+
+    def pivot(self):
+        # Same layout as df.pivot_table(index="state", columns="usat_sanctioned", aggfunc="size")
+        # with a Total_Events column and an ALL_STATES row
+        counts = pd.Series(self.counts, dtype="int64")
+        if counts.empty:
+            pivot = pd.DataFrame(columns=["Total_Events"])
+        else:
+            pivot = counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+            pivot["Total_Events"] = pivot.sum(axis=1)
+        total_row = pd.DataFrame(pivot.sum(axis=0)).T
+        total_row.index = ["ALL_STATES"]
+        pivot = pd.concat([pivot, total_row])
+        pivot.reset_index(inplace=True)
+        return pivot
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._csv_file.close()
+            if self._parquet is not None:
+                self._parquet.close()
+            if self._workbook is not None:
+                pivot = self.pivot()
+                self._pivot_sheet.write_row(0, 0, list(pivot.columns), self._header_format)
+                for i, values in enumerate(pivot.itertuples(index=False), 1):
+                    self._pivot_sheet.write_row(i, 0, [v.item() if hasattr(v, "item") else v for v in values])
+                self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def print_summary(self, n_states):
+        total_sanctioned = sum(n for (_, flag), n in self.counts.items() if flag == "Yes")
+        total_not_sanctioned = sum(n for (_, flag), n in self.counts.items() if flag == "No")
+
+        print("\n📊 Summary:")
+        print(f"🔢 Total Events Scraped: {self.total}\n")
+
+        print("🏆 Top 5 States by Total Events:")
+        for state, count in sorted(self.state_totals.items(), key=lambda kv: -kv[1])[:5]:
+            sanctioned = self.counts[(state, "Yes")]
+            not_sanctioned = self.counts[(state, "No")]
+            print(f"{state}: {count} total — 🟢 USAT: {sanctioned}, 🔴 Non-USAT: {not_sanctioned}")
+
+        print(f"\n📈 Overall Breakdown:\n🟢 USAT Sanctioned: {total_sanctioned}\n🔴 Non-USAT: {total_not_sanctioned}")
+
+        print(f"\n✅ Scraped {self.total} events across {n_states} state(s).")
+        print(f"📁 Saved to '{self.xlsx_path or self.csv_path}'")
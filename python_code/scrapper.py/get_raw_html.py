@@ -1,18 +1,40 @@
-import requests
+import argparse
 import csv
 
-# Step 1: Define URL and headers
+from fetcher import Fetcher
+from http_cache import CACHE_MODES, DEFAULT_CACHE_DIR, DEFAULT_TTL, HttpCache
+from js.metrics import add_metrics_args, finish_run, metrics, start_run
+
+# Step 1: Define URL and options
 url = "https://www.trifind.com/co"
-headers = {
-    "User-Agent": "Mozilla/5.0"  # Helps avoid basic anti-bot detection
-}
 
-# Step 2: Send GET request
-response = requests.get(url, headers=headers)
+parser = argparse.ArgumentParser(description="Save the raw HTML of a Trifind page.")
+parser.add_argument("--url", default=url)
+parser.add_argument("--cache-mode", choices=CACHE_MODES, default="cache",
+                    help="'replay' serves only from the on-disk cache, no network")
+parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="cache freshness in seconds")
+parser.add_argument("--seed", metavar="HTML_FILE",
+                    help="load a saved snapshot (e.g. trifind_co_raw.html) into the cache for --url")
+add_metrics_args(parser)
+args = parser.parse_args()
+start_run("get_raw_html", args)
+
+cache = HttpCache(args.cache_dir, ttl=args.ttl, mode=args.cache_mode)
+if args.seed:
+    cache.import_snapshot(args.url, args.seed)
+    print(f"✅ Seeded cache for {args.url} from '{args.seed}'")
+
+metrics.lap("setup")
+
+# Step 2: Send GET request (served from the cache when fresh)
+with Fetcher(cache=cache) as fetcher:
+    response = fetcher.get(args.url)
 
 # Step 3: Check response and write to files
 if response.status_code == 200:
     raw_html = response.text
+    metrics.lap("download")
 
     # Write HTML to .html file for manual inspection
     with open("trifind_co_raw.html", "w", encoding="utf-8") as html_file:
@@ -25,6 +47,10 @@ if response.status_code == 200:
         writer.writerow(["raw_html"])
         writer.writerow([raw_html])
     print("✅ HTML saved to 'trifind_co_raw.csv'")
+    metrics.count("rows_written")
+    metrics.lap("write")
 
 else:
     print(f"❌ Failed to fetch page. Status code: {response.status_code}")
+
+finish_run()
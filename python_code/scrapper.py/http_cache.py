@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import time
+
+# === On-Disk HTTP Response Cache ===
+# Bodies and metadata are stored per URL under cache_dir/<sha256(url)>.{html,json}.
+# Bodies are written and read back exactly as fetched (no newline translation),
+# so a cached or replayed page parses to the same events as the live one.
+# Modes:
+#   "off"     – always hit the network, never read or write the cache
+#   "cache"   – serve fresh entries (younger than ttl); revalidate stale ones with
+#               If-None-Match / If-Modified-Since and reuse the body on a 304
+#   "refresh" – always re-download and overwrite the cache
+#   "replay"  – serve only from the cache, never touch the network (miss = 504)
+
+DEFAULT_CACHE_DIR = "cache/http"
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+CACHE_MODES = ("off", "cache", "refresh", "replay")
+
+
+class CachedResponse:
+    # The slice of requests.Response the scrapers use
+    def __init__(self, status_code, text, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.content = text.encode("utf-8")
+
+
+class HttpCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, mode="cache"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.mode = mode
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".html", base + ".json"
+
+    def load(self, url):
+        body_path, meta_path = self._paths(url)
+        if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, encoding="utf-8", newline="") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def store(self, url, body, etag=None, last_modified=None):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        # write-then-rename so concurrent readers never see a half-written entry;
+        # newline="" keeps the body's line endings (CRLF pages stay CRLF on reload)
+        for path, payload in ((body_path, body), (meta_path, json.dumps(meta))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        return meta
+
+    def touch(self, url, meta):
+        meta["fetched_at"] = time.time()
+        _, meta_path = self._paths(url)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def import_snapshot(self, url, html_path):
+        # Seed the cache from a saved page such as trifind_co_raw.html
+        with open(html_path, encoding="utf-8", newline="") as f:
+            return self.store(url, f.read())
+
+    def get(self, url, send):
+        # send(url, extra_headers) -> requests.Response; only called when the network is allowed
+        if self.mode == "off":
+            return send(url, {})
+
+        meta, body = self.load(url) if self.mode != "refresh" else (None, None)
+
+        if self.mode == "replay":
+            if body is None:
+                return CachedResponse(504, "", from_cache=True)
+            return CachedResponse(200, body, from_cache=True)
+
+        if body is not None and time.time() - meta["fetched_at"] < self.ttl:
+            return CachedResponse(200, body, from_cache=True)
+
+        conditional = {}
+        if meta and meta.get("etag"):
+            conditional["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            conditional["If-Modified-Since"] = meta["last_modified"]
+
+        response = send(url, conditional)
+
+        if response.status_code == 304 and body is not None:
+            self.touch(url, meta)
+            return CachedResponse(200, body, response.headers, from_cache=True)
+
+        if response.status_code == 200:
+            self.store(url, response.text,
+                       etag=response.headers.get("ETag"),
+                       last_modified=response.headers.get("Last-Modified"))
+
+        return response
@@ -0,0 +1,68 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from bench_timing import timed
+from input_cache import read_csv_cached
+from match_engine import best_matches
+from synthetic_events import typo
+
+# === N-gram Candidate Pruning: Recall and Speed ===
+# Runs best_matches brute force (whole state block) and with n-gram shortlists
+# of several sizes on the same inputs, then reports how often the shortlist run
+# finds the brute-force winner. Candidates are synthetic event names built from
+# the real USAT title vocabulary, spread over states like the real file, so the
+# state blocks reach the sizes a national multi-platform run would see.
+#   python bench_candidate_pruning.py --candidates 10000 100000 --shortlists 10 25 50
+
+USAT_CSV = os.path.join("input", "results_2025-06-20_12-00-59_python_event_data_offset_0_batch_1.csv")
+SUFFIXES = ["", "", "", " 2025", " sprint", " olympic", " festival", " kids", " classic", " du"]
+
+
+def synthetic_inputs(n_candidates, n_queries, seed=0):
+    # Distinct event names drawn from the real USAT title vocabulary (word counts
+    # and state shares follow the real file); queries are a sample of them with
+    # one typo and sometimes an extra word, like the same event on another platform
+    rng = np.random.default_rng(seed)
+    usat = read_csv_cached(USAT_CSV, columns=["Name", "2LetterCode"]).dropna()
+    words = usat["Name"].str.lower().str.strip().str.split()
+    vocab = np.array(sorted({w for ws in words for w in ws}))
+    lengths = rng.choice(words.str.len().to_numpy(), size=n_candidates)
+    titles = [" ".join(rng.choice(vocab, size=k)) for k in lengths]
+    states = rng.choice(usat["2LetterCode"].to_numpy(), size=n_candidates)
+    candidates = pd.DataFrame({"state": states, "title": titles})
+
+    picks = rng.integers(n_candidates, size=n_queries)
+    queries = pd.DataFrame({
+        "state": states[picks],
+        "title": [typo(rng, titles[i] + SUFFIXES[rng.integers(len(SUFFIXES))]) for i in picks],
+    })
+    return queries, candidates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure n-gram shortlist recall against brute-force matching.")
+    parser.add_argument("--candidates", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--shortlists", nargs="+", type=int, default=[10, 25, 50])
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10} {'largest block':>13} {'shortlist':>9} {'seconds':>8} {'speedup':>8} "
+          f"{'winner recall':>13} {'score >= 90 recall':>18}")
+    for n_candidates in args.candidates:
+        queries, candidates = synthetic_inputs(n_candidates, args.queries)
+        largest = candidates["state"].value_counts().iloc[0]
+        cols = ("state", "title", "state", "title")
+        brute_secs, (brute_pos, brute_scores, _) = timed(
+            lambda: best_matches(queries, candidates, *cols, exact_first=False))
+        print(f"{len(candidates):>10} {largest:>13} {'brute':>9} {brute_secs:>8.2f} {'':>8} {'':>13} {'':>18}")
+        strong = brute_scores >= 90
+        for shortlist in args.shortlists:
+            secs, (pos, scores, _) = timed(
+                lambda: best_matches(queries, candidates, *cols, exact_first=False, shortlist=shortlist))
+            same_winner = (pos == brute_pos).mean()
+            strong_recall = np.isclose(scores, brute_scores)[strong].mean() if strong.any() else float("nan")
+            print(f"{len(candidates):>10} {largest:>13} {shortlist:>9} {secs:>8.2f} {brute_secs / secs:>7.1f}x "
+                  f"{same_winner:>13.4f} {strong_recall:>18.4f}")
@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import rapidfuzz
+
+from input_cache import read_csv_cached, read_excel_cached
+from match_engine import (DEFAULT_WINDOW_DAYS, NO_MATCH, PATH_NAMES, best_matches, build_state_blocks,
+                          take_rows)
+from synthetic_events import noisy_titles
+from us_states import us_state_to_abbrev
+
+# === Matcher Benchmark Suite ===
+# Generates synthetic RunSignUp / Trifind / USAT sources at several sizes, writes
+# them in the same file formats as the real inputs, and runs each matcher
+# pairing through the same steps the matcher scripts take, timing every stage:
+#   load         read the source files (cold: parses the .xlsx/.csv, fills the cache)
+#   load_cached  read them again from the columnar cache (what reruns pay)
+#   normalize    title/state/date normalization
+#   block        group both sides by state
+#   score        best_matches on those blocks (exact join + fuzzy scoring)
+#   write        gather matched rows and write the results workbook
+# Results go to a JSON file; --compare checks a run against an earlier one and
+# exits with status 1 when a stage got slower than the tolerance.
+#   python bench_matchers.py --sizes 1000 10000 100000
+#   python bench_matchers.py --sizes 1000 10000 --compare output/bench/matchers_<old>.json
+#   python bench_matchers.py --compare output/bench/matchers_<old>.json output/bench/matchers_<new>.json
+
+INPUT_DIR = "input"
+RUNSIGNUP_XLSX = os.path.join(INPUT_DIR, "runsignup_triathlon_duathlon_aquathlon_aqua_bike_swim_run_2025.xlsx")
+TRIFIND_XLSX = os.path.join(INPUT_DIR, "trifind_advanced_search_2025_results.xlsx")
+USAT_CSV = os.path.join(INPUT_DIR, "results_2025-06-20_12-00-59_python_event_data_offset_0_batch_1.csv")
+RESULTS_DIR = os.path.join("output", "bench")
+
+STAGES = ("load", "load_cached", "normalize", "block", "score", "write")
+SHARED_FRACTION = 0.6  # share of each source's events also listed on the other two sources
+TYPO_RATE = 0.3  # RunSignUp / Trifind titles with one typo against the USAT name
+JITTER_DAYS = np.array([0, 1, -1, 2, -2, 6])  # listed date minus the USAT race date
+JITTER_WEIGHTS = np.array([0.80, 0.06, 0.06, 0.03, 0.03, 0.02])
+MISSING_DATE_RATE = 0.01
+MIN_REGRESSION_SECONDS = 0.05  # ignore slowdowns smaller than this (timer noise)
+
+# matcher script each pairing mirrors: query source, candidate source, date window
+PAIRINGS = {
+    "runsignup->trifind": ("runsignup", "trifind", False),  # matcher_runsignup_trifind_events.py
+    "runsignup->usat": ("runsignup", "usat", True),  # matcher_runsignup_trifind_events_v2.py
+    "trifind->usat": ("trifind", "usat", True),  # matcher_trifind_usat_events_create_file.py
+}
+abbrev_to_state = {abbrev: state for state, abbrev in us_state_to_abbrev.items()}
+
+
+# === Synthetic Sources ===
+def source_profile():
+    # Word vocabulary, title lengths, state shares, race dates, how often a name
+    # repeats within a state (series, multi-day events) and Trifind title
+    # decorations ("2025 " prefixes, " ? . ." tails) measured from the real inputs
+    runsignup = read_excel_cached(RUNSIGNUP_XLSX, sheet_name="All Events", columns=["title"])
+    trifind = read_excel_cached(TRIFIND_XLSX, sheet_name="All Events", columns=["title"])
+    usat = read_csv_cached(USAT_CSV, columns=["Name", "2LetterCode", "RaceDate"])
+    words = pd.concat([usat["Name"], runsignup["title"]]).dropna().str.strip().str.split()
+    trifind_titles = trifind["title"].dropna()
+    states = usat["2LetterCode"].dropna()
+    named = usat.dropna(subset=["Name", "2LetterCode"])
+    return {
+        "vocab": np.array(sorted({w for ws in words for w in ws})),
+        "lengths": words.str.len().to_numpy(),
+        "states": states[states.isin(list(abbrev_to_state))].to_numpy(),
+        "dates": pd.to_datetime(usat["RaceDate"], errors="coerce").dropna().to_numpy(),
+        "repeat_rate": named.duplicated(["2LetterCode", "Name"]).mean(),
+        "year_prefix_rate": trifind_titles.str.match(r"20\d\d ").mean(),
+        "tails": trifind_titles.str.extract(r"(\s[?~.\s]+)$")[0].fillna("").to_numpy(),
+    }
+
+
+def _jittered_dates(rng, dates):
+    offsets = rng.choice(JITTER_DAYS, size=len(dates), p=JITTER_WEIGHTS)
+    jittered = pd.Series(dates + offsets.astype("timedelta64[D]"))
+    return jittered.mask(rng.random(len(dates)) < MISSING_DATE_RATE)
+
+
+def synthetic_sources(n_events, profile, seed=0):
+    # Returns {source: DataFrame} in the real files' columns and formats, each
+    # with n_events rows and an event_id column (the ground truth for matching)
+    rng = np.random.default_rng(seed)
+    n_shared = int(n_events * SHARED_FRACTION)
+    n_base = n_shared + 3 * (n_events - n_shared)
+    lengths = rng.choice(profile["lengths"], size=n_base)
+    titles = np.array([" ".join(rng.choice(profile["vocab"], size=k)) for k in lengths], dtype=object)
+    states = rng.choice(profile["states"], size=n_base)
+    dates = rng.choice(profile["dates"], size=n_base).astype("datetime64[D]")
+    repeats = np.flatnonzero(rng.random(n_base) < profile["repeat_rate"])
+    originals = rng.integers(n_base, size=len(repeats))  # same name and state, own date
+    titles[repeats], states[repeats] = titles[originals], states[originals]
+
+    sources = {}
+    for i, name in enumerate(("usat", "runsignup", "trifind")):
+        own = n_shared + i * (n_events - n_shared)
+        ids = rng.permutation(np.concatenate([np.arange(n_shared), np.arange(own, own + n_events - n_shared)]))
+        if name == "usat":
+            race_dates = pd.Series(dates[ids])
+            sources[name] = pd.DataFrame({
+                "ApplicationID": [f"{350000 + j}" for j in ids],
+                "Name": titles[ids],
+                "RaceDate": race_dates.dt.strftime("%Y-%m-%d"),
+                "Status": rng.choice(["APPROVED", "PENDING"], size=len(ids), p=[0.8, 0.2]),
+                "2LetterCode": states[ids],
+                "RegistrationWebsite": [f"https://example.com/race/{j}" for j in ids],
+                "event_id": ids,
+            })
+        elif name == "runsignup":
+            listed = _jittered_dates(rng, dates[ids])
+            sources[name] = pd.DataFrame({
+                "title": noisy_titles(rng, titles[ids], TYPO_RATE),
+                "date": (listed.dt.strftime("%a ") + listed.dt.month.astype("Int64").astype(str) + "/"
+                         + listed.dt.day.astype("Int64").astype(str) + listed.dt.strftime("/%y")),
+                "location": [f"Town {j}, {s} US" for j, s in zip(ids, states[ids])],
+                "state": states[ids],
+                "url": [f"https://runsignup.com/Race/{s}/Town/{j}" for j, s in zip(ids, states[ids])],
+                "month": listed.dt.month,
+                "year": listed.dt.year,
+                "event_type": "triathlon",
+                "event_id": ids,
+            })
+        else:
+            listed = _jittered_dates(rng, dates[ids])
+            prefix = np.where(rng.random(len(ids)) < profile["year_prefix_rate"], "2025 ", "")
+            tails = rng.choice(profile["tails"], size=len(ids))
+            full_states = [abbrev_to_state[s] for s in states[ids]]
+            sources[name] = pd.DataFrame({
+                "title": [p + t + tail for p, t, tail in zip(prefix, noisy_titles(rng, titles[ids], TYPO_RATE), tails)],
+                "url": [f"https://www.trifind.com/re_{j}/" for j in ids],
+                "date": (listed.dt.strftime("%a, %b ") + listed.dt.day.astype("Int64").astype(str)
+                         + listed.dt.strftime(", %Y")),
+                "city": [f"Town {j}" for j in ids],
+                "state": full_states,
+                "location": [f"Town {j}, {s}" for j, s in zip(ids, full_states)],
+                "race_type": "Triathlon",
+                "usat_sanctioned": rng.choice(["Yes", "No"], size=len(ids)),
+                "event_id": ids,
+            })
+    return sources
+
+
+def write_sources(sources, directory):
+    # Same file types as the real inputs, so the load stage parses what the matchers parse
+    paths = {
+        "runsignup": os.path.join(directory, "runsignup.xlsx"),
+        "trifind": os.path.join(directory, "trifind.xlsx"),
+        "usat": os.path.join(directory, "usat.csv"),
+    }
+    # xlsxwriter stops turning URLs into hyperlinks past 65,530 per sheet; the text is still written
+    warnings.filterwarnings("ignore", message="Ignoring URL")
+    sources["runsignup"].to_excel(paths["runsignup"], sheet_name="All Events", index=False)
+    sources["trifind"].to_excel(paths["trifind"], sheet_name="All Events", index=False)
+    sources["usat"].to_csv(paths["usat"], index=False)
+    return paths
+
+
+# === Pipeline Stages ===
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 4)
+
+
+def load_source(name, path, cache_dir):
+    if name == "usat":
+        return read_csv_cached(path, cache_dir=cache_dir)
+    return read_excel_cached(path, sheet_name="All Events", cache_dir=cache_dir)
+
+
+def normalize_source(name, df):
+    # The matcher scripts' cleanup: state key, lower-cased title, parsed date
+    df = df.copy()
+    if name == "usat":
+        df["state_key"] = df["2LetterCode"]
+        df["title_norm"] = df["Name"].str.lower().str.strip()
+        df["parsed_date"] = pd.to_datetime(df["RaceDate"], errors="coerce")
+    else:
+        if name == "trifind":
+            df["state_key"] = df["state"].map(lambda s: us_state_to_abbrev.get(s, "Other"))
+        else:
+            df["state_key"] = df["state"]
+        df["title_norm"] = df["title"].str.lower().str.strip()
+        df["parsed_date"] = pd.to_datetime(df["date"], errors="coerce", format="mixed")
+    return df
+
+
+def run_pairing(pairing, paths, processes):
+    # One pass of a matcher pairing; returns (stage seconds, counters)
+    query_name, cand_name, windowed = PAIRINGS[pairing]
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        with stage(timings, "load"):
+            raw = {name: load_source(name, paths[name], cache_dir) for name in (query_name, cand_name)}
+        with stage(timings, "load_cached"):
+            raw = {name: load_source(name, paths[name], cache_dir) for name in (query_name, cand_name)}
+        with stage(timings, "normalize"):
+            queries = normalize_source(query_name, raw[query_name])
+            candidates = normalize_source(cand_name, raw[cand_name])
+        with stage(timings, "block"):
+            query_blocks = build_state_blocks(queries, "state_key")
+            cand_blocks = build_state_blocks(candidates, "state_key")
+        window = dict(query_date_col="parsed_date", cand_date_col="parsed_date",
+                      window_days=DEFAULT_WINDOW_DAYS) if windowed else {}
+        with stage(timings, "score"):
+            positions, scores, paths_taken = best_matches(queries, candidates, "state_key", "title_norm",
+                                                          "state_key", "title_norm", processes=processes,
+                                                          query_blocks=query_blocks, cand_blocks=cand_blocks,
+                                                          **window)
+        with stage(timings, "write"):
+            matched = take_rows(candidates, positions, ["title_norm", "parsed_date", "event_id"])
+            results = pd.DataFrame({
+                f"{query_name}_title": queries["title_norm"].to_numpy(),
+                f"{query_name}_date": queries["parsed_date"].to_numpy(),
+                f"{cand_name}_title": matched["title_norm"],
+                f"{cand_name}_date": matched["parsed_date"],
+                "match_score": scores,
+            })
+            with pd.ExcelWriter(os.path.join(tmp, "matches.xlsx")) as writer:
+                results.to_excel(writer, sheet_name="Matches", index=False)
+
+    # ground truth: rows whose event is listed on the candidate side too
+    listed = np.isin(queries["event_id"].to_numpy(), candidates["event_id"].to_numpy())
+    found = positions != NO_MATCH
+    correct = found & (matched["event_id"].to_numpy() == queries["event_id"].to_numpy())
+    counters = {
+        "query_rows": len(queries),
+        "candidate_rows": len(candidates),
+        "largest_block": int(max((len(p) for p in cand_blocks.values()), default=0)),
+        "block_pairs": int(sum(len(p) * len(cand_blocks.get(s, [])) for s, p in query_blocks.items())),
+        "rows_written": len(results),
+        "true_match_recall": round(float(correct[listed].mean()) if listed.any() else 0.0, 4),
+        **{f"path_{name.replace(' ', '_')}": int((paths_taken == code).sum()) for code, name in PATH_NAMES.items()},
+    }
+    return timings, counters
+
+
+# === Results ===
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], capture_output=True,
+                                    text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "rapidfuzz": rapidfuzz.__version__,
+    }
+
+
+def compare(baseline, current, tolerance):
+    # Prints each stage's time against the baseline; returns the regressions
+    base = {(r["events"], r["pairing"]): r["stages"] for r in baseline["runs"]}
+    regressions = []
+    print(f"\n{'events':>8} {'pairing':<20} {'stage':<12} {'base s':>8} {'new s':>8} {'ratio':>7}")
+    for run in current["runs"]:
+        old = base.get((run["events"], run["pairing"]))
+        if old is None:
+            continue
+        for name in STAGES:
+            if name not in old or name not in run["stages"]:
+                continue
+            before, after = old[name], run["stages"][name]
+            ratio = after / before if before else float("inf")
+            slower = after > before * (1 + tolerance) and after - before > MIN_REGRESSION_SECONDS
+            if slower:
+                regressions.append((run["events"], run["pairing"], name, before, after))
+            print(f"{run['events']:>8} {run['pairing']:<20} {name:<12} {before:>8.3f} {after:>8.3f} "
+                  f"{ratio:>6.2f}x{'  ⚠️' if slower else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the matcher pipeline on synthetic event data.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--pairings", nargs="+", choices=list(PAIRINGS), default=list(PAIRINGS))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per pairing; the fastest time per stage is kept")
+    parser.add_argument("--processes", type=int, default=None, help="passed to best_matches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results JSON (default output/bench/matchers_<timestamp>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="baseline results to compare against; with two files, compare them without running")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown per stage before flagging")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline file and optionally a second results file")
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            regressions = compare(json.load(f), json.load(g), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    profile = source_profile()
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "processes": args.processes, "seed": args.seed,
+                     "window_days": DEFAULT_WINDOW_DAYS, "shared_fraction": SHARED_FRACTION,
+                     "typo_rate": TYPO_RATE},
+        "runs": [],
+    }
+    print(f"{'events':>8} {'pairing':<20} " + " ".join(f"{name:>11}" for name in STAGES) + f" {'recall':>7}")
+    for n_events in args.sizes:
+        sources = synthetic_sources(n_events, profile, seed=args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_sources(sources, tmp)
+            for pairing in args.pairings:
+                best = {}
+                for _ in range(args.repeat):
+                    timings, counters = run_pairing(pairing, paths, args.processes)
+                    best = {name: min(t, best.get(name, t)) for name, t in timings.items()}
+                report["runs"].append({"events": n_events, "pairing": pairing, "stages": best, "counters": counters})
+                print(f"{n_events:>8} {pairing:<20} " + " ".join(f"{best[name]:>11.3f}" for name in STAGES)
+                      + f" {counters['true_match_recall']:>7.3f}")
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR, f"matchers_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Benchmark results written to: {output_path}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
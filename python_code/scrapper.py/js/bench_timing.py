@@ -0,0 +1,17 @@
+import time
+
+# === Benchmark Timing ===
+# The timing helper the bench_*.py scripts in this directory share, the same
+# timed() as python_code/marketo/bench_timing.py (these scripts run from their own
+# directory, so each tree keeps its copy): runs fn `repeat` times and returns
+# (seconds, result of the last run), seconds being `stat` over the runs (the best
+# run by default; pass statistics.median for noisy I/O).
+
+
+def timed(fn, repeat=1, stat=min):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return stat(times), result
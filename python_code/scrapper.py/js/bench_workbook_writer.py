@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# === match_data Workbook Writer Benchmark ===
+# Compares the old openpyxl cell-by-cell rewrite of match_data with the streaming
+# sheet replacement in xlsx_sheet_writer.py. Rows are the real match_data sheet
+# tiled up to each size; every (method, size) runs in its own process so peak
+# memory is measured cleanly.
+#   python bench_workbook_writer.py --sizes 10000 100000
+
+TEMPLATE = os.path.join("output", "events", "matched_trifind_usat_events_2025_v1.xlsx")
+METHODS = ("stream", "openpyxl")
+
+
+def synthetic_matches(template, n_rows):
+    base = pd.read_excel(template, sheet_name="match_data")
+    repeats = -(-n_rows // len(base))
+    return pd.concat([base] * repeats, ignore_index=True).iloc[:n_rows]
+
+
+def write_openpyxl(template, output_path, df):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(template)
+    if "match_data" in wb.sheetnames:
+        del wb["match_data"]
+    ws = wb.create_sheet("match_data")
+    for col_idx, col_name in enumerate(df.columns, 1):
+        ws.cell(row=1, column=col_idx).value = col_name
+    for row_idx, row in enumerate(df.itertuples(index=False), 2):
+        for col_idx, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col_idx).value = value
+    wb.save(output_path)
+
+
+def write_stream(template, output_path, df):
+    from xlsx_sheet_writer import replace_sheets
+
+    replace_sheets(template, output_path, {"match_data": (list(df.columns), df)})
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(method, n_rows, template):
+    df = synthetic_matches(template, n_rows)
+    rss_before = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "out.xlsx")
+        start = time.perf_counter()
+        (write_stream if method == "stream" else write_openpyxl)(template, output_path, df)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(output_path) / 1e6
+    print(json.dumps({
+        "method": method,
+        "rows": n_rows,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "write_peak_delta_mb": round(peak_rss_mb() - rss_before, 1),
+        "file_mb": round(size_mb, 2),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark match_data workbook writers.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--template", default=TEMPLATE)
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args.template)
+        sys.exit(0)
+
+    print(f"{'method':>9} {'rows':>8} {'seconds':>9} {'peak MB':>9} {'write +MB':>10} {'file MB':>8}")
+    for n_rows in args.sizes:
+        for method in args.methods:
+            out = subprocess.run(
+                [sys.executable, __file__, "--template", args.template, "--child", method, str(n_rows)],
+                capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{r['method']:>9} {r['rows']:>8} {r['seconds']:>9.2f} {r['peak_rss_mb']:>9.1f} "
+                  f"{r['write_peak_delta_mb']:>10.1f} {r['file_mb']:>8.2f}")
@@ -0,0 +1,62 @@
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:
+    pyarrow = None
+
+# === Columnar Input Cache ===
+# Parsing .xlsx is by far the slowest way to load the matcher inputs, so each
+# sheet (or CSV) is converted once to Parquet under cache_dir, keyed by the source
+# path, its mtime and size. Later runs read the Parquet file back with only the
+# requested columns. Editing or replacing the source invalidates the entry.
+# Frames pyarrow cannot type (mixed object columns) are cached as pickles instead;
+# without pyarrow everything falls back to pickles.
+
+DEFAULT_CACHE_DIR = "cache/columnar"
+
+
+def _cache_path(source_path, part, cache_dir):
+    source_path = os.path.abspath(source_path)
+    stat = os.stat(source_path)
+    source_key = hashlib.sha1(f"{source_path}|{part}".encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    prefix = os.path.join(cache_dir, f"{stem}.{source_key}.")
+    return prefix, f"{prefix}{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _load_or_build(source_path, part, columns, build, cache_dir):
+    prefix, base = _cache_path(source_path, part, cache_dir)
+
+    if os.path.exists(base + ".parquet"):
+        return pd.read_parquet(base + ".parquet", columns=columns)
+    if os.path.exists(base + ".pkl"):
+        df = pd.read_pickle(base + ".pkl")
+        return df[columns] if columns is not None else df
+
+    df = build()
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(prefix + "*"):  # older versions of the same source
+        os.remove(stale)
+    try:
+        if pyarrow is None:
+            raise ImportError("pyarrow not installed")
+        df.to_parquet(base + ".parquet", index=False)
+    except Exception:
+        if os.path.exists(base + ".parquet"):
+            os.remove(base + ".parquet")
+        df.to_pickle(base + ".pkl")
+    return df[columns] if columns is not None else df
+
+
+def read_excel_cached(path, sheet_name, columns=None, cache_dir=DEFAULT_CACHE_DIR):
+    return _load_or_build(path, f"xlsx:{sheet_name}", columns,
+                          lambda: pd.read_excel(path, sheet_name=sheet_name), cache_dir)
+
+
+def read_csv_cached(path, columns=None, cache_dir=DEFAULT_CACHE_DIR):
+    return _load_or_build(path, "csv", columns, lambda: pd.read_csv(path), cache_dir)
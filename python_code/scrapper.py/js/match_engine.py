@@ -0,0 +1,537 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # only needed for method='optimal'
+    linear_sum_assignment = None
+
+from match_store import block_fingerprint, row_fingerprints
+from ngram_index import NgramIndex
+
+from metrics import add_metrics_args, metrics
+
+# === Blocked Fuzzy Matching Engine ===
+# Groups each source by state once, then scores a whole state block at a time
+# with a rapidfuzz score matrix (cdist). Winners come back as row positions into
+# the candidate frame, so callers never have to look a row up again by its
+# normalized title (which picked the wrong row when two events shared a title).
+# Rows whose (state, title[, date]) key appears verbatim in the candidates are
+# resolved first with a hash join; only the leftovers are fuzzy scored. With a
+# MatchStore, rows whose key and candidate block are unchanged since an earlier
+# run reuse the stored winner and skip both.
+# With window_days, each state block is also sorted by date and a row is only
+# scored against candidates within ±window_days of its own date (undated
+# candidates are always eligible; undated rows fall back to the whole block).
+# With shortlist, a character n-gram index over each large block picks a few
+# likely candidates per row and only those are scored (pairwise, not a matrix).
+# assigned_matches is the one-to-one alternative: it keeps each row's top-k
+# candidates and then assigns every candidate to at most one row per block.
+# State blocks are scored independently, so with processes=N each block's
+# titles (and dates) are shipped to a pool of N worker processes; results are
+# merged back in block order and match the single-process run exactly.
+# Time spent in the store, the exact join and fuzzy scoring is recorded in the
+# shared metrics registry, along with the number of title comparisons scored.
+
+NO_MATCH = -1
+DEFAULT_CHUNK_SIZE = 1024  # query rows per score matrix, bounds memory on big blocks
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_TOP_K = 5
+SHORTLIST_MIN_BLOCK = 2000  # smaller blocks are cheaper to score in full than to index
+ASSIGNMENT_METHODS = ('greedy', 'optimal')
+NO_DATE = np.iinfo(np.int64).min
+
+# How each query row was resolved (the `paths` array from best_matches)
+PATH_NONE = 0   # no candidates in the row's state (or date window)
+PATH_EXACT = 1  # hash join on the normalized key
+PATH_FUZZY = 2  # score matrix
+PATH_STORED = 3  # reused from the match store
+PATH_UNASSIGNED = 4  # had candidates, but each was assigned to a better row
+PATH_NAMES = {PATH_STORED: 'reused', PATH_EXACT: 'exact', PATH_FUZZY: 'fuzzy',
+              PATH_UNASSIGNED: 'unassigned', PATH_NONE: 'no candidates'}
+
+
+def build_state_blocks(df, state_col):
+    # state -> array of row positions (not index labels) in df
+    return {state: np.asarray(pos, dtype=np.int64)
+            for state, pos in df.groupby(state_col, sort=False).indices.items()}
+
+
+def _titles(df, title_col):
+    return df[title_col].fillna('').astype(str).to_numpy(dtype=object)
+
+
+def _dates(df, date_col):
+    return pd.to_datetime(df[date_col], errors='coerce', format='mixed').dt.normalize().to_numpy()
+
+
+def _day_numbers(dates):
+    # datetime64 days -> int64 day numbers, NO_DATE where missing
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    return np.where(np.isnat(dates), NO_DATE, days)
+
+
+def _within(query_days, cand_days, window_days):
+    # Broadcasts; a missing date on either side counts as inside the window
+    undated = (query_days == NO_DATE) | (cand_days == NO_DATE)
+    gap = np.abs(np.where(undated, 0, query_days) - np.where(undated, 0, cand_days))
+    return undated | (gap <= window_days)
+
+
+def exact_matches(query_keys, cand_keys):
+    # Hash join on parallel key arrays; returns the row position of the first
+    # candidate with an identical key for each query row (NO_MATCH if none).
+    # Rows with a missing key part never join.
+    names = [f'k{i}' for i in range(len(cand_keys))]
+    cand = pd.DataFrame(dict(zip(names, cand_keys)))
+    cand['pos'] = np.arange(len(cand), dtype=np.int64)
+    cand = cand[cand[names].notna().all(axis=1)].drop_duplicates(names, keep='first')
+
+    query = pd.DataFrame(dict(zip(names, query_keys)))
+    valid = query.notna().all(axis=1).to_numpy()
+    hits = query.merge(cand, how='left', on=names)['pos'].to_numpy()
+    return np.where(valid & ~np.isnan(hits), np.nan_to_num(hits, nan=NO_MATCH), NO_MATCH).astype(np.int64)
+
+
+def exact_matches_in_window(query_keys, cand_keys, query_days, cand_days, window_days):
+    # exact_matches for date-windowed matching: every candidate with the same key
+    # is considered and the first one inside the query row's window wins.
+    names = [f'k{i}' for i in range(len(cand_keys))]
+    cand = pd.DataFrame(dict(zip(names, cand_keys)))
+    cand['pos'] = np.arange(len(cand), dtype=np.int64)
+    cand['cand_day'] = cand_days
+    cand = cand[cand[names].notna().all(axis=1)]
+
+    query = pd.DataFrame(dict(zip(names, query_keys)))
+    query['row'] = np.arange(len(query), dtype=np.int64)
+    query['query_day'] = query_days
+    query = query[query[names].notna().all(axis=1)]
+
+    pairs = query.merge(cand, on=names)
+    pairs = pairs[_within(pairs['query_day'].to_numpy(), pairs['cand_day'].to_numpy(), window_days)]
+    first = pairs.groupby('row')['pos'].min()
+
+    hits = np.full(len(query_days), NO_MATCH, dtype=np.int64)
+    hits[first.index.to_numpy()] = first.to_numpy()
+    return hits
+
+
+def _window_chunks(query_pos, query_days, window_days, chunk_size):
+    # Dated rows sorted by date, cut into runs spanning at most window_days so
+    # each run's combined candidate window stays narrow
+    order = query_pos[np.argsort(query_days[query_pos], kind='stable')]
+    start = 0
+    for i in range(1, len(order) + 1):
+        if (i == len(order) or i - start >= chunk_size
+                or query_days[order[i]] - query_days[order[start]] > window_days):
+            yield order[start:i]
+            start = i
+
+
+def match_arg_parser(description):
+    # Command-line flags shared by the matcher scripts
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--processes', type=int, default=None,
+                        help="match state blocks in this many worker processes (0 = one per CPU)")
+    return add_metrics_args(parser)
+
+
+def _block_unit(query_pos, cand_pos, query_titles, cand_titles, window):
+    # The slice of the inputs one state block needs, renumbered from 0 so a
+    # worker process gets only this block's columns
+    if window is not None:
+        query_days, cand_days, window_days = window
+        window = (query_days[query_pos], cand_days[cand_pos], window_days)
+    return query_titles[query_pos], cand_titles[cand_pos], window
+
+
+def _map_blocks(fn, units, processes, **settings):
+    # fn(unit, **settings) for every block unit, results in unit order. Worker
+    # processes run rapidfuzz single-threaded so the pool doesn't oversubscribe.
+    if processes is None or processes == 1 or len(units) < 2:
+        return [fn(unit, **settings) for unit in units]
+    processes = processes if processes > 0 else os.cpu_count()
+    settings['workers'] = 1
+    # workers start from a clean process (forkserver, else spawn), as the scraper's
+    # parse pool does: forking would copy the caller's threads' locks (the match
+    # store's SQLite connection, the metrics registry) into every worker. They
+    # re-import the calling script, so matcher scripts keep their work under
+    # `if __name__ == "__main__":`
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    with ProcessPoolExecutor(max_workers=min(processes, len(units)), mp_context=context) as pool:
+        return list(pool.map(partial(fn, **settings), units))
+
+
+def best_matches(queries, candidates, query_state_col, query_title_col,
+                 cand_state_col, cand_title_col, scorer=fuzz.ratio,
+                 chunk_size=DEFAULT_CHUNK_SIZE, workers=-1,
+                 query_date_col=None, cand_date_col=None, exact_first=True, store=None, store_name=None,
+                 window_days=None, shortlist=None, processes=None, query_blocks=None, cand_blocks=None):
+    # Returns (positions, scores, paths) aligned with the rows of `queries`.
+    # positions[i] is the row position of the best candidate in `candidates`
+    # (NO_MATCH when the state has no candidates), scores[i] its score (0 if none)
+    # and paths[i] one of the PATH_* codes.
+    # Ties resolve to the first candidate in block order, same as extractOne. An
+    # identical title is the only way to score 100, so the exact join (first
+    # candidate per key) returns the same winner the score matrix would. Passing
+    # date columns adds the calendar day to the join key; rows whose date differs
+    # or is missing still fall through to fuzzy scoring on the title alone.
+    # window_days (needs both date columns) switches to date-window blocking: the
+    # exact join and the score matrix only consider candidates within the window,
+    # and a row with nothing in its window gets NO_MATCH.
+    # shortlist=N scores each row against only the N block candidates sharing the
+    # most character trigrams with it (blocks up to SHORTLIST_MIN_BLOCK candidates
+    # are scored in full).
+    # Rows whose shortlist comes back empty are scored against the whole block.
+    # processes=N scores the state blocks in N worker processes (0 = one per
+    # CPU); None or 1 keeps everything in this process.
+    # query_blocks/cand_blocks take blocks already built by build_state_blocks()
+    # on the same frames and state columns.
+    # `store` (a match_store.MatchStore) reuses results from earlier runs and
+    # records the ones computed here; store_name keeps each matcher's pairing of
+    # sources apart inside the same database.
+    query_titles = _titles(queries, query_title_col)
+    cand_titles = _titles(candidates, cand_title_col)
+
+    positions = np.full(len(queries), NO_MATCH, dtype=np.int64)
+    scores = np.zeros(len(queries), dtype=np.float64)
+    paths = np.full(len(queries), PATH_NONE, dtype=np.int8)
+
+    if cand_blocks is None:
+        cand_blocks = build_state_blocks(candidates, cand_state_col)
+    if query_blocks is None:
+        query_blocks = build_state_blocks(queries, query_state_col)
+
+    query_keys = [queries[query_state_col].to_numpy(), query_titles]
+    cand_keys = [candidates[cand_state_col].to_numpy(), cand_titles]
+    use_dates = query_date_col is not None and cand_date_col is not None
+    if window_days is not None and not use_dates:
+        raise ValueError("window_days needs query_date_col and cand_date_col")
+    join_query_keys, join_cand_keys = list(query_keys), list(cand_keys)
+    if use_dates:
+        query_dates, cand_dates = _dates(queries, query_date_col), _dates(candidates, cand_date_col)
+        query_keys.append(query_dates)
+        cand_keys.append(cand_dates)
+        if window_days is None:  # same-day exact key
+            join_query_keys, join_cand_keys = query_keys, cand_keys
+        else:
+            query_days, cand_days = _day_numbers(query_dates), _day_numbers(cand_dates)
+
+    if store is not None:
+        key_mode = 'title' if not use_dates else ('title+date' if window_days is None else f'window{window_days}')
+        if shortlist is not None:
+            key_mode += f'|shortlist{shortlist}'
+        scope = f"{store_name}|{getattr(scorer, '__name__', repr(scorer))}|{key_mode}"
+        store_started = time.perf_counter()
+        query_fp = row_fingerprints(query_keys)
+        cand_fp = row_fingerprints(cand_keys)
+        block_fp = {state: block_fingerprint(cand_fp[pos]) for state, pos in cand_blocks.items()}
+        store.sync_blocks(scope, block_fp)
+        row_blocks = np.full(len(queries), None, dtype=object)
+        for state, query_pos in query_blocks.items():
+            row_blocks[query_pos] = block_fp.get(state)
+        found, offsets, stored_scores = store.lookup(scope, query_fp, row_blocks)
+        for state, query_pos in query_blocks.items():
+            hit = query_pos[found[query_pos]]
+            if len(hit):
+                positions[hit] = cand_blocks[state][offsets[hit]]
+        scores[found] = stored_scores[found]
+        paths[found] = PATH_STORED
+        metrics.add_time("match_store", time.perf_counter() - store_started)
+
+    if exact_first and len(queries) and len(candidates):
+        with metrics.stage("exact_join"):
+            if window_days is None:
+                hits = exact_matches(join_query_keys, join_cand_keys)
+            else:
+                hits = exact_matches_in_window(join_query_keys, join_cand_keys, query_days, cand_days, window_days)
+        exact = (hits != NO_MATCH) & (paths == PATH_NONE)
+        positions[exact] = hits[exact]
+        scores[exact] = 100.0  # rapidfuzz scorers give identical strings 100
+        paths[exact] = PATH_EXACT
+
+    window = (query_days, cand_days, window_days) if window_days is not None else None
+    blocks, units = [], []
+    for state, query_pos in query_blocks.items():
+        cand_pos = cand_blocks.get(state)
+        if cand_pos is None or len(cand_pos) == 0:
+            continue
+        query_pos = query_pos[paths[query_pos] == PATH_NONE]  # skip rows the join resolved
+        if len(query_pos):
+            blocks.append((query_pos, cand_pos))
+            units.append(_block_unit(query_pos, cand_pos, query_titles, cand_titles, window))
+    with metrics.stage("fuzzy_scoring"):
+        results = _map_blocks(_match_block, units, processes, scorer=scorer, chunk_size=chunk_size,
+                              workers=workers, shortlist=shortlist)
+    for (query_pos, cand_pos), (offsets, best_scores, comparisons) in zip(blocks, results):
+        hit = offsets != NO_MATCH
+        positions[query_pos[hit]] = cand_pos[offsets[hit]]
+        scores[query_pos[hit]] = best_scores[hit]
+        paths[query_pos[hit]] = PATH_FUZZY
+        metrics.count("comparisons", comparisons)
+
+    if store is not None:
+        with metrics.stage("match_store"):
+            new = np.flatnonzero((paths == PATH_EXACT) | (paths == PATH_FUZZY))
+            block_offsets = np.empty(len(candidates), dtype=np.int64)
+            for cand_pos in cand_blocks.values():
+                block_offsets[cand_pos] = np.arange(len(cand_pos))
+            store.save(scope, query_fp[new], row_blocks[new], block_offsets[positions[new]], scores[new], paths[new])
+
+    for code, name in PATH_NAMES.items():
+        metrics.count(f"rows_{name.replace(' ', '_')}", int((paths == code).sum()))
+    return positions, scores, paths
+
+
+def _match_block(unit, scorer, chunk_size, workers, shortlist):
+    # Fuzzy winners for one state block unit: (offsets, scores, comparisons) with
+    # offsets/scores aligned with the unit's query rows, offsets into its
+    # candidates (NO_MATCH if none in reach) and comparisons the pairs scored
+    query_titles, cand_titles, window = unit
+    query_pos, cand_pos = np.arange(len(query_titles)), np.arange(len(cand_titles))
+    offsets = np.full(len(query_pos), NO_MATCH, dtype=np.int64)
+    scores = np.zeros(len(query_pos), dtype=np.float64)
+    comparisons = 0
+    if shortlist is not None and len(cand_pos) > max(shortlist, SHORTLIST_MIN_BLOCK):
+        rows, winners, best_scores, comparisons = _score_shortlist(query_pos, cand_pos, query_titles, cand_titles,
+                                                                   scorer, shortlist, workers, window)
+        offsets[rows] = winners
+        scores[rows] = best_scores
+        query_pos = query_pos[offsets == NO_MATCH]
+    for chunk, cols, matrix in _score_matrices(query_pos, cand_pos, query_titles, cand_titles,
+                                               scorer, chunk_size, workers, window):
+        best_scores = matrix.max(axis=1)
+        # first candidate in block order among the tied best (cols isn't sorted in window mode)
+        winners = np.where(matrix == best_scores[:, None], cols[None, :], np.iinfo(np.int64).max).min(axis=1)
+        hit = best_scores >= 0
+        offsets[chunk[hit]] = winners[hit]
+        scores[chunk[hit]] = best_scores[hit]
+        comparisons += matrix.size
+    return offsets, scores, comparisons
+
+
+def _score_matrices(query_pos, cand_pos, query_titles, cand_titles, scorer, chunk_size, workers, window=None):
+    # Yields (query rows, candidate columns, score matrix) for one state block.
+    # With window = (query_days, cand_days, window_days) dated rows are scored in
+    # date-sorted runs against the union of their windows, with cells outside a
+    # row's own window set to -1; undated rows get the whole block.
+    if len(query_pos) == 0:
+        return
+    if window is not None:
+        query_days, cand_days, window_days = window
+        dated = cand_days[cand_pos] != NO_DATE
+        order = np.argsort(cand_days[cand_pos[dated]], kind='stable')
+        sorted_pos = cand_pos[dated][order]
+        sorted_days = cand_days[sorted_pos]
+        undated_pos = cand_pos[~dated]
+
+        dated_rows = query_days[query_pos] != NO_DATE
+        for chunk in _window_chunks(query_pos[dated_rows], query_days, window_days, chunk_size):
+            chunk_days = query_days[chunk]
+            lo = np.searchsorted(sorted_days, chunk_days[0] - window_days, side='left')
+            hi = np.searchsorted(sorted_days, chunk_days[-1] + window_days, side='right')
+            cols = np.concatenate([sorted_pos[lo:hi], undated_pos])
+            if len(cols) == 0:
+                continue
+            matrix = process.cdist(query_titles[chunk], cand_titles[cols], scorer=scorer,
+                                   dtype=np.float64, workers=workers)
+            matrix[~_within(chunk_days[:, None], cand_days[cols][None, :], window_days)] = -1
+            yield chunk, cols, matrix
+        query_pos = query_pos[~dated_rows]  # undated rows fall back to the whole block
+
+    block_choices = cand_titles[cand_pos]
+    for start in range(0, len(query_pos), chunk_size):
+        chunk = query_pos[start:start + chunk_size]
+        matrix = process.cdist(query_titles[chunk], block_choices, scorer=scorer,
+                               dtype=np.float64, workers=workers)
+        yield chunk, cand_pos, matrix
+
+
+def _score_shortlist(query_pos, cand_pos, query_titles, cand_titles, scorer, shortlist, workers, window=None):
+    # Scores each row only against its n-gram shortlist from the block. Returns
+    # (rows, winners, scores) for the rows that had at least one candidate left
+    # (after the date window, if any), plus the number of pairs scored; ties go
+    # to the first candidate in block order.
+    index = NgramIndex(cand_titles[cand_pos])
+    q, t, _ = index.candidates(query_titles[query_pos], top=shortlist)
+    rows, cands = query_pos[q], cand_pos[t]
+    if window is not None:
+        query_days, cand_days, window_days = window
+        keep = _within(query_days[rows], cand_days[cands], window_days)
+        rows, cands = rows[keep], cands[keep]
+    pair_scores = process.cpdist(query_titles[rows], cand_titles[cands], scorer=scorer,
+                                 dtype=np.float64, workers=workers)
+    order = np.lexsort((cands, -pair_scores, rows))
+    rows, cands, pair_scores = rows[order], cands[order], pair_scores[order]
+    first = np.concatenate([[0], np.flatnonzero(np.diff(rows)) + 1]) if len(rows) else np.empty(0, dtype=np.int64)
+    return rows[first], cands[first], pair_scores[first], len(pair_scores)
+
+
+def _top_k(chunk, cols, matrix, k):
+    # Flattened (row, candidate, score) edges for the k best cells of each row
+    k = min(k, matrix.shape[1])
+    top = np.argpartition(-matrix, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(matrix, top, axis=1)
+    keep = top_scores >= 0  # drop cells masked out by the date window
+    return np.repeat(chunk, k)[keep.ravel()], cols[top][keep], top_scores[keep]
+
+
+def _block_edges(unit, scorer, chunk_size, workers, top_k, min_score):
+    # Top-k (row, candidate, score) edges for one state block unit, in the
+    # unit's own row and candidate numbering, and the number of pairs scored
+    query_titles, cand_titles, window = unit
+    query_pos, cand_pos = np.arange(len(query_titles)), np.arange(len(cand_titles))
+    edges, comparisons = [], 0
+    for chunk, cols, matrix in _score_matrices(query_pos, cand_pos, query_titles, cand_titles,
+                                               scorer, chunk_size, workers, window):
+        comparisons += matrix.size
+        matrix[matrix < min_score] = -1
+        edges.append(_top_k(chunk, cols, matrix, top_k))
+    if not edges:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64), comparisons
+    return (*(np.concatenate(part) for part in zip(*edges)), comparisons)
+
+
+def _greedy_assignment(rows, cands, edge_scores):
+    # Same result as taking edges best-first (ties: lower row, then lower
+    # candidate) and keeping each one whose row and candidate are still free,
+    # but done in vectorized rounds: every edge that is the first remaining edge
+    # of both its row and its candidate is kept, then their other edges dropped.
+    order = np.lexsort((cands, rows, -edge_scores))
+    rows, cands = rows[order], cands[order]
+    alive = np.ones(len(rows), dtype=bool)
+    chosen = []
+    while alive.any():
+        idx = np.flatnonzero(alive)
+        row_first = idx[np.unique(rows[idx], return_index=True)[1]]
+        cand_first = idx[np.unique(cands[idx], return_index=True)[1]]
+        picked = np.intersect1d(row_first, cand_first)
+        chosen.append(picked)
+        alive &= ~np.isin(rows, rows[picked]) & ~np.isin(cands, cands[picked])
+    picked = np.concatenate(chosen) if chosen else np.empty(0, dtype=np.int64)
+    return order[picked]
+
+
+def _optimal_assignment(rows, cands, edge_scores):
+    # Maximum total score over the top-k edges (Hungarian algorithm on the block)
+    row_ids, row_idx = np.unique(rows, return_inverse=True)
+    cand_ids, cand_idx = np.unique(cands, return_inverse=True)
+    weights = np.zeros((len(row_ids), len(cand_ids)))
+    edge_at = np.full(weights.shape, -1, dtype=np.int64)
+    weights[row_idx, cand_idx] = edge_scores + 1  # +1 so a 0-score edge still beats no edge
+    edge_at[row_idx, cand_idx] = np.arange(len(rows))
+    r, c = linear_sum_assignment(weights, maximize=True)
+    edges = edge_at[r, c]
+    return edges[edges >= 0]
+
+
+def assigned_matches(queries, candidates, query_state_col, query_title_col,
+                     cand_state_col, cand_title_col, scorer=fuzz.ratio,
+                     top_k=DEFAULT_TOP_K, method='greedy', time_budget=None, min_score=0,
+                     chunk_size=DEFAULT_CHUNK_SIZE, workers=-1,
+                     query_date_col=None, cand_date_col=None, window_days=None, processes=None):
+    # One-to-one matching: each candidate goes to at most one query row.
+    # Returns (positions, scores, runner_up, paths) aligned with `queries`:
+    # positions/scores as in best_matches for assigned rows, runner_up the row's
+    # best score among its other top-k candidates (its best one if it ended up
+    # unassigned) and paths PATH_FUZZY, PATH_UNASSIGNED or PATH_NONE.
+    # method='greedy' takes edges best-first; 'optimal' maximizes each block's
+    # total score (needs scipy). With time_budget (seconds), blocks still left
+    # once the budget is spent are assigned greedily instead. processes as in
+    # best_matches (only the scoring runs in the pool; assignment stays here).
+    if method not in ASSIGNMENT_METHODS:
+        raise ValueError(f"method must be one of {ASSIGNMENT_METHODS}, got {method!r}")
+    if method == 'optimal' and linear_sum_assignment is None:
+        raise ImportError("method='optimal' needs scipy installed (pip install scipy)")
+    if window_days is not None and (query_date_col is None or cand_date_col is None):
+        raise ValueError("window_days needs query_date_col and cand_date_col")
+
+    query_titles = _titles(queries, query_title_col)
+    cand_titles = _titles(candidates, cand_title_col)
+    cand_blocks = build_state_blocks(candidates, cand_state_col)
+    query_blocks = build_state_blocks(queries, query_state_col)
+    window = None
+    if window_days is not None:
+        window = (_day_numbers(_dates(queries, query_date_col)),
+                  _day_numbers(_dates(candidates, cand_date_col)), window_days)
+
+    positions = np.full(len(queries), NO_MATCH, dtype=np.int64)
+    scores = np.zeros(len(queries), dtype=np.float64)
+    runner_up = np.zeros(len(queries), dtype=np.float64)
+    paths = np.full(len(queries), PATH_NONE, dtype=np.int8)
+
+    blocks, units = [], []
+    for state, query_pos in query_blocks.items():
+        cand_pos = cand_blocks.get(state)
+        if cand_pos is None or len(cand_pos) == 0:
+            continue
+        blocks.append((query_pos, cand_pos))
+        units.append(_block_unit(query_pos, cand_pos, query_titles, cand_titles, window))
+    with metrics.stage("fuzzy_scoring"):
+        results = _map_blocks(_block_edges, units, processes, scorer=scorer, chunk_size=chunk_size,
+                              workers=workers, top_k=top_k, min_score=min_score)
+
+    edge_rows, edge_cands, edge_scores, block_edges = [], [], [], []
+    n_edges = 0
+    for (query_pos, cand_pos), (r, c, sc, comparisons) in zip(blocks, results):
+        metrics.count("comparisons", comparisons)
+        edge_rows.append(query_pos[r])
+        edge_cands.append(cand_pos[c])
+        edge_scores.append(sc)
+        block_edges.append((n_edges, n_edges + len(r)))
+        n_edges += len(r)
+    if not edge_rows:
+        return positions, scores, runner_up, paths
+    rows, cands, edge_scores = np.concatenate(edge_rows), np.concatenate(edge_cands), np.concatenate(edge_scores)
+
+    assignment_started = time.perf_counter()
+    if method == 'greedy':
+        picked = _greedy_assignment(rows, cands, edge_scores)  # edges never cross blocks
+    else:
+        started = time.perf_counter()
+        picked = []
+        for start, end in block_edges:
+            if start == end:
+                continue
+            solve = _optimal_assignment
+            if time_budget is not None and time.perf_counter() - started > time_budget:
+                solve = _greedy_assignment
+            picked.append(start + solve(rows[start:end], cands[start:end], edge_scores[start:end]))
+        picked = np.concatenate(picked) if picked else np.empty(0, dtype=np.int64)
+    metrics.add_time("assignment", time.perf_counter() - assignment_started)
+
+    paths[rows] = PATH_UNASSIGNED
+    positions[rows[picked]] = cands[picked]
+    scores[rows[picked]] = edge_scores[picked]
+    paths[rows[picked]] = PATH_FUZZY
+
+    # runner-up: best score among each row's other top-k edges
+    other = cands != positions[rows]
+    np.maximum.at(runner_up, rows[other], edge_scores[other])
+    return positions, scores, runner_up, paths
+
+
+def describe_paths(label, paths):
+    # One console line with the per-path counts, e.g. for the matcher summaries
+    counts = {name: int((paths == code).sum()) for code, name in PATH_NAMES.items()}
+    total = len(paths)
+    skipped = (counts['reused'] + counts['exact']) / total * 100 if total else 0.0
+    parts = ', '.join(f'{n} {name}' for name, n in counts.items())
+    return f"🔗 {label} match paths: {parts} ({skipped:.1f}% skipped fuzzy scoring)"
+
+
+def take_rows(df, positions, columns=None):
+    # Gather candidate rows by position; NO_MATCH positions become all-NaN rows.
+    # The result has a fresh RangeIndex aligned with `positions`.
+    subset = df if columns is None else df[columns]
+    return subset.reset_index(drop=True).reindex(positions).reset_index(drop=True)
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# === Persistent Match Store ===
+# SQLite file of best-match results from earlier runs, so a rerun only scores
+# query rows that are new or changed. Each result is keyed by
+#   query_key – fingerprint of the query row's state, normalized title (and date
+#               when the match uses a date key)
+#   block_key – fingerprint of the ordered candidate block for that state
+# and records the winner as an offset into the block. A block whose contents
+# changed gets a new block_key, so every match chosen from the old block stops
+# resolving and is deleted the next time that state is matched.
+
+DEFAULT_MATCH_DB = "cache/matches.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    scope TEXT NOT NULL,
+    query_key INTEGER NOT NULL,
+    block_key TEXT NOT NULL,
+    block_offset INTEGER NOT NULL,
+    score REAL NOT NULL,
+    path INTEGER NOT NULL,
+    PRIMARY KEY (scope, query_key, block_key)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    scope TEXT NOT NULL,
+    state TEXT NOT NULL,
+    block_key TEXT NOT NULL,
+    PRIMARY KEY (scope, state)
+);
+"""
+
+
+def row_fingerprints(keys):
+    # One 64-bit hash per row of the parallel key arrays (stored as signed ints)
+    frame = pd.DataFrame({f"k{i}": k for i, k in enumerate(keys)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().view(np.int64)
+
+
+def block_fingerprint(row_keys):
+    # row_keys: fingerprints of the block's candidate rows, in block order
+    return hashlib.sha1(np.ascontiguousarray(row_keys).tobytes()).hexdigest()
+
+
+class MatchStore:
+    def __init__(self, path=DEFAULT_MATCH_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.invalidated = 0
+
+    def sync_blocks(self, scope, block_keys):
+        # block_keys: {state: block_key}. Drops matches chosen from blocks whose
+        # contents have changed since they were stored.
+        stored = dict(self.conn.execute("SELECT state, block_key FROM blocks WHERE scope = ?", (scope,)).fetchall())
+        with self.conn:
+            for state, block_key in block_keys.items():
+                old = stored.get(str(state))
+                if old == block_key:
+                    continue
+                if old is not None:
+                    self.invalidated += self.conn.execute(
+                        "DELETE FROM matches WHERE scope = ? AND block_key = ?", (scope, old)
+                    ).rowcount
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO blocks (scope, state, block_key) VALUES (?, ?, ?)",
+                    (scope, str(state), block_key),
+                )
+
+    def lookup(self, scope, query_keys, block_keys):
+        # Returns (found, offsets, scores) aligned with query_keys; block_keys
+        # is the per-row block fingerprint (None for rows without candidates)
+        stored = pd.read_sql_query(
+            "SELECT query_key, block_key, block_offset, score FROM matches WHERE scope = ?",
+            self.conn, params=(scope,),
+        )
+        wanted = pd.DataFrame({"query_key": query_keys, "block_key": block_keys})
+        hits = wanted.merge(stored, how="left", on=["query_key", "block_key"])
+        found = hits["block_offset"].notna().to_numpy()
+        offsets = hits["block_offset"].fillna(-1).to_numpy(dtype=np.int64)
+        return found, offsets, hits["score"].fillna(0).to_numpy(dtype=np.float64)
+
+    def save(self, scope, query_keys, block_keys, offsets, scores, paths):
+        rows = zip(query_keys.tolist(), block_keys, offsets.tolist(), scores.tolist(), paths.tolist())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches (scope, query_key, block_key, block_offset, score, path) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((scope, *row) for row in rows),
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
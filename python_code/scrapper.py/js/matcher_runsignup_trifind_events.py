@@ -1,69 +1,78 @@
 import pandas as pd
-from rapidfuzz import fuzz, process
+from input_cache import read_excel_cached
+from match_engine import NO_MATCH, best_matches, describe_paths, match_arg_parser, take_rows
+from match_store import MatchStore
+from metrics import finish_run, metrics, start_run
 
-# Load Excel files
-output_directory = 'output/events/';
-output_file_name = 'matched_runsignup_trifind_events_2025';
+if __name__ == "__main__":
+    # === Command-Line Flags ===
+    # --processes N matches the state blocks in N worker processes (0 = one per CPU);
+    # --metrics-json PATH and --profile cprofile|pyinstrument record where the time goes
+    args = match_arg_parser("Match RunSignUp events to Trifind events.").parse_args()
+    start_run('matcher_runsignup_trifind_events', args)
 
-runsignup = pd.read_excel(output_directory + 'runsignup_triathlon_duathlon_aquathlon_aqua_bike_swim_run_2025.xlsx', sheet_name='All Events')
-trifind = pd.read_excel(output_directory + 'trifind_paginated_events.xlsx', sheet_name='All Events')
+    # Load Excel files (cached as Parquet after the first run)
+    output_directory = 'output/events/';
+    output_file_name = 'matched_runsignup_trifind_events_2025';
 
-# Ensure needed columns are present
-runsignup = runsignup[['title', 'state']].dropna()
-trifind = trifind[['title', 'state', 'usat_sanctioned']].dropna()
+    runsignup = read_excel_cached(output_directory + 'runsignup_triathlon_duathlon_aquathlon_aqua_bike_swim_run_2025.xlsx', sheet_name='All Events', columns=['title', 'state'])
+    trifind = read_excel_cached(output_directory + 'trifind_paginated_events.xlsx', sheet_name='All Events', columns=['title', 'state', 'usat_sanctioned'])
+    metrics.lap('load')
 
-# Normalize titles
-runsignup['title_norm'] = runsignup['title'].str.lower().str.strip()
-trifind['title_norm'] = trifind['title'].str.lower().str.strip()
+    # Ensure needed columns are present
+    runsignup = runsignup[['title', 'state']].dropna()
+    trifind = trifind[['title', 'state', 'usat_sanctioned']].dropna()
 
-# Perform fuzzy matching
-all_matches = []
+    # Normalize titles
+    runsignup['title_norm'] = runsignup['title'].str.lower().str.strip()
+    trifind['title_norm'] = trifind['title'].str.lower().str.strip()
+    metrics.lap('normalize')
 
-for _, rs in runsignup.iterrows():
-    candidates = trifind[trifind['state'] == rs['state']]
-    if not candidates.empty:
-        match, score, _ = process.extractOne(rs['title_norm'], candidates['title_norm'], scorer=fuzz.ratio)
-        trifind_match = candidates[candidates['title_norm'] == match].iloc[0]
+    # Perform fuzzy matching (one score matrix per state block)
+    with MatchStore() as match_store:
+        positions, scores, paths = best_matches(runsignup, trifind, 'state', 'title_norm', 'state', 'title_norm',
+                                                store=match_store, store_name='runsignup->trifind',
+                                                processes=args.processes)
+    trifind_match = take_rows(trifind, positions, ['title', 'usat_sanctioned'])
+    matched = positions != NO_MATCH
+    metrics.lap('match')
 
-        all_matches.append({
-            'runsignup_title': rs['title'],
-            'trifind_title': trifind_match['title'],
-            'state': rs['state'],
-            'match_score': score,
-            'usat_sanctioned': trifind_match['usat_sanctioned']
-        })
-    else:
-        all_matches.append({
-            'runsignup_title': rs['title'],
-            'trifind_title': None,
-            'state': rs['state'],
-            'match_score': 0,
-            'usat_sanctioned': 'Unknown'
-        })
+    # Convert to DataFrame
+    df_matches = pd.DataFrame({
+        'runsignup_title': runsignup['title'].to_numpy(),
+        'trifind_title': trifind_match['title'],
+        'state': runsignup['state'].to_numpy(),
+        'match_score': scores,
+        'usat_sanctioned': trifind_match['usat_sanctioned'].where(matched, 'Unknown')
+    })
 
-# Convert to DataFrame
-df_matches = pd.DataFrame(all_matches)
+    # Create score bins
+    bins = [0, 69, 79, 89, 94, 100]
+    labels = ['0–69', '70–79', '80–89', '90–94', '95–100']
+    df_matches['score_bin'] = pd.cut(df_matches['match_score'], bins=bins, labels=labels, right=True, include_lowest=True)
 
-# Create score bins
-bins = [0, 69, 79, 89, 94, 100]
-labels = ['0–69', '70–79', '80–89', '90–94', '95–100']
-df_matches['score_bin'] = pd.cut(df_matches['match_score'], bins=bins, labels=labels, right=True, include_lowest=True)
+    # Count by score bin
+    summary = df_matches['score_bin'].value_counts().sort_index().reset_index()
+    summary.columns = ['match_score_bin', 'count']
+    metrics.lap('summarize')
 
-# Count by score bin
-summary = df_matches['score_bin'].value_counts().sort_index().reset_index()
-summary.columns = ['match_score_bin', 'count']
+    # Save to Excel
+    with pd.ExcelWriter(output_directory + output_file_name + '.xlsx') as writer:
+        df_matches.to_excel(writer, sheet_name='Matches', index=False)
+        summary.to_excel(writer, sheet_name='Score Summary', index=False)
+    metrics.count('rows_written', len(df_matches))
+    metrics.lap('write')
 
-# Save to Excel
-with pd.ExcelWriter(output_directory + output_file_name + '.xlsx') as writer:
-    df_matches.to_excel(writer, sheet_name='Matches', index=False)
-    summary.to_excel(writer, sheet_name='Score Summary', index=False)
+    # Print summary to console
+    print("\n📊 Match Score Bin Summary:")
+    for _, row in summary.iterrows():
+        print(f"{row['match_score_bin']}: {row['count']} matches")
 
-# Print summary to console
-print("\n📊 Match Score Bin Summary:")
-for _, row in summary.iterrows():
-    print(f"{row['match_score_bin']}: {row['count']} matches")
+    print(describe_paths("Trifind", paths))
 
-print("\n🟢 USAT Sanctioned Event Count:")
-print(df_matches['usat_sanctioned'].value_counts())
+    print("\n🟢 USAT Sanctioned Event Count:")
+    print(df_matches['usat_sanctioned'].value_counts())
 
-print("\n✅ Match results written to 'matched_runsignup_trifind_events_2025.xlsx'")
+    print("\n✅ Match results written to 'matched_runsignup_trifind_events_2025.xlsx'")
+
+    finish_run()
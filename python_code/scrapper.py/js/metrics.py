@@ -0,0 +1,160 @@
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# === Run Metrics ===
+# One process-wide registry of stage timers and counters that the scraper,
+# get_raw_html, the matchers and the modules they call all record into:
+#   metrics.stage("fetch")     times a block (thread-safe, calls accumulate)
+#   metrics.add_time(name, s)  records a duration measured elsewhere, e.g. parse
+#                              time reported back by a worker process
+#   metrics.lap("load")        time since the previous lap, for straight-line scripts
+#   metrics.count(name, n)     bumps a counter
+# Scripts call start_run() once their flags are parsed and finish_run() at the
+# end, which prints the stage table and writes the JSON metrics (--metrics-json)
+# and a profile (--profile) when asked for. Worker processes have their own
+# registry, so anything measured there has to be sent back to the parent.
+# The module lives next to the matchers; the scraper scripts one directory up
+# import it as js.metrics.
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, script=None):
+        with self._lock:
+            self.script = script
+            self.started = datetime.now()
+            self._wall_start = self._last_lap = time.perf_counter()
+            self.timers = {}  # name -> {"seconds", "calls", "max_seconds"}
+            self.counters = {}
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, {"seconds": 0.0, "calls": 0, "max_seconds": 0.0})
+            timer["seconds"] += seconds
+            timer["calls"] += 1
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def lap(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            elapsed, self._last_lap = now - self._last_lap, now
+        self.add_time(name, elapsed)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            stages = {
+                name: {
+                    "seconds": round(t["seconds"], 4),
+                    "calls": t["calls"],
+                    "mean_seconds": round(t["seconds"] / t["calls"], 6),
+                    "max_seconds": round(t["max_seconds"], 4),
+                }
+                for name, t in self.timers.items()
+            }
+            return {
+                "script": self.script,
+                "started": self.started.isoformat(timespec="seconds"),
+                "wall_seconds": round(time.perf_counter() - self._wall_start, 4),
+                "stages": stages,
+                "counters": dict(self.counters),
+            }
+
+
+metrics = Metrics()
+_run = {}
+
+
+def add_metrics_args(parser):
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write stage timings and counters as JSON ('-' = stdout)")
+    parser.add_argument("--profile", choices=PROFILERS,
+                        help="profile the whole run (pyinstrument must be installed separately)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="profile output (default <script>.prof, or <script>.html for pyinstrument)")
+    return parser
+
+
+def start_run(script, args=None):
+    # Clears the registry and starts the profiler requested by the flags from add_metrics_args
+    metrics.reset(script)
+    profile = getattr(args, "profile", None)
+    _run.clear()
+    _run["metrics_json"] = getattr(args, "metrics_json", None)
+    _run["profile"] = profile
+    _run["profile_out"] = getattr(args, "profile_out", None) or (
+        f"{script}.html" if profile == "pyinstrument" else f"{script}.prof")
+    if profile == "cprofile":
+        _run["profiler"] = cProfile.Profile()
+        _run["profiler"].enable()
+    elif profile == "pyinstrument":
+        try:
+            import pyinstrument
+        except ImportError:
+            raise ImportError("--profile pyinstrument needs pyinstrument installed (pip install pyinstrument)") from None
+        _run["profiler"] = pyinstrument.Profiler()
+        _run["profiler"].start()
+
+
+def _stop_profiler():
+    profiler = _run.pop("profiler", None)
+    if profiler is None:
+        return
+    path = _run["profile_out"]
+    if _run["profile"] == "cprofile":
+        profiler.disable()
+        profiler.dump_stats(path)
+        print("\n🔬 Top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+    else:
+        profiler.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+    print(f"🔬 Profile written to '{path}'")
+
+
+def print_metrics(report):
+    print(f"\n⏱️ {report['script']} stage timings ({report['wall_seconds']:.2f}s wall):")
+    for name, t in report["stages"].items():
+        calls = f" over {t['calls']} calls, max {t['max_seconds']:.3f}s" if t["calls"] > 1 else ""
+        print(f"{name}: {t['seconds']:.3f}s{calls}")
+    for name, value in report["counters"].items():
+        print(f"{name}: {value:,}")
+
+
+def finish_run():
+    # Stops the profiler, prints the stage table and writes the JSON metrics; returns the report
+    _stop_profiler()
+    report = metrics.snapshot()
+    print_metrics(report)
+    path = _run.get("metrics_json")
+    if path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📈 Metrics written to '{path}'")
+    return report
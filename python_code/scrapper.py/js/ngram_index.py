@@ -0,0 +1,163 @@
+import numpy as np
+
+# === Character N-gram Inverted Index ===
+# Maps every padded character n-gram of a list of titles to the titles that
+# contain it (CSR postings arrays). candidates() probes each query's rarest
+# n-grams, ranks the titles they point to by Dice overlap and returns a short
+# list per query, so the exact rapidfuzz scorer only sees a few titles instead
+# of the whole state block. Probing only the rarest n-grams keeps the work per
+# query proportional to a few short postings lists rather than the block size
+# ("tri", "ath" and friends appear in nearly every title).
+# N-grams are packed into int64 codes with numpy; there is no per-title Python
+# loop once the strings are in a fixed-width array.
+
+DEFAULT_N = 3
+DEFAULT_SHORTLIST = 50
+DEFAULT_PROBES = 8  # rarest n-grams looked up per query
+BUILD_CHUNK = 20000  # titles converted to a fixed-width array at once
+CHAR_BITS = 12  # bits per character id: up to 4095 distinct characters per index
+
+
+def _gram_pairs(texts, n, alphabet, grow=True):
+    # (row, packed n-gram code) for the distinct padded n-grams of each text, rows
+    # ascending. Characters are renumbered through `alphabet` (codepoint -> small
+    # id, extended in place when grow) so an n-gram and its row fit in one int64
+    # key. Characters missing from a fixed alphabet get id 0, which no indexed
+    # n-gram contains.
+    rows, grams = [], []
+    pad = " " * (n - 1)
+    for start in range(0, len(texts), BUILD_CHUNK):
+        padded = np.array([f"{pad}{t}{pad}" for t in texts[start:start + BUILD_CHUNK]])
+        width = padded.dtype.itemsize // 4
+        span = width - n + 1
+        if padded.size == 0 or span <= 0:
+            continue
+        codes = padded.view(np.uint32).reshape(len(padded), width)
+        lengths = np.char.str_len(padded)
+
+        present = np.flatnonzero(np.bincount(codes.ravel()))
+        if grow:
+            for ch in present[present > 0].tolist():
+                alphabet.setdefault(ch, len(alphabet) + 1)
+        table = np.zeros(int(present[-1]) + 1, dtype=np.int64)
+        table[present] = [alphabet.get(ch, 0) for ch in present.tolist()]
+        ids = table[codes]
+
+        packed = ids[:, :span].copy()
+        for k in range(1, n):
+            packed = (packed << CHAR_BITS) | ids[:, k:k + span]
+        valid = np.arange(span)[None, :] < (lengths - n + 1)[:, None]
+        chunk_rows, _ = np.nonzero(valid)
+        rows.append(chunk_rows + start)
+        grams.append(packed[valid])
+
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # one sort on (row, n-gram) keys drops repeated n-grams within a title
+    keys = (np.concatenate(rows) << (CHAR_BITS * n)) | np.concatenate(grams)
+    keys.sort()
+    keys, _ = _sorted_unique(keys)
+    return keys >> (CHAR_BITS * n), keys & ((1 << (CHAR_BITS * n)) - 1)
+
+
+class NgramIndex:
+    def __init__(self, texts, n=DEFAULT_N):
+        if not 1 <= n <= 3:
+            raise ValueError("n must be 1, 2 or 3 (n-grams and row numbers share one int64)")
+        texts = list(texts)
+        self.n = n
+        self.size = len(texts)
+        self.alphabet = {}
+        rows, grams = _gram_pairs(texts, n, self.alphabet)
+        if len(self.alphabet) >= 1 << CHAR_BITS:
+            raise ValueError(f"more than {(1 << CHAR_BITS) - 1} distinct characters")
+        # regroup the (row, n-gram) pairs by n-gram with one sort on packed keys
+        row_bits = max(1, (self.size - 1).bit_length())
+        keys = (grams << row_bits) | rows
+        keys.sort()
+        self.vocab, self.doc_freq = _sorted_unique(keys >> row_bits)  # sorted packed codes
+        self.postings = keys & ((1 << row_bits) - 1)  # title rows, grouped by n-gram
+        self.gram_counts = np.bincount(rows, minlength=self.size)  # n-gram set size per title
+        self.indptr = np.concatenate([[0], np.cumsum(self.doc_freq)])
+
+    def _query_grams(self, texts):
+        # (query row, n-gram id) pairs for n-grams the index knows, and each
+        # query's n-gram set size
+        rows, grams = _gram_pairs(texts, self.n, self.alphabet, grow=False)
+        sizes = np.bincount(rows, minlength=len(texts))
+        ids = np.searchsorted(self.vocab, grams)
+        known = ids < len(self.vocab)
+        known[known] = self.vocab[ids[known]] == grams[known]
+        return rows[known], ids[known], sizes
+
+    def candidates(self, texts, top=DEFAULT_SHORTLIST, probes=DEFAULT_PROBES):
+        # Returns (query row, title row, dice) arrays with up to `top` titles per
+        # query, best overlap first (ties: lower title row). Dice counts only the
+        # probed n-grams and is rounded to the precision left in the sort key.
+        # Queries sharing no n-gram with any title get no entries.
+        texts = list(texts)
+        empty = np.empty(0, dtype=np.int64)
+        if self.size == 0 or not texts:
+            return empty, empty, np.empty(0, dtype=np.float64)
+        query_rows, query_grams, query_sizes = self._query_grams(texts)
+
+        # keep each query's `probes` rarest n-grams
+        df = self.doc_freq[query_grams]
+        order = np.lexsort((query_grams, df, query_rows))
+        query_rows, query_grams, df = query_rows[order], query_grams[order], df[order]
+        keep = _rank_within(query_rows) < probes
+        query_rows, query_grams, lengths = query_rows[keep], query_grams[keep], df[keep]
+
+        total = int(lengths.sum())
+        if total == 0:
+            return empty, empty, np.empty(0, dtype=np.float64)
+        pair_query = np.repeat(query_rows, lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pair_title = self.postings[np.repeat(self.indptr[query_grams], lengths) + offsets]
+
+        keys = pair_query * self.size + pair_title
+        keys.sort()
+        keys, shared = _sorted_unique(keys)
+        q, t = np.divmod(keys, self.size)
+        dice = 2.0 * shared / (query_sizes[q] + self.gram_counts[t])
+
+        q, t, dice = _order_by_overlap(q, t, dice, len(texts), self.size)
+        keep = _rank_within(q) < top
+        return q[keep], t[keep], dice[keep]
+
+
+def _order_by_overlap(q, t, dice, n_queries, n_titles):
+    # Sorts pairs by query, then dice descending, then title. Packing all three
+    # into one int64 key (dice rounded to the bits left over) makes this a
+    # single sort instead of a three-key lexsort.
+    query_bits = max(1, (n_queries - 1).bit_length())
+    title_bits = max(1, (n_titles - 1).bit_length())
+    dice_bits = 63 - query_bits - title_bits
+    if dice_bits < 16:
+        order = np.lexsort((t, -dice, q))
+        return q[order], t[order], dice[order]
+    scale = (1 << dice_bits) - 1
+    keys = (q << (dice_bits + title_bits)) | (np.rint((1.0 - dice) * scale).astype(np.int64) << title_bits) | t
+    keys.sort()
+    q = keys >> (dice_bits + title_bits)
+    t = keys & ((1 << title_bits) - 1)
+    dice = 1.0 - ((keys >> title_bits) & scale) / scale
+    return q, t, dice
+
+
+def _sorted_unique(values):
+    # np.unique(values, return_counts=True) for an already sorted array; far
+    # cheaper than numpy's hash-based unique on millions of int64 keys
+    if len(values) == 0:
+        return values, np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(values[1:] != values[:-1]) + 1])
+    return values[starts], np.diff(np.concatenate([starts, [len(values)]]))
+
+
+def _rank_within(groups):
+    # 0, 1, 2, ... within each run of equal values in a sorted array
+    if len(groups) == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(groups)) + 1])
+    sizes = np.diff(np.concatenate([starts, [len(groups)]]))
+    return np.arange(len(groups)) - np.repeat(starts, sizes)
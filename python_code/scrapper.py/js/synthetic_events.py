@@ -0,0 +1,20 @@
+# === Synthetic Event Helpers ===
+# Title noise shared by the matcher benchmarks: the same event listed on another
+# platform with a small typo in its name.
+
+
+def typo(rng, text):
+    if len(text) < 4:
+        return text
+    i = rng.integers(1, len(text) - 1)
+    op = rng.integers(3)
+    if op == 0:  # drop a character
+        return text[:i] + text[i + 1:]
+    if op == 1:  # swap two characters
+        return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+    return text[:i] + chr(rng.integers(97, 123)) + text[i:]  # insert one
+
+
+def noisy_titles(rng, titles, typo_rate):
+    # One typo in each title with probability typo_rate
+    return [typo(rng, t) if rng.random() < typo_rate else t for t in titles]
@@ -0,0 +1,271 @@
+import datetime
+import functools
+import math
+import posixpath
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+# === Streaming Sheet Replacement for Existing .xlsx Workbooks ===
+# Rewrites whole worksheets inside an existing workbook without loading it into
+# openpyxl: every other zip part (pivot tables, pivot caches, styles, the other
+# sheets) is copied byte for byte, and each replaced sheet is streamed out row by
+# row as inline strings. Memory stays flat and the pivot sheets are untouched;
+# their caches still point at the sheet by name, so "Refresh All" picks up the
+# new data. Sheets that don't exist yet are appended to the workbook.
+# Replacing a sheet drops xl/calcChain.xml (Excel rebuilds it on open; a stale one
+# pointing at the old cells makes it report the file as needing repair). Workbooks
+# with defined names or print areas on a replaced sheet go through openpyxl, which
+# keeps those consistent, instead.
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORKSHEET_REL_TYPE = REL_NS + "/worksheet"
+WORKSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+CALC_CHAIN_PART = "xl/calcChain.xml"
+DATETIME_NUM_FMT = 22  # built-in "m/d/yy h:mm"
+
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+@functools.lru_cache(maxsize=None)
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_xml(ref, value, date_style):
+    if value is None or value is pd.NaT or value is pd.NA:
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            return ""
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        if isinstance(value, datetime.datetime):
+            delta = value.replace(tzinfo=None) - datetime.datetime(1899, 12, 30)
+        else:
+            delta = value - datetime.date(1899, 12, 30)
+        serial = delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+        return f'<c r="{ref}" s="{date_style}"><v>{serial!r}</v></c>'
+    text = _ILLEGAL_XML_CHARS.sub("", str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _row_xml(row_number, values, date_style):
+    cells = "".join(_cell_xml(f"{_column_letter(i)}{row_number}", v, date_style) for i, v in enumerate(values))
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+def _column_cells(series, letter, first_row, date_style):
+    # Serialize one column of a DataFrame chunk; dispatch on dtype once, not per cell
+    rows = range(first_row, first_row + len(series))
+    kind = series.dtype.kind
+    if kind == "b":
+        return [f'<c r="{letter}{r}" t="b"><v>{int(v)}</v></c>' for r, v in zip(rows, series.to_numpy())]
+    if kind in "iu":
+        return [f'<c r="{letter}{r}"><v>{v}</v></c>' for r, v in zip(rows, series.to_numpy().tolist())]
+    if kind == "f":
+        return [f'<c r="{letter}{r}"><v>{v!r}</v></c>' if math.isfinite(v) else ""
+                for r, v in zip(rows, series.to_numpy().tolist())]
+    if kind == "M":
+        serials = (series - pd.Timestamp(1899, 12, 30)) / pd.Timedelta(days=1)
+        return [f'<c r="{letter}{r}" s="{date_style}"><v>{v!r}</v></c>' if math.isfinite(v) else ""
+                for r, v in zip(rows, serials.to_numpy(dtype=float).tolist())]
+    return [_cell_xml(f"{letter}{r}", v, date_style) for r, v in zip(rows, series.to_numpy(dtype=object))]
+
+
+def _frame_rows_xml(df, first_row, date_style):
+    columns = [_column_cells(df.iloc[:, i], _column_letter(i), first_row, date_style) for i in range(df.shape[1])]
+    return "".join(f'<row r="{first_row + n}">{"".join(cells)}</row>' for n, cells in enumerate(zip(*columns)))
+
+
+def _write_sheet(out, part_name, header, rows, date_style, chunk_size=10000):
+    # rows is either a DataFrame (serialized column-wise in chunks) or an iterable of tuples
+    with out.open(_new_entry(part_name), "w", force_zip64=True) as f:
+        f.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                 f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheetData>').encode("utf-8"))
+        row_number = 0
+        if header is not None:
+            row_number += 1
+            f.write(_row_xml(row_number, header, date_style).encode("utf-8"))
+        if isinstance(rows, pd.DataFrame):
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows.iloc[start:start + chunk_size]
+                f.write(_frame_rows_xml(chunk, row_number + 1, date_style).encode("utf-8"))
+                row_number += len(chunk)
+        else:
+            for values in rows:
+                row_number += 1
+                f.write(_row_xml(row_number, values, date_style).encode("utf-8"))
+        f.write(b"</sheetData></worksheet>")
+
+
+def _new_entry(name, date_time=None):
+    info = zipfile.ZipInfo(name, date_time or datetime.datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _add_date_style(styles_xml):
+    # Appends one cellXfs entry with a date number format; returns (xml, style index)
+    match = re.search(r'<cellXfs count="(\d+)"', styles_xml)
+    count = int(match.group(1))
+    xf = f'<xf numFmtId="{DATETIME_NUM_FMT}" fontId="0" fillId="0" borderId="0" applyNumberFormat="1"/>'
+    styles_xml = styles_xml.replace(match.group(0), f'<cellXfs count="{count + 1}"', 1)
+    end = styles_xml.index("</cellXfs>", match.start())
+    styles_xml = styles_xml[:end] + xf + styles_xml[end:]
+    return styles_xml, count
+
+
+def _sheet_parts(workbook_xml, rels_xml):
+    # sheet name -> (r:id, part name inside the zip)
+    targets = {}
+    for rel in re.finditer(r"<Relationship\b[^>]*/>", rels_xml):
+        tag = rel.group(0)
+        rid = re.search(r'\bId="([^"]+)"', tag).group(1)
+        target = re.search(r'\bTarget="([^"]+)"', tag).group(1)
+        targets[rid] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    sheets = {}
+    for sheet in re.finditer(r"<sheet\b[^>]*/>", workbook_xml):
+        tag = sheet.group(0)
+        name = re.search(r'\bname="([^"]*)"', tag).group(1)
+        rid = re.search(r'\br:id="([^"]+)"', tag).group(1)
+        sheets[_unescape_attr(name)] = (rid, targets.get(rid))
+    return sheets
+
+
+def _unescape_attr(value):
+    return (value.replace("&quot;", '"').replace("&apos;", "'")
+            .replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&"))
+
+
+def _names_reference(workbook_xml, sheet_names):
+    # True when a defined name (named range, print area, filter) refers to one of the sheets
+    for match in re.finditer(r"<definedName\b[^>]*>(.*?)</definedName>", workbook_xml, re.S):
+        formula = _unescape_attr(match.group(1))
+        for name in sheet_names:
+            if f"{name}!" in formula or "'{}'!".format(name.replace("'", "''")) in formula:
+                return True
+    return False
+
+
+def _drop_calc_chain(rels_xml, content_types):
+    rels_xml = re.sub(r'<Relationship\b[^>]*\bTarget="/?(?:xl/)?calcChain\.xml"[^>]*/>', "", rels_xml)
+    content_types = re.sub(r'<Override\b[^>]*\bPartName="/xl/calcChain\.xml"[^>]*/>', "", content_types)
+    return rels_xml, content_types
+
+
+def _plain_value(value):
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _replace_sheets_openpyxl(input_path, output_path, sheets):
+    # Slow path: each sheet is recreated at its old position through openpyxl
+    from openpyxl import load_workbook
+
+    wb = load_workbook(input_path)
+    for name, (header, rows) in sheets.items():
+        index = None
+        if name in wb.sheetnames:
+            index = wb.sheetnames.index(name)
+            del wb[name]
+        ws = wb.create_sheet(name, index)
+        if header is not None:
+            ws.append(list(header))
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.itertuples(index=False)
+        for values in rows:
+            ws.append([_plain_value(v) for v in values])
+    wb.save(output_path)
+
+
+def replace_sheets(input_path, output_path, sheets):
+    # sheets: {sheet name: (header list or None, DataFrame or iterable of row tuples)}
+    with zipfile.ZipFile(input_path) as src:
+        names = src.namelist()
+        workbook_xml = src.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = src.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+        content_types = src.read("[Content_Types].xml").decode("utf-8")
+        styles_xml = src.read("xl/styles.xml").decode("utf-8")
+
+        existing = _sheet_parts(workbook_xml, rels_xml)
+        replaced = [name for name in sheets if name in existing and existing[name][1]]
+        if _names_reference(workbook_xml, replaced):
+            print("ℹ️ Defined names point into a replaced sheet; rewriting the workbook with openpyxl.")
+            return _replace_sheets_openpyxl(input_path, output_path, sheets)
+        dropped_parts = set()
+        if replaced and CALC_CHAIN_PART in names:
+            rels_xml, content_types = _drop_calc_chain(rels_xml, content_types)
+            dropped_parts.add(CALC_CHAIN_PART)
+        styles_xml, date_style = _add_date_style(styles_xml)
+
+        targets = {}
+        next_sheet_id = max([int(i) for i in re.findall(r'<sheet\b[^>]*\bsheetId="(\d+)"', workbook_xml)] or [0]) + 1
+        next_rid = max([int(i) for i in re.findall(r'\bId="rId(\d+)"', rels_xml)] or [0]) + 1
+        next_part = max([int(i) for i in re.findall(r"xl/worksheets/sheet(\d+)\.xml$", "\n".join(names), re.M)] or [0]) + 1
+        for name in sheets:
+            if name in existing and existing[name][1]:
+                targets[name] = existing[name][1]
+                continue
+            # New sheet: register it in the workbook, its rels and the content types
+            part = f"xl/worksheets/sheet{next_part}.xml"
+            rid = f"rId{next_rid}"
+            workbook_xml = workbook_xml.replace(
+                "</sheets>", f'<sheet name={quoteattr(name)} sheetId="{next_sheet_id}" r:id="{rid}"/></sheets>', 1
+            )
+            rels_xml = rels_xml.replace(
+                "</Relationships>",
+                f'<Relationship Id="{rid}" Type="{WORKSHEET_REL_TYPE}" '
+                f'Target="worksheets/sheet{next_part}.xml"/></Relationships>', 1
+            )
+            content_types = content_types.replace(
+                "</Types>",
+                f'<Override PartName="/{part}" ContentType="{WORKSHEET_CONTENT_TYPE}"/></Types>', 1
+            )
+            targets[name] = part
+            next_sheet_id, next_rid, next_part = next_sheet_id + 1, next_rid + 1, next_part + 1
+
+        replaced_parts = set(targets.values())
+        # the old sheets' own rels (hyperlinks etc.) no longer apply to the new data
+        dropped_parts |= {posixpath.join(posixpath.dirname(p), "_rels", posixpath.basename(p) + ".rels")
+                          for p in replaced_parts}
+        rewritten = {
+            "xl/workbook.xml": workbook_xml,
+            "xl/_rels/workbook.xml.rels": rels_xml,
+            "[Content_Types].xml": content_types,
+            "xl/styles.xml": styles_xml,
+        }
+
+        with zipfile.ZipFile(output_path, "w") as out:
+            for info in src.infolist():
+                if info.filename in replaced_parts or info.filename in dropped_parts:
+                    continue
+                entry = _new_entry(info.filename, info.date_time)
+                if info.filename in rewritten:
+                    out.writestr(entry, rewritten[info.filename].encode("utf-8"))
+                    continue
+                with src.open(info) as data, out.open(entry, "w", force_zip64=True) as dest:
+                    while True:
+                        chunk = data.read(1 << 20)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+            for name, (header, rows) in sheets.items():
+                _write_sheet(out, targets[name], header, rows, date_style)
@@ -0,0 +1,66 @@
+import argparse
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# === Local Stand-In for trifind.com ===
+# Serves a saved state page (trifind_co_raw.html by default) as page 1 of every
+# state and an empty page after that, so the scraper's concurrent fetch mode can
+# be exercised without touching the real site:
+#   python stand_in_server.py --port 8765
+#   python trifind_scraper.py --base-url http://127.0.0.1:8765/ --states co tx
+
+DEFAULT_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trifind_co_raw.html")
+EMPTY_PAGE = b"<html><body><p>No events found.</p></body></html>"
+
+
+def make_handler(html_bytes, pages_per_state=1):
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            body = html_bytes if page <= pages_per_state else EMPTY_PAGE
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start_server(html_path=DEFAULT_HTML, port=0, pages_per_state=1):
+    # Starts in a background thread; port=0 picks a free port.
+    with open(html_path, "rb") as f:
+        html_bytes = f.read()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(html_bytes, pages_per_state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved Trifind HTML as a local stand-in site.")
+    parser.add_argument("--html", default=DEFAULT_HTML)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages-per-state", type=int, default=1)
+    args = parser.parse_args()
+
+    server = start_server(args.html, args.port, args.pages_per_state)
+    print(f"✅ Serving {args.html} at http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,33 @@
+import os
+
+from http_cache import HttpCache
+
+# === HTTP Cache Round-Trip Check ===
+# A cached body must come back exactly as it was fetched: trifind pages are CRLF,
+# and a newline-translated copy parses to different events than the live page.
+#   python -m pytest -q test_http_cache.py
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RAW_PAGE = os.path.join(HERE, "trifind_co_raw.html")
+URL = "https://www.trifind.com/co?page=1"
+
+
+def test_stored_body_reloads_byte_identical(tmp_path):
+    with open(RAW_PAGE, "rb") as f:
+        raw = f.read()
+    body = raw.decode("utf-8")
+    assert "\r\n" in body  # the fixture is the page as fetched, CRLF line endings
+
+    cache = HttpCache(str(tmp_path), mode="replay")
+    cache.store(URL, body, etag='"abc"')
+    meta, cached = cache.load(URL)
+    assert meta["etag"] == '"abc"'
+    assert cached == body
+    assert cache.get(URL, send=None).content == raw
+
+
+def test_import_snapshot_keeps_line_endings(tmp_path):
+    cache = HttpCache(str(tmp_path), mode="replay")
+    cache.import_snapshot(URL, RAW_PAGE)
+    with open(RAW_PAGE, "rb") as f:
+        assert cache.get(URL, send=None).content == f.read()
@@ -0,0 +1,39 @@
+import glob
+import os
+
+import pytest
+
+from trifind_parser import BACKENDS, get_parser, lxml, parse_events_bs4
+
+# === Trifind Parser Backend Equivalence ===
+# Every backend must return the same event dicts as the original bs4 code on the
+# saved Trifind pages, read raw (CRLF line endings, as requests returns them).
+#   python -m pytest -q test_trifind_parser.py
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RAW_PAGES = [os.path.join(HERE, "trifind_co_raw.html")] + sorted(
+    glob.glob(os.path.join(HERE, "js", "output", "html", "trifind_*_raw.html"))
+)
+OTHER_BACKENDS = [b for b in BACKENDS if b != "bs4" and (b != "lxml" or lxml is not None)]
+
+
+def read_raw(path):
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+@pytest.mark.parametrize("backend", OTHER_BACKENDS)
+@pytest.mark.parametrize("path", RAW_PAGES, ids=os.path.basename)
+def test_backend_matches_bs4_on_raw_page(path, backend):
+    html = read_raw(path)
+    assert "\r\n" in html
+    expected = parse_events_bs4(html, "co")
+    assert expected
+    assert get_parser(backend)(html, "co") == expected
+
+
+@pytest.mark.parametrize("backend", ["bs4"] + OTHER_BACKENDS)
+def test_line_endings_do_not_change_events(backend):
+    html = read_raw(RAW_PAGES[0])
+    parse = get_parser(backend)
+    assert parse(html, "co") == parse(html.replace("\r\n", "\n"), "co")
@@ -0,0 +1,177 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional; the bs4 backends still work without it
+    lxml = None
+
+# === Trifind Panel Parsers ===
+# Every backend turns one Trifind state page into the same list of event dicts:
+#   "bs4"      – full BeautifulSoup tree with html.parser (the original code)
+#   "strained" – html.parser, but only the "panel panel-info clearfix" divs are built
+#   "lxml"     – lxml tree + XPath, no BeautifulSoup objects at all (fastest)
+#   "auto"     – lxml when installed, else strained
+# Pages arrive with CRLF line endings; every backend first normalizes them to LF
+# the way an HTML parser's input stream does (lxml already does this internally,
+# html.parser does not, so without it bs4 text fields would keep the "\r").
+# test_trifind_parser.py and bench_trifind_parser.py check the backends against
+# each other on the saved pages, read raw as fetched.
+
+PANEL_CLASS = "panel panel-info clearfix"
+USAT_LOGO_SRC = "/images/usat-logo.png"
+BACKENDS = ("auto", "bs4", "strained", "lxml")
+
+_PANEL_MARKER = re.compile(r"""<div\b[^>]*\bclass\s*=\s*["']\s*panel\s+panel-info\s+clearfix\s*["']""", re.I)
+
+
+def normalize_newlines(html):
+    return html.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def has_panels(html):
+    # Cheap pre-check so pagination can move on before the page is fully parsed
+    return _PANEL_MARKER.search(html) is not None
+
+
+def new_event(state):
+    return {
+        "state": state.upper(),
+        "title": None,
+        "url": None,
+        "date": None,
+        "location": None,
+        "race_types": [],
+        "usat_sanctioned": "No",
+    }
+
+
+# --- BeautifulSoup backends ---
+
+def _event_from_soup_panel(panel, state):
+    event = new_event(state)
+
+    # Event title and link
+    a_tag = panel.find("a", href=True, title=True)
+    if a_tag:
+        event["title"] = a_tag.get_text(strip=True)
+        event["url"] = a_tag["href"]
+
+    # Event date
+    date_div = panel.select_one(".panel-heading .text-md-right")
+    if date_div:
+        event["date"] = date_div.get_text(strip=True)
+
+    # location
+    loc_span = panel.find("span", class_="location-text")
+    if loc_span:
+        event["location"] = loc_span.get_text(strip=True)
+
+    # Race types
+    table = panel.find("table")
+    if table:
+        rows = table.find_all("tr")
+        for i in range(0, len(rows), 2):
+            try:
+                race_type = rows[i].get_text(strip=True)
+                description = rows[i+1].get_text(strip=True)
+                event["race_types"].append(f"{race_type} - {description}")
+            except IndexError:
+                continue
+
+    # USAT Sanctioning check
+    usat_logo = panel.find("img", {"src": USAT_LOGO_SRC})
+    event["usat_sanctioned"] = "Yes" if usat_logo else "No"
+
+    return event
+
+
+def parse_events_bs4(html, state):
+    soup = BeautifulSoup(normalize_newlines(html), "html.parser")
+    panels = soup.find_all("div", class_=PANEL_CLASS)
+    return [_event_from_soup_panel(panel, state) for panel in panels]
+
+
+def parse_events_strained(html, state):
+    soup = BeautifulSoup(normalize_newlines(html), "html.parser", parse_only=SoupStrainer("div", class_=PANEL_CLASS))
+    panels = soup.find_all("div", class_=PANEL_CLASS)
+    return [_event_from_soup_panel(panel, state) for panel in panels]
+
+
+# --- lxml backend ---
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_PANELS_XPATH = f"//div[normalize-space(@class)='{PANEL_CLASS}']"
+_TITLE_XPATH = ".//a[@href and @title]"
+_DATE_XPATH = f".//*[{_has_class('panel-heading')}]//*[{_has_class('text-md-right')}]"
+_LOCATION_XPATH = f".//span[{_has_class('location-text')}]"
+_LOGO_XPATH = f".//img[@src='{USAT_LOGO_SRC}']"
+
+
+def _text(el):
+    # Same result as bs4's get_text(strip=True): every text node stripped, empties dropped
+    return "".join(s.strip() for s in el.xpath(".//text()") if s.strip())
+
+
+def _first(el, xpath):
+    found = el.xpath(xpath)
+    return found[0] if found else None
+
+
+def parse_events_lxml(html, state):
+    if lxml is None:
+        raise ImportError("The 'lxml' parser backend needs lxml installed (pip install lxml)")
+    if not html.strip():
+        return []
+    root = lxml.html.fromstring(normalize_newlines(html))
+
+    events = []
+    for panel in root.xpath(_PANELS_XPATH):
+        event = new_event(state)
+
+        a_tag = _first(panel, _TITLE_XPATH)
+        if a_tag is not None:
+            event["title"] = _text(a_tag)
+            event["url"] = a_tag.get("href")
+
+        date_div = _first(panel, _DATE_XPATH)
+        if date_div is not None:
+            event["date"] = _text(date_div)
+
+        loc_span = _first(panel, _LOCATION_XPATH)
+        if loc_span is not None:
+            event["location"] = _text(loc_span)
+
+        table = _first(panel, ".//table")
+        if table is not None:
+            rows = table.xpath(".//tr")
+            for i in range(0, len(rows) - 1, 2):
+                event["race_types"].append(f"{_text(rows[i])} - {_text(rows[i+1])}")
+
+        event["usat_sanctioned"] = "Yes" if panel.xpath(_LOGO_XPATH) else "No"
+        events.append(event)
+
+    return events
+
+
+_PARSERS = {
+    "bs4": parse_events_bs4,
+    "strained": parse_events_strained,
+    "lxml": parse_events_lxml,
+}
+
+
+def get_parser(backend="auto"):
+    if backend == "auto":
+        backend = "lxml" if lxml is not None else "strained"
+    if backend not in _PARSERS:
+        raise ValueError(f"Unknown parser backend '{backend}', expected one of {BACKENDS}")
+    return _PARSERS[backend]
+
+
+def parse_events(html, state, backend="auto"):
+    return get_parser(backend)(html, state)
@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from js.metrics import metrics
+from trifind_parser import has_panels, parse_events
+
+# === Fetch → Parse → Write Pipeline ===
+# fetch : thread pool, one state per task, pushes (state, page, html) onto a bounded
+#         page queue. Pagination only needs the cheap has_panels() check, so the
+#         next request goes out while the previous page is still being parsed.
+# parse : a dispatcher thread feeds pages to a process pool and pushes the parsed
+#         events onto a bounded event queue (so all cores are used for parsing).
+# write : the calling thread drains the event queue, records each page in the
+#         optional checkpoint store and hands its events to on_events(). Without
+#         on_events the events are collected and returned in state/page order.
+# Full queues block the stage upstream of them, which keeps memory bounded.
+# A page without panels ends a state's pagination (the same has_panels() rule the
+# serial scraper uses). If parsing or writing fails, fetchers stop at their next
+# page and the queues are drained so no stage is left blocked on a full queue.
+
+DEFAULT_PAGE_QUEUE = 32
+DEFAULT_EVENT_QUEUE = 32
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.bytes = 0
+        self.max_queue = 0
+        self._lock = threading.Lock()
+
+    def add(self, busy, items=1, nbytes=0):
+        with self._lock:
+            self.items += items
+            self.busy += busy
+            self.bytes += nbytes
+
+    def saw_queue(self, q):
+        self.max_queue = max(self.max_queue, q.qsize())
+
+
+def _parse_page(html, state, backend):
+    start = time.perf_counter()
+    events = parse_events(html, state, backend)
+    return events, time.perf_counter() - start
+
+
+def _fetch_state(state, fetcher, base_url, page_queue, event_queue, stats, checkpoint=None, stop=None):
+    if checkpoint is not None and checkpoint.state_complete(state):
+        print(f"⏭️ {state} already complete in this crawl, skipping.")
+        return
+
+    page = 1
+    while stop is None or not stop.is_set():
+        if checkpoint is not None and checkpoint.is_done(state, page):
+            checkpoint.page_skipped()
+            page += 1
+            continue
+
+        url = f"{base_url}{state}?page={page}"
+        print(f"Scraping: {url}")
+        start = time.perf_counter()
+        response = fetcher.get(url)
+        html = response.text
+        stats.add(time.perf_counter() - start, nbytes=len(html.encode("utf-8")))
+
+        if response.status_code != 200:
+            print(f"❌ Failed on page {page} for {state}")
+            break
+        if not has_panels(html):
+            print(f"✅ No more panels on page {page}. Ending pagination.")
+            if checkpoint is not None:
+                checkpoint.state_finished(state, page - 1)
+            break
+
+        reused = checkpoint.page_fetched(state, page, html) if checkpoint is not None else None
+        if reused is not None:
+            # unchanged since the last crawl: skip the parse stage entirely
+            event_queue.put((state, page, reused))
+        else:
+            page_queue.put((state, page, html))
+            stats.saw_queue(page_queue)
+        page += 1
+
+
+def _dispatch_parsing(page_queue, event_queue, pool, backend, max_in_flight, stats, errors, stop):
+    in_flight = deque()
+    fetched_all = False
+
+    def finish_oldest():
+        state, page, future = in_flight.popleft()
+        events, elapsed = future.result()
+        stats.add(elapsed)
+        metrics.add_time("parse_page", elapsed)  # measured in the parser process
+        event_queue.put((state, page, events))
+        stats.saw_queue(event_queue)
+
+    try:
+        while True:
+            item = page_queue.get()
+            if item is _DONE:
+                fetched_all = True
+                break
+            if stop.is_set():
+                continue  # the write stage failed; just keep the page queue moving
+            state, page, html = item
+            in_flight.append((state, page, pool.submit(_parse_page, html, state, backend)))
+            if len(in_flight) >= max_in_flight:
+                finish_oldest()
+        while in_flight:
+            finish_oldest()
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+        # keep draining so fetchers blocked on a full page queue can finish
+        while not fetched_all:
+            fetched_all = page_queue.get() is _DONE
+    finally:
+        event_queue.put(_DONE)
+
+
+def _parse_context():
+    # Parse workers start lazily from the dispatcher thread while fetch threads hold
+    # sessions and locks; forking that process could copy a held lock into a worker,
+    # so they are started from a clean process instead
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def run_pipeline(states, fetcher, base_url, fetch_workers=4, parse_workers=None,
+                 parser_backend="auto", page_queue_size=DEFAULT_PAGE_QUEUE,
+                 event_queue_size=DEFAULT_EVENT_QUEUE, on_events=None, checkpoint=None):
+    page_queue = queue.Queue(maxsize=max(1, page_queue_size))
+    event_queue = queue.Queue(maxsize=max(1, event_queue_size))
+    fetch_stats, parse_stats, write_stats = StageStats("fetch"), StageStats("parse"), StageStats("write")
+    errors = []
+    stop = threading.Event()
+
+    def fetch_all():
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as fetch_pool:
+                futures = [fetch_pool.submit(_fetch_state, s, fetcher, base_url, page_queue,
+                                             event_queue, fetch_stats, checkpoint, stop)
+                           for s in states]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(e)
+        finally:
+            page_queue.put(_DONE)
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=_parse_context()) as parse_pool:
+        max_in_flight = 2 * parse_workers
+        fetch_thread = threading.Thread(target=fetch_all, daemon=True)
+        parse_thread = threading.Thread(
+            target=_dispatch_parsing,
+            args=(page_queue, event_queue, parse_pool, parser_backend, max_in_flight, parse_stats, errors, stop),
+            daemon=True,
+        )
+        fetch_thread.start()
+        parse_thread.start()
+
+        by_page = {}
+        written_all = False
+        try:
+            while True:
+                item = event_queue.get()
+                if item is _DONE:
+                    written_all = True
+                    break
+                state, page, events = item
+                start = time.perf_counter()
+                if checkpoint is not None:
+                    checkpoint.page_parsed(state, page, events)
+                if on_events is not None:
+                    on_events(state, page, events)
+                else:
+                    by_page[(state, page)] = events
+                write_stats.add(time.perf_counter() - start, items=len(events))
+                metrics.add_time("write", time.perf_counter() - start)
+        finally:
+            if not written_all:
+                # the write stage failed: stop the fetchers and drain until the
+                # parse stage is done so nothing stays blocked on the event queue
+                stop.set()
+                while event_queue.get() is not _DONE:
+                    pass
+            fetch_thread.join()
+            parse_thread.join()
+    wall = time.perf_counter() - wall_start
+
+    if errors:
+        raise errors[0]
+
+    order = {state: i for i, state in enumerate(states)}
+    all_events = [event for key in sorted(by_page, key=lambda k: (order[k[0]], k[1]))
+                  for event in by_page[key]]
+    report = {
+        "wall_seconds": wall,
+        "stages": [fetch_stats, parse_stats, write_stats],
+        "page_queue_size": page_queue_size,
+        "event_queue_size": event_queue_size,
+    }
+    return all_events, report
+
+
+def print_report(report):
+    wall = report["wall_seconds"]
+    fetch, parse, write = report["stages"]
+    print("\n⏱️ Pipeline Throughput:")
+    print(f"fetch: {fetch.items} pages, {fetch.bytes / 1e6:.2f} MB, "
+          f"{fetch.items / wall if wall else 0:.1f} pages/s, "
+          f"queue peak {fetch.max_queue}/{report['page_queue_size']}")
+    print(f"parse: {parse.items} pages, {parse.busy:.2f}s CPU, "
+          f"{parse.items / parse.busy if parse.busy else 0:.1f} pages/s per worker, "
+          f"queue peak {parse.max_queue}/{report['event_queue_size']}")
+    print(f"write: {write.items} events, {write.items / wall if wall else 0:.1f} events/s")
+    print(f"total: {wall:.2f}s wall")
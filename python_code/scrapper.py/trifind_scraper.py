@@ -1,7 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from crawl_checkpoints import DEFAULT_CHECKPOINT_DB, CheckpointStore
+from event_sink import EventSink
+from fetcher import DEFAULT_PER_HOST, DEFAULT_RATE, Fetcher
+from http_cache import CACHE_MODES, DEFAULT_CACHE_DIR, DEFAULT_TTL, HttpCache
+from js.metrics import add_metrics_args, finish_run, metrics, start_run
+from trifind_parser import BACKENDS, get_parser, has_panels
+from trifind_pipeline import DEFAULT_EVENT_QUEUE, DEFAULT_PAGE_QUEUE, print_report, run_pipeline
 
 BASE_URL = "https://www.trifind.com/"
 # US state abbreviations
@@ -14,120 +20,145 @@ states = [
 ]
 
 # states = ['co', 'tx', 'ca']  # You can extend this to all states
-all_events = []
 
-def scrape_state_paginated(state):
+# === Concurrency Settings ===
+MAX_WORKERS = 4  # states crawled in parallel (1 = one state at a time)
+PER_HOST_LIMIT = DEFAULT_PER_HOST  # open requests per host
+REQUESTS_PER_SECOND = DEFAULT_RATE  # global politeness budget, same as the old sleep(1)
+
+
+def scrape_state_paginated(state, fetcher, base_url=BASE_URL, parser_backend="auto", checkpoint=None,
+                           on_events=None):
+    parse_events = get_parser(parser_backend)
+    state_events = []
+    if checkpoint is not None and checkpoint.state_complete(state):
+        print(f"⏭️ {state} already complete in this crawl, skipping.")
+        return state_events
+
     page = 1
     while True:
-        url = f"{BASE_URL}{state}?page={page}"
+        if checkpoint is not None and checkpoint.is_done(state, page):
+            checkpoint.page_skipped()
+            page += 1
+            continue
+
+        url = f"{base_url}{state}?page={page}"
         print(f"Scraping: {url}")
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        response = fetcher.get(url)
 
         if response.status_code != 200:
             print(f"❌ Failed on page {page} for {state}")
             break
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        panels = soup.find_all("div", class_="panel panel-info clearfix")
-
-        if not panels:
+        # same end-of-pagination rule as the pipeline (trifind_pipeline.py)
+        if not has_panels(response.text):
             print(f"✅ No more panels on page {page}. Ending pagination.")
+            if checkpoint is not None:
+                checkpoint.state_finished(state, page - 1)
             break
 
-        for panel in panels:
-            event = {
-                "state": state.upper(),
-                "title": None,
-                "url": None,
-                "date": None,
-                "location": None,
-                "race_types": [],
-                "usat_sanctioned": "No",
-            }
-
-            # Event title and link
-            a_tag = panel.find("a", href=True, title=True)
-            if a_tag:
-                event["title"] = a_tag.get_text(strip=True)
-                event["url"] = a_tag["href"]
-
-            # Event date
-            date_div = panel.select_one(".panel-heading .text-md-right")
-            if date_div:
-                event["date"] = date_div.get_text(strip=True)
-
-            # location
-            loc_span = panel.find("span", class_="location-text")
-            if loc_span:
-                event["location"] = loc_span.get_text(strip=True)
-
-            # Race types
-            table = panel.find("table")
-            if table:
-                rows = table.find_all("tr")
-                for i in range(0, len(rows), 2):
-                    try:
-                        race_type = rows[i].get_text(strip=True)
-                        description = rows[i+1].get_text(strip=True)
-                        event["race_types"].append(f"{race_type} - {description}")
-                    except IndexError:
-                        continue
-
-            # USAT Sanctioning check
-            usat_logo = panel.find("img", {"src": "/images/usat-logo.png"})
-            event["usat_sanctioned"] = "Yes" if usat_logo else "No"
-
-            all_events.append(event)
-
+        reused = checkpoint.page_fetched(state, page, response.text) if checkpoint is not None else None
+        if reused is not None:
+            events = reused
+        else:
+            with metrics.stage("parse_page"):
+                events = parse_events(response.text, state)
+
+        if checkpoint is not None:
+            checkpoint.page_parsed(state, page, events)
+        if on_events is not None:
+            on_events(state, page, events)
+        else:
+            state_events.extend(events)
         page += 1
-        time.sleep(1)  # Be polite
-
-# Scrape the desired states
-for state in states:
-    scrape_state_paginated(state)
-
-# Output to CSV
-df = pd.DataFrame(all_events)
-df["race_types"] = df["race_types"].apply(lambda x: "; ".join(x))
-df.to_csv("trifind_paginated_events.csv", index=False)
-
-# Create pivot table with USAT Sanctioning breakdown
-pivot = df.pivot_table(index="state", columns="usat_sanctioned", aggfunc="size", fill_value=0)
-
-# Add total column
-pivot["Total_Events"] = pivot.sum(axis=1)
-
-# Add a grand total row
-total_row = pd.DataFrame(pivot.sum(axis=0)).T
-total_row.index = ["ALL_STATES"]
-pivot = pd.concat([pivot, total_row])
-
-# Reset index for Excel export
-pivot.reset_index(inplace=True)
-
-# Output DataFrame and Pivot Table to Excel
-with pd.ExcelWriter("trifind_paginated_events.xlsx", engine="xlsxwriter") as writer:
-    df.to_excel(writer, sheet_name="All Events", index=False)
-    pivot.to_excel(writer, sheet_name="Pivot by USAT", index=False)
-
-# Console summary
-total_events = len(df)
-event_counts = df['state'].value_counts().head(5)
-
-total_sanctioned = df[df['usat_sanctioned'] == 'Yes'].shape[0]
-total_not_sanctioned = df[df['usat_sanctioned'] == 'No'].shape[0]
-
-print("\n📊 Summary:")
-print(f"🔢 Total Events Scraped: {total_events}\n")
-
-print("🏆 Top 5 States by Total Events:")
-for state, count in event_counts.items():
-    sanctioned = df[(df['state'] == state) & (df['usat_sanctioned'] == 'Yes')].shape[0]
-    not_sanctioned = df[(df['state'] == state) & (df['usat_sanctioned'] == 'No')].shape[0]
-    print(f"{state}: {count} total — 🟢 USAT: {sanctioned}, 🔴 Non-USAT: {not_sanctioned}")
-
-print(f"\n📈 Overall Breakdown:\n🟢 USAT Sanctioned: {total_sanctioned}\n🔴 Non-USAT: {total_not_sanctioned}")
-
-print(f"\n✅ Scraped {len(df)} events across {len(states)} state(s).")
-print("📁 Saved to 'trifind_paginated_events.xlsx'")
 
+    return state_events
+
+
+def scrape_states(states, fetcher, base_url=BASE_URL, max_workers=MAX_WORKERS, parser_backend="auto",
+                  checkpoint=None, on_events=None):
+    # States run in parallel; results are merged back in `states` order (empty when streaming)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        per_state = pool.map(
+            lambda s: scrape_state_paginated(s, fetcher, base_url, parser_backend, checkpoint, on_events),
+            states,
+        )
+        return [event for state_events in per_state for event in state_events]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Trifind events state by state.")
+    parser.add_argument("--states", nargs="+", default=states)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT)
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="global requests per second (0 = unlimited)")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="parser processes (default: all cores, 0 = parse inline on fetch threads)")
+    parser.add_argument("--page-queue", type=int, default=DEFAULT_PAGE_QUEUE,
+                        help="max fetched pages waiting to be parsed")
+    parser.add_argument("--event-queue", type=int, default=DEFAULT_EVENT_QUEUE,
+                        help="max parsed pages waiting to be written")
+    parser.add_argument("--parser", choices=BACKENDS, default="auto",
+                        help="HTML parsing backend (see trifind_parser.py)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also stream events to trifind_paginated_events.parquet (needs pyarrow)")
+    parser.add_argument("--batch-size", type=int, default=500, help="events buffered per sink write")
+    parser.add_argument("--checkpoint-db", default=DEFAULT_CHECKPOINT_DB)
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last unfinished crawl, skipping completed state/pages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-parse only pages whose content changed since the last crawl")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="cache",
+                        help="'replay' serves only from the on-disk cache, no network")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="cache freshness in seconds")
+    add_metrics_args(parser)
+    args = parser.parse_args()
+    start_run("trifind_scraper", args)
+
+    cache = HttpCache(args.cache_dir, ttl=args.ttl, mode=args.cache_mode)
+    checkpoint = CheckpointStore(args.checkpoint_db, resume=args.resume, incremental=args.incremental)
+
+    sink = EventSink(
+        "trifind_paginated_events.csv",
+        xlsx_path="trifind_paginated_events.xlsx",
+        parquet_path="trifind_paginated_events.parquet" if args.parquet else None,
+        batch_size=args.batch_size,
+    )
+
+    # Pages already completed in a resumed crawl go straight to the sink
+    for _, _, events in checkpoint.iter_page_events(args.states):
+        sink.add(events)
+
+    def on_events(state, page, events):
+        sink.add(events)
+
+    # Scrape the desired states
+    with metrics.stage("crawl"), sink, Fetcher(per_host=args.per_host, rate=args.rate, cache=cache) as fetcher:
+        if args.parse_workers == 0:
+            scrape_states(args.states, fetcher, args.base_url, args.workers, args.parser,
+                          checkpoint, on_events)
+        else:
+            _, report = run_pipeline(
+                args.states, fetcher, args.base_url,
+                fetch_workers=args.workers,
+                parse_workers=args.parse_workers,
+                parser_backend=args.parser,
+                page_queue_size=args.page_queue,
+                event_queue_size=args.event_queue,
+                on_events=on_events,
+                checkpoint=checkpoint,
+            )
+            print_report(report)
+
+    print(checkpoint.summary())
+    if all(checkpoint.state_complete(s) for s in args.states):
+        checkpoint.finish()
+    else:
+        print("⚠️ Some states did not finish; re-run with --resume to continue this crawl.")
+    checkpoint.close()
+
+    sink.print_summary(len(args.states))
+    finish_run()
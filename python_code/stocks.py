@@ -1,7 +1,22 @@
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
 
+# === Portfolio P&L ===
+# Loads positions (Account, Symbol, Description, Asset Class, Market Value,
+# Cost Basis) from any number of CSV or Parquet files and computes gain/loss
+# per position, account, asset class and for the whole portfolio. Positions are
+# aggregated once, by (Account, Asset Class); the account, asset-class and total
+# rows are sums of that small table, and every Gain/Loss % is derived from the
+# summed dollars, never averaged. All values stay numeric: $ and % formatting
+# happens only in format_table() when printing.
+#   python stocks.py                      the built-in holdings below
+#   python stocks.py positions/*.parquet  one or more position files
+
 # Define the data
-data = [
+HOLDINGS = [
     {"Symbol": "GS", "Description": "GOLDMAN SACHS GROUP INC", "Asset Class": "Equity", "Market Value": 4908.16, "Cost Basis": 4918.00},
     {"Symbol": "MTN", "Description": "VAIL RESORTS INC", "Asset Class": "Equity", "Market Value": 4981.76, "Cost Basis": 4835.84},
     {"Symbol": "SGOL", "Description": "ABRDN PHYSICAL GOLD SHARES ETF", "Asset Class": "Commodity ETF", "Market Value": 9937.75, "Cost Basis": 9897.06},
@@ -10,43 +25,94 @@ data = [
     {"Symbol": "06405VJH3", "Description": "BANK OF NEW YORK, 4.25% CD DUE 06/10/26", "Asset Class": "Fixed Income", "Market Value": 10000.00, "Cost Basis": 10000.00},
     {"Symbol": "588493SE7", "Description": "MERCHANTS BANK, 4.35% CD DUE 09/15/25", "Asset Class": "Fixed Income", "Market Value": 10000.48, "Cost Basis": 10000.00},
 ]
+DEFAULT_ACCOUNT = "Portfolio"
+LABEL_COLUMNS = ["Account", "Symbol", "Description", "Asset Class"]
+VALUE_COLUMNS = ["Market Value", "Cost Basis"]
+PNL_COLUMNS = ["Market Value", "Cost Basis", "Gain/Loss $", "Gain/Loss %"]
+
+
+def _read_positions(path):
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def load_positions(paths=None):
+    # Positions from CSV/Parquet files (or the built-in holdings), one dtype per column:
+    # Account and Asset Class categorical, values float64 ("$1,234.50" strings are parsed)
+    frames = [_read_positions(path) for path in paths] if paths else [pd.DataFrame(HOLDINGS)]
+    positions = pd.concat(frames, ignore_index=True)
+    missing = [column for column in VALUE_COLUMNS + ["Symbol", "Asset Class"] if column not in positions]
+    if missing:
+        raise ValueError(f"Position files are missing columns: {missing}")
+    # files without an Account column (or rows without a value) belong to the default account
+    positions["Account"] = positions["Account"].fillna(DEFAULT_ACCOUNT) if "Account" in positions else DEFAULT_ACCOUNT
+    positions["Description"] = positions["Description"].fillna("") if "Description" in positions else ""
+    for column in VALUE_COLUMNS:
+        if not pd.api.types.is_numeric_dtype(positions[column]):
+            positions[column] = pd.to_numeric(positions[column].astype("string").str.replace(r"[$,\s]", "", regex=True))
+    return positions.astype({"Account": "category", "Asset Class": "category", "Symbol": "string",
+                             "Description": "string", "Market Value": "float64", "Cost Basis": "float64"})[
+        LABEL_COLUMNS + VALUE_COLUMNS]
+
+
+def _with_pnl(frame):
+    # Adds numeric Gain/Loss $ and Gain/Loss % (of cost; NaN when there is no cost basis)
+    frame["Gain/Loss $"] = frame["Market Value"] - frame["Cost Basis"]
+    frame["Gain/Loss %"] = frame["Gain/Loss $"] / frame["Cost Basis"].where(frame["Cost Basis"] != 0) * 100
+    return frame
+
+
+def portfolio_pnl(positions):
+    # {"positions", "accounts", "asset_classes", "account_asset_classes", "total"}, all numeric.
+    # Positions without an Asset Class keep a null group, so every total still adds up to the positions
+    by_account_class = (positions.groupby(["Account", "Asset Class"], observed=True, dropna=False)[VALUE_COLUMNS]
+                        .sum())
+    total = by_account_class.sum().to_frame("Total").T
+    return {
+        "positions": _with_pnl(positions.copy()),
+        "account_asset_classes": _with_pnl(by_account_class),
+        "accounts": _with_pnl(by_account_class.groupby(level="Account", observed=True, dropna=False).sum()),
+        "asset_classes": _with_pnl(
+            by_account_class.groupby(level="Asset Class", observed=True, dropna=False).sum()),
+        "total": _with_pnl(total).iloc[0],
+    }
+
+
+def format_table(frame):
+    # Presentation only: a string rendering with $ and % formats, the frame is untouched
+    money = "${:,.2f}".format
+    formatters = {column: money for column in ["Market Value", "Cost Basis", "Gain/Loss $"] if column in frame}
+    if "Gain/Loss %" in frame:
+        formatters["Gain/Loss %"] = lambda value: "n/a" if np.isnan(value) else f"{value:.2f}%"
+    return frame.to_string(formatters=formatters)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gain/loss by position, account and asset class.")
+    parser.add_argument("paths", nargs="*", help="position CSV/Parquet files (default: the built-in holdings)")
+    parser.add_argument("--max-rows", type=int, default=25, help="largest positions/accounts to list")
+    args = parser.parse_args()
+
+    pnl = portfolio_pnl(load_positions(args.paths))
+    positions, accounts = pnl["positions"], pnl["accounts"]
+
+    # Print individual holdings (the largest ones when there are many)
+    shown = positions.nlargest(args.max_rows, "Market Value") if len(positions) > args.max_rows else positions
+    print(f"\n📊 Individual Holdings ({len(shown):,} of {len(positions):,}):\n")
+    columns = (["Account"] if len(accounts) > 1 else []) + ["Symbol", "Description", "Asset Class"] + PNL_COLUMNS
+    print(format_table(shown[columns]))
+
+    total = pnl["total"]
+    print("\n📈 Total Portfolio Stats:")
+    print(f"Total Cost Basis:     ${total['Cost Basis']:,.2f}")
+    print(f"Total Market Value:   ${total['Market Value']:,.2f}")
+    print(f"Total Gain/Loss:      ${total['Gain/Loss $']:,.2f} ({total['Gain/Loss %']:.2f}%)")
+
+    if len(accounts) > 1:
+        shown = accounts.nlargest(args.max_rows, "Market Value")
+        print(f"\n🏦 Summary by Account ({len(shown):,} of {len(accounts):,}):\n")
+        print(format_table(shown))
 
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Calculate Gain/Loss
-df["Gain/Loss $"] = df["Market Value"] - df["Cost Basis"]
-df["Gain/Loss %"] = (df["Gain/Loss $"] / df["Cost Basis"]) * 100
-
-# Format $ values
-pd.options.display.float_format = '${:,.2f}'.format
-
-# Format Gain/Loss % as percentage
-df["Gain/Loss %"] = df["Gain/Loss %"].map("{:.2f}%".format)
-
-# Print individual holdings
-print("\n📊 Individual Holdings:\n")
-print(df[["Symbol", "Description", "Asset Class", "Market Value", "Cost Basis", "Gain/Loss $", "Gain/Loss %"]])
-
-# Print overall totals
-total_cost = df["Cost Basis"].sum()
-total_value = df["Market Value"].sum()
-total_gain = total_value - total_cost
-total_gain_pct = (total_gain / total_cost) * 100
-
-print("\n📈 Total Portfolio Stats:")
-print(f"Total Cost Basis:     ${total_cost:,.2f}")
-print(f"Total Market Value:   ${total_value:,.2f}")
-print(f"Total Gain/Loss:      ${total_gain:,.2f} ({total_gain_pct:.2f}%)")
-
-# Group by Asset Class
-grouped = df.groupby("Asset Class").agg({
-    "Market Value": "sum",
-    "Cost Basis": "sum",
-    "Gain/Loss $": "sum"
-})
-grouped["Gain/Loss %"] = (grouped["Gain/Loss $"] / grouped["Cost Basis"]) * 100
-grouped["Gain/Loss %"] = grouped["Gain/Loss %"].map("{:.2f}%".format)
-
-print("\n📂 Summary by Asset Class:\n")
-print(grouped)
+    print("\n📂 Summary by Asset Class:\n")
+    print(format_table(pnl["asset_classes"]))